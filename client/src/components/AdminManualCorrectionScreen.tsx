@@ -30,6 +30,7 @@ import {
   getEventParticipants,
   moveAssignment,
   clearAssignment,
+  applyAssignmentBatch,
 } from "../lib/api";
 
 type ViewMode = "loading" | "empty" | "normal";
@@ -195,7 +196,14 @@ export default function AdminManualCorrectionScreen({ eventId }: Props) {
       return;
     }
 
-    if (seat.assignment) {
+    // An occupied seat can be swapped with the selected member's current seat,
+    // after the admin confirms it.
+    const occupant = seat.assignment?.preference_id ?? null;
+    const currentSeat = seatMap.find(
+      (s) => s.assignment?.preference_id === selectedPrefId,
+    );
+    if (occupant === selectedPrefId) return;
+    if (occupant && !currentSeat) {
       setError(
         "This seat is already assigned. Pick a free seat (or clear/move first).",
       );
@@ -208,10 +216,29 @@ export default function AdminManualCorrectionScreen({ eventId }: Props) {
       return;
     }
 
+    if (
+      occupant &&
+      !window.confirm(
+        `Seat ${seat.code} is assigned to ${seat.assignment?.first_name} ${seat.assignment?.last_name}. Swap their seats?`,
+      )
+    ) {
+      return;
+    }
+
     setLoading(true);
     setError("");
     try {
-      await moveAssignment(eventId, selectedPrefId, selectedSeatId);
+      if (occupant) {
+        await applyAssignmentBatch(eventId, [
+          {
+            op: "swap",
+            preference_id: selectedPrefId,
+            other_preference_id: occupant,
+          },
+        ]);
+      } else {
+        await moveAssignment(eventId, selectedPrefId, selectedSeatId);
+      }
       setSelectedPrefId(null);
       setSelectedSeatId(null);
       await refresh();
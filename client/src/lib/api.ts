@@ -18,6 +18,8 @@ export async function apiGet(path: string): Promise<any> {
     headers: {
       ...authHeaders(),
     },
+    // sends the read-your-writes cookie, so reads right after a write hit the primary
+    credentials: "include",
   });
   if (!res.ok) throw new Error(`GET ${path} failed`);
   return res.json();
@@ -47,6 +49,7 @@ export async function apiPost(
       : body !== undefined
         ? JSON.stringify(body)
         : undefined,
+    credentials: "include",
     ...init,
   });
 
@@ -65,6 +68,7 @@ export const runAssignments = (id: string | number, payload?: any) =>
       ? { "Content-Type": "application/json", ...authHeaders() } // NEW
       : { ...authHeaders() },
     body: payload ? JSON.stringify(payload) : undefined,
+    credentials: "include",
   }).then((r) => {
     if (!r.ok) throw new Error("run failed");
     return r.json();
@@ -92,6 +96,7 @@ export const moveAssignment = (
     {
       method: "POST",
       headers: { ...authHeaders() },
+      credentials: "include",
     },
   ).then((r) => {
     if (!r.ok) throw new Error("move failed");
@@ -103,11 +108,23 @@ export const clearAssignment = (id: string | number, preferenceId: number) =>
     {
       method: "POST",
       headers: { ...authHeaders() },
+      credentials: "include",
     },
   ).then((r) => {
     if (!r.ok) throw new Error("clear failed");
   });
 
+export type AssignmentOp =
+  | { op: "move"; preference_id: number; seat_id: number }
+  | { op: "swap"; preference_id: number; other_preference_id: number }
+  | { op: "clear"; preference_id: number };
+
+// Applied in order, in one transaction: either every op succeeds or none does.
+export const applyAssignmentBatch = (
+  id: string | number,
+  ops: AssignmentOp[],
+) => apiPost(`/events/${id}/assignments/batch`, { ops });
+
 export const getPortal = (token: string) => apiGet(`/portal/${token}`);
 export const submitPortal = (token: string, body: any) =>
   apiPost(`/portal/${token}`, body);
@@ -115,11 +132,14 @@ export const submitPortal = (token: string, body: any) =>
 export const importEventMembers = (
   eventId: number,
   file: File,
-  opts?: { dryRun?: boolean },
+  opts?: { dryRun?: boolean; upsert?: boolean },
 ) => {
   const fd = new FormData();
   fd.append("file", file);
-  const qs = opts?.dryRun ? "?dry_run=1" : "";
+  const params = new URLSearchParams();
+  if (opts?.dryRun) params.set("dry_run", "1");
+  if (opts?.upsert) params.set("upsert", "1");
+  const qs = params.toString() ? `?${params.toString()}` : "";
   return apiPost(`/events/${eventId}/members/import${qs}`, fd);
 };
 
@@ -158,6 +178,7 @@ export type AuthMeOut = {
 
 export async function apiJson<T>(path: string, init?: RequestInit): Promise<T> {
   const res = await fetch(`${API_BASE}${path}`, {
+    credentials: "include",
     ...init,
     headers: {
       "Content-Type": "application/json",
@@ -230,6 +251,7 @@ export async function getVenueSeatMap(venueId: number): Promise<SeatMapSeat[]> {
   const res = await fetch(`${API_BASE}/venues/${venueId}/seatmap`, {
     method: "GET",
     headers: { ...authHeaders() },
+    credentials: "include",
   });
   if (!res.ok) {
     const text = await res.text().catch(() => "");
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.settings import settings
+
+# Admission control for the public portal.
+#
+# /portal/{token} is unauthenticated, so bots and refresh storms can otherwise tie up
+# the threadpool and the connection pool that the admin API shares. Requests over
+# the limits are rejected up front (429 for rate limits, 503 when the concurrency
+# cap is reached) instead of queuing behind the ones already running.
+
+PORTAL_PREFIX = "/portal/"
+
+
+class TokenBucketLimiter:
+    """Per-key token buckets (``rate`` tokens/s, up to ``burst``), LRU-bounded."""
+
+    def __init__(self, rate: float, burst: int, max_keys: int = 100_000):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, key: str) -> Optional[float]:
+        """Take one token. Returns None if allowed, else seconds until one is available."""
+        if self.rate <= 0:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.pop(key, (float(self.burst), now))
+            tokens = min(float(self.burst), tokens + (now - last) * self.rate)
+            if tokens >= 1.0:
+                self._buckets[key] = (tokens - 1.0, now)
+                retry_after = None
+            else:
+                self._buckets[key] = (tokens, now)
+                retry_after = (1.0 - tokens) / self.rate
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return retry_after
+
+
+class ConcurrencyLimiter:
+    """Non-blocking cap on in-flight requests; 0 means unlimited."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            if self.limit and self.in_flight >= self.limit:
+                return False
+            self.in_flight += 1
+            return True
+
+    def release(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+
+def _client_ip(scope: Scope) -> str:
+    if settings.TRUST_FORWARDED_FOR:
+        # Each proxy appends the address it saw, so only the last TRUSTED_PROXY_HOPS
+        # entries are trustworthy; anything left of them is whatever the client sent.
+        hops = [
+            hop.strip()
+            for name, value in scope.get("headers") or []
+            if name == b"x-forwarded-for"
+            for hop in value.decode("latin-1").split(",")
+            if hop.strip()
+        ]
+        if hops:
+            return hops[max(len(hops) - max(settings.TRUSTED_PROXY_HOPS, 1), 0)]
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+class AdmissionControlMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.portal_slots = ConcurrencyLimiter(settings.PORTAL_MAX_CONCURRENCY)
+        self.admin_slots = ConcurrencyLimiter(settings.ADMIN_MAX_CONCURRENCY)
+        self.per_ip = TokenBucketLimiter(settings.PORTAL_IP_RATE, settings.PORTAL_IP_BURST)
+        self.per_token = TokenBucketLimiter(settings.PORTAL_TOKEN_RATE, settings.PORTAL_TOKEN_BURST)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+
+        path: str = scope["path"]
+        if path.startswith(PORTAL_PREFIX):
+            token = path[len(PORTAL_PREFIX):].split("/", 1)[0]
+            retry_after = self.per_ip.acquire(_client_ip(scope)) or self.per_token.acquire(token)
+            if retry_after is not None:
+                await self._reject(scope, receive, send, 429, "Too many requests", retry_after)
+                return
+            slots = self.portal_slots
+        else:
+            slots = self.admin_slots
+
+        if not slots.try_acquire():
+            await self._reject(scope, receive, send, 503, "Server busy, try again", 1.0)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            slots.release()
+
+    @staticmethod
+    async def _reject(scope: Scope, receive: Receive, send: Send, status: int, detail: str, retry_after: float) -> None:
+        response = JSONResponse(
+            {"detail": detail},
+            status_code=status,
+            headers={"Retry-After": str(max(1, int(retry_after + 0.999)))},
+        )
+        await response(scope, receive, send)
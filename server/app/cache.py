@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple, TypeVar, Union
+
+from app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Response cache for hot read endpoints.
+#
+# Entries carry tags (venue:<id>, event:<id>, ...). Invalidating a tag bumps its
+# version instead of hunting down entries: an entry is only served while every tag
+# it was stored with still has the version it had then. A global epoch, bumped by
+# every invalidation, guards loads that race a write: a value loaded while any
+# invalidation happened is returned but not stored.
+#
+# RESPONSE_CACHE_BACKEND picks the store:
+#  - "sqlite" (default): one file shared by every worker on the host, so they warm
+#    it together and an invalidation anywhere is seen everywhere;
+#  - "memory": per process, LRU-bounded; other workers only see a write once their
+#    own copy expires (RESPONSE_CACHE_TTL_SECONDS), so only for a single worker;
+#  - "none": no caching.
+#
+# get_read_db() sets a per-request policy: clients pinned to the primary after a
+# write skip the cache, and values loaded from the replica are stored for at most
+# REPLICA_MAX_LAG_SECONDS, so replica lag is not stretched to the full TTL.
+#
+# Cached values are shared between requests and must be treated as read-only.
+# The sqlite backend stores them as JSON.
+
+T = TypeVar("T")
+
+_EPOCH = "*"
+
+
+class MemoryCache:
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        # key -> (expires_at, value, ((tag, version), ...))
+        self._entries: "OrderedDict[str, Tuple[float, Any, Tuple[Tuple[str, int], ...]]]" = OrderedDict()
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def epoch(self) -> int:
+        with self._lock:
+            return self._versions.get(_EPOCH, 0)
+
+    def get(self, key: str) -> Optional[Tuple[Any]]:
+        now = time.monotonic()
+        with self._lock:
+            hit = self._entries.get(key)
+            if hit is None:
+                return None
+            expires_at, value, versions = hit
+            if expires_at <= now or any(self._versions.get(t, 0) != v for t, v in versions):
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return (value,)
+
+    def set(self, key: str, value: Any, tags: Sequence[str], ttl: float, epoch: int) -> bool:
+        with self._lock:
+            if self._versions.get(_EPOCH, 0) != epoch:
+                return False
+            versions = tuple((t, self._versions.get(t, 0)) for t in tags)
+            self._entries[key] = (time.monotonic() + ttl, value, versions)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return True
+
+    def invalidate(self, tags: Sequence[str]) -> None:
+        with self._lock:
+            for tag in (*tags, _EPOCH):
+                self._versions[tag] = self._versions.get(tag, 0) + 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache_entries (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_cache_entries_expires ON cache_entries (expires_at);
+CREATE TABLE IF NOT EXISTS cache_entry_tags (
+    key TEXT NOT NULL,
+    tag TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    PRIMARY KEY (key, tag)
+);
+CREATE TABLE IF NOT EXISTS cache_tags (
+    tag TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+);
+"""
+
+_PURGE_EVERY = 256  # sets between sweeps of expired entries
+
+
+class SQLiteCache:
+    def __init__(self, path: str):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")  # a lost entry on power failure is just a miss
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self._sets = 0
+
+    def _epoch(self) -> int:
+        row = self._conn.execute("SELECT version FROM cache_tags WHERE tag = ?", (_EPOCH,)).fetchone()
+        return row[0] if row else 0
+
+    def epoch(self) -> int:
+        with self._lock:
+            return self._epoch()
+
+    def get(self, key: str) -> Optional[Tuple[Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT e.value FROM cache_entries e WHERE e.key = ? AND e.expires_at > ? AND NOT EXISTS ("
+                " SELECT 1 FROM cache_entry_tags et LEFT JOIN cache_tags t ON t.tag = et.tag"
+                " WHERE et.key = e.key AND COALESCE(t.version, 0) != et.version)",
+                (key, time.time()),
+            ).fetchone()
+        return (json.loads(row[0]),) if row else None
+
+    def set(self, key: str, value: Any, tags: Sequence[str], ttl: float, epoch: int) -> bool:
+        payload = json.dumps(value, separators=(",", ":"))
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if self._epoch() != epoch:
+                    self._conn.execute("ROLLBACK")
+                    return False
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO cache_entries (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, payload, now + ttl),
+                )
+                self._conn.execute("DELETE FROM cache_entry_tags WHERE key = ?", (key,))
+                self._conn.executemany(
+                    "INSERT INTO cache_entry_tags (key, tag, version) "
+                    "VALUES (?, ?, COALESCE((SELECT version FROM cache_tags WHERE tag = ?), 0))",
+                    [(key, t, t) for t in tags],
+                )
+                self._sets += 1
+                if self._sets % _PURGE_EVERY == 0:
+                    self._purge(now)
+                self._conn.execute("COMMIT")
+                return True
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _purge(self, now: float) -> None:
+        self._conn.execute(
+            "DELETE FROM cache_entry_tags WHERE key IN (SELECT key FROM cache_entries WHERE expires_at <= ?)",
+            (now,),
+        )
+        self._conn.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (now,))
+
+    def invalidate(self, tags: Sequence[str]) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO cache_tags (tag, version) VALUES (?, 1) "
+                "ON CONFLICT (tag) DO UPDATE SET version = version + 1",
+                [(t,) for t in (*tags, _EPOCH)],
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM cache_entry_tags")
+            self._conn.execute("DELETE FROM cache_entries")
+
+
+_cache: Optional[Any] = None
+_cache_lock = threading.Lock()
+
+# (bypass, max_ttl) for the current request; see set_request_policy()
+_request_policy: ContextVar[Tuple[bool, Optional[float]]] = ContextVar("response_cache_policy", default=(False, None))
+
+
+def set_request_policy(bypass: bool = False, max_ttl: Optional[float] = None) -> None:
+    """Set how cached() behaves for the rest of this request: ``bypass`` skips the
+    cache entirely; ``max_ttl`` caps how long loaded values are stored (0 = not stored)."""
+    _request_policy.set((bypass, max_ttl))
+
+
+def get_cache():
+    """The configured backend, or None when RESPONSE_CACHE_BACKEND is "none"."""
+    global _cache
+    if settings.RESPONSE_CACHE_BACKEND == "none":
+        return None
+    with _cache_lock:
+        if _cache is None:
+            if settings.RESPONSE_CACHE_BACKEND == "sqlite":
+                _cache = SQLiteCache(settings.RESPONSE_CACHE_PATH)
+            else:
+                _cache = MemoryCache(settings.RESPONSE_CACHE_MAX_ENTRIES)
+        return _cache
+
+
+def cached(key: str, tags: Union[Sequence[str], Callable[[T], Sequence[str]]], load: Callable[[], T]) -> T:
+    """Return the cached value for ``key``, or ``load()`` it and store it under ``tags``.
+
+    ``tags`` may be a function of the loaded value, for entries whose tags are only
+    known after loading (the epoch check makes that safe). Exceptions from ``load``
+    (e.g. a 404) propagate and nothing is stored.
+    """
+    cache = get_cache()
+    bypass, max_ttl = _request_policy.get()
+    if cache is None or bypass or settings.RESPONSE_CACHE_TTL_SECONDS <= 0:
+        return load()
+    try:
+        hit = cache.get(key)
+        if hit is not None:
+            return hit[0]
+        epoch = cache.epoch()
+    except Exception:
+        logger.exception("response cache read failed for %s", key)
+        return load()
+
+    value = load()
+    ttl = settings.RESPONSE_CACHE_TTL_SECONDS if max_ttl is None else min(settings.RESPONSE_CACHE_TTL_SECONDS, max_ttl)
+    if ttl <= 0:
+        return value
+    try:
+        cache.set(key, value, tags(value) if callable(tags) else tags, ttl, epoch)
+    except Exception:
+        logger.exception("response cache write failed for %s", key)
+    return value
+
+
+def invalidate(*tags: str) -> None:
+    """Drop every entry stored under any of ``tags``. Call after the write committed."""
+    cache = get_cache()
+    if cache is None or not tags:
+        return
+    try:
+        cache.invalidate(tags)
+    except Exception:
+        # a missed invalidation would serve stale data until the TTL, so make it loud
+        logger.exception("response cache invalidation failed for %s", tags)
+
+
+def venue_tag(venue_id: int) -> str:
+    return f"venue:{int(venue_id)}"
+
+
+def event_tag(event_id: int) -> str:
+    return f"event:{int(event_id)}"
+
+
+def org_venues_tag(org_id: int) -> str:
+    """The organization's venue list (counts of seats, zones and events per venue)."""
+    return f"org-venues:{int(org_id)}"
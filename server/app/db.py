@@ -1,10 +1,71 @@
+from typing import Any, Callable, Optional, Union
+
+from fastapi import Request
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, DeclarativeBase
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker, DeclarativeBase
+from starlette.concurrency import run_in_threadpool
+from . import cache
+from .perf import instrument_engine
+from .pool import engine_kwargs, instrument
+from .replica import ReplicaLagMonitor, wants_primary
 from .settings import settings
 
-engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
+engine = create_engine(settings.DATABASE_URL, **engine_kwargs(settings.DATABASE_URL, "primary"))
+instrument(engine, "primary")
+instrument_engine(engine)
 SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
 
+# Optional async engine for read endpoints (e.g. mysql+aiomysql://..., or
+# sqlite+aiosqlite:///... locally). Unset means reads use the sync engine.
+async_engine = (
+    create_async_engine(
+        settings.ASYNC_DATABASE_URL,
+        **engine_kwargs(settings.ASYNC_DATABASE_URL, "async", is_async=True),
+    )
+    if settings.ASYNC_DATABASE_URL
+    else None
+)
+if async_engine is not None:
+    instrument(async_engine.sync_engine, "async")
+    instrument_engine(async_engine.sync_engine)
+AsyncSessionLocal = (
+    async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+    if async_engine is not None
+    else None
+)
+
+# Optional read replica (READ_DATABASE_URL, plus READ_ASYNC_DATABASE_URL for the
+# async path). Only get_read_db() routes to it; see app/replica.py for the rules.
+replica_engine = (
+    create_engine(settings.READ_DATABASE_URL, **engine_kwargs(settings.READ_DATABASE_URL, "replica"))
+    if settings.READ_DATABASE_URL
+    else None
+)
+ReplicaSessionLocal: Optional[sessionmaker] = None
+replica_monitor: Optional[ReplicaLagMonitor] = None
+if replica_engine is not None:
+    instrument(replica_engine, "replica")
+    instrument_engine(replica_engine)
+    ReplicaSessionLocal = sessionmaker(bind=replica_engine, autocommit=False, autoflush=False)
+    replica_monitor = ReplicaLagMonitor(replica_engine)
+
+async_replica_engine = (
+    create_async_engine(
+        settings.READ_ASYNC_DATABASE_URL,
+        **engine_kwargs(settings.READ_ASYNC_DATABASE_URL, "replica_async", is_async=True),
+    )
+    if settings.READ_ASYNC_DATABASE_URL and replica_engine is not None and async_engine is not None
+    else None
+)
+AsyncReplicaSessionLocal = None
+if async_replica_engine is not None:
+    instrument(async_replica_engine.sync_engine, "replica_async")
+    instrument_engine(async_replica_engine.sync_engine)
+    AsyncReplicaSessionLocal = async_sessionmaker(bind=async_replica_engine, autoflush=False, expire_on_commit=False)
+
+ReadSession = Union[AsyncSession, Session]
+
 class Base(DeclarativeBase):
     pass
 
@@ -14,3 +75,50 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def _use_replica(request: Request) -> bool:
+    if replica_monitor is None or wants_primary(request):
+        return False
+    if replica_monitor.due():
+        return await run_in_threadpool(replica_monitor.healthy)
+    return replica_monitor.healthy()
+
+async def get_read_db(request: Request):
+    """Session for read-only async routes: an AsyncSession when ASYNC_DATABASE_URL is
+    set, otherwise a plain Session; bound to the read replica when one is configured
+    and usable for this request. Use it through run_read()."""
+    replica = await _use_replica(request)
+    # Pinned clients must see their own writes; replica reads may lag behind.
+    cache.set_request_policy(
+        bypass=wants_primary(request),
+        max_ttl=settings.REPLICA_MAX_LAG_SECONDS if replica else None,
+    )
+
+    if AsyncSessionLocal is not None:
+        maker = AsyncReplicaSessionLocal if replica and AsyncReplicaSessionLocal is not None else AsyncSessionLocal
+        async with maker() as db:
+            yield db
+        return
+
+    db = (ReplicaSessionLocal if replica else SessionLocal)()
+    try:
+        yield db
+    finally:
+        db.close()  # run_read already returned the connection
+
+async def run_read(db: ReadSession, fn: Callable[..., Any], *args: Any) -> Any:
+    """Call a sync service function fn(session, *args) without tying up a threadpool
+    thread when the async engine is enabled (the function runs in a greenlet on the
+    event loop and every query awaits the async driver)."""
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args)
+
+    def call():
+        # Give the connection back on the same thread: closing later from another
+        # threadpool task can deadlock once every thread is waiting for a connection.
+        try:
+            return fn(db, *args)
+        finally:
+            db.close()
+
+    return await run_in_threadpool(call)
@@ -1,18 +1,19 @@
+import hmac
 import os
-from fastapi import Depends, HTTPException, Request
+
+from fastapi import HTTPException, Request
 from jose import JWTError, jwt
-from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from app.settings import settings
 
-
-from app.db import get_db
-from app import models
+from app.services.principal_cache import CurrentUser, get_principal, load_principal, store_principal
 
 JWT_SECRET = settings.JWT_SECRET
 JWT_ALG = os.getenv("JWT_ALG", "HS256")
 
 
-def get_current_user(request: Request, db: Session = Depends(get_db)) -> models.User:
+# async so that a cache hit costs no threadpool hop; only a miss touches the database
+async def get_current_user(request: Request) -> CurrentUser:
     auth = request.headers.get("authorization") or request.headers.get("Authorization")
     if not auth or not auth.lower().startswith("bearer "):
         raise HTTPException(status_code=401, detail="Missing bearer token")
@@ -28,12 +29,34 @@ def get_current_user(request: Request, db: Session = Depends(get_db)) -> models.
     if user_id is None or org_id is None:
         raise HTTPException(status_code=401, detail="Invalid token payload")
 
-    user = (
-        db.query(models.User)
-        .filter(models.User.id == int(user_id), models.User.org_id == int(org_id))
-        .first()
-    )
-    if not user:
-        raise HTTPException(status_code=401, detail="User not found")
-
-    return user
\ No newline at end of file
+    key = (int(user_id), int(org_id))
+    principal = get_principal(key) if settings.AUTH_CACHE_TTL_SECONDS > 0 else None
+    if principal is None:
+        principal = await run_in_threadpool(load_principal, *key)
+        if principal is None:
+            raise HTTPException(status_code=401, detail="User not found")
+        if settings.AUTH_CACHE_TTL_SECONDS > 0:
+            store_principal(key, principal)
+
+    # Tokens issued before the user's token_version was bumped (logout, password change) are revoked.
+    if int(payload.get("tv", 0)) != principal.token_version:
+        raise HTTPException(status_code=401, detail="Token revoked")
+
+    return principal
+
+
+_LOOPBACK = {"127.0.0.1", "::1", "localhost"}
+
+
+def require_internal(request: Request) -> None:
+    """Gate for /internal/*: X-Internal-Token == INTERNAL_TOKEN, or a loopback caller
+    when INTERNAL_TRUST_LOOPBACK is on. A reverse proxy on the same host makes every
+    request look like loopback, so that opt-in is ignored with TRUST_FORWARDED_FOR."""
+    token = request.headers.get("x-internal-token")
+    if settings.INTERNAL_TOKEN and token and hmac.compare_digest(token, settings.INTERNAL_TOKEN):
+        return
+    if settings.INTERNAL_TRUST_LOOPBACK and not settings.TRUST_FORWARDED_FOR:
+        client = request.client.host if request.client else None
+        if client in _LOOPBACK:
+            return
+    raise HTTPException(status_code=403, detail="Forbidden")
@@ -1,18 +1,48 @@
+from contextlib import asynccontextmanager
+import threading
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware  
  
-from .db import Base, engine
+from .db import async_engine, async_replica_engine
+from app.admission import AdmissionControlMiddleware
+from app.perf import PerfMiddleware
+from app.replica import ReadYourWritesMiddleware
+from app.security import shutdown_hash_pool
 from app.routers.auth import router as auth_router
 from app.routers.organizations import router as organizations_router
 from app.routers.venues import router as venues_router
 from app.routers.events import router as events_router
 from app.routers.portal import router as portal_router
-from app import models
+from app.routers.internal import router as internal_router
+from app.services import events_service, portal_service
+from app.settings import settings
+
+# The schema is managed by Alembic (`alembic upgrade head`); importing the app and
+# starting a worker does not touch the database.
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    events_service.start_import_job_sweeper()
+    if settings.PORTAL_WRITE_BEHIND:
+        portal_service.start_write_behind_writer()
+    if settings.WARM_CACHES_ON_STARTUP:
+        threading.Thread(target=portal_service.warm_event_contexts, name="cache-warmup", daemon=True).start()
+    yield
+    shutdown_hash_pool()
+    for eng in (async_engine, async_replica_engine):
+        if eng is not None:
+            await eng.dispose()
 
-Base.metadata.create_all(bind=engine)
 
-app = FastAPI(title="SeatFlow API")
+app = FastAPI(title="SeatFlow API", lifespan=lifespan)
 
+# Innermost, so only admitted requests are measured.
+app.add_middleware(PerfMiddleware)
+# Added before CORS so rejections still carry CORS headers.
+app.add_middleware(ReadYourWritesMiddleware)
+app.add_middleware(AdmissionControlMiddleware)
 app.add_middleware(
   CORSMiddleware,
   allow_origins=["http://localhost:5173", "http://localhost:3000"],
@@ -25,5 +55,6 @@ app.include_router(auth_router)
 app.include_router(organizations_router)
 app.include_router(venues_router)
 app.include_router(events_router)
-app.include_router(portal_router)  
+app.include_router(portal_router)
+app.include_router(internal_router)  
 
@@ -1,42 +1,89 @@
 from sqlalchemy import BigInteger, String, Integer, Date, DateTime, ForeignKey, Text, Enum, Column, Boolean, text, TIMESTAMP
+from sqlalchemy import CHAR, Index, UniqueConstraint
+from sqlalchemy.dialects import mysql
 from sqlalchemy.orm import Mapped, mapped_column
 from typing import Optional
 from .db import Base
 
+# Schema changes go through Alembic (server/migrations); keep these models, the
+# latest migration and seatflow.sql in step. Index/constraint names follow the dump.
+
+# BIGINT UNSIGNED on MySQL (FK columns must match the referenced key exactly);
+# plain INTEGER on SQLite so the PK aliases the rowid and autoincrements (and bulk
+# INSERT ... RETURNING can batch against it).
+BigIntFK = BigInteger().with_variant(mysql.BIGINT(unsigned=True), "mysql")
+BigIntPK = BigIntFK.with_variant(Integer, "sqlite")
+# TINYINT(1) flags that the code reads as 0/1 integers
+IntFlag = Integer().with_variant(mysql.TINYINT(1), "mysql")
+
 
 class Venue(Base):
     __tablename__ = "venues"
+    # tenant-scoped reads filter on org_id first, so indexes lead with it
+    __table_args__ = (Index("idx_venues_org_name", "org_id", "name"),)
 
-    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    id: Mapped[int] = mapped_column(BigIntPK, primary_key=True)
+    org_id: Mapped[int] = mapped_column(
+        BigIntFK, ForeignKey("organizations.id", name="fk_venues_org", ondelete="RESTRICT", onupdate="CASCADE"), nullable=False
+    )
     name: Mapped[str] = mapped_column(String(255), nullable=False)
+    created_at = Column(TIMESTAMP, nullable=False, server_default=text("CURRENT_TIMESTAMP"))
 
     location: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
-    status: Mapped[str] = mapped_column(String(20), nullable=False, default="active")
-    category: Mapped[str] = mapped_column(String(30), nullable=False, default="Other")
+    status: Mapped[str] = mapped_column(
+        Enum("active", "inactive", name="venue_status"),
+        nullable=False,
+        default="active",
+        server_default="active",
+    )
+    category: Mapped[str] = mapped_column(
+        Enum("Convention", "Stadium", "Theater", "Synagogue", "EventHall", "Airplane", "Other", name="venue_category"),
+        nullable=False,
+        default="Other",
+        server_default="Other",
+    )
 
 
 class Seat(Base):
     __tablename__ = "seats"
-    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
-    venue_id: Mapped[int] = mapped_column(ForeignKey("venues.id"), nullable=False)
+    __table_args__ = (
+        UniqueConstraint("venue_id", "code", name="uq_seat_code_per_venue"),
+        Index("idx_seats_venue", "venue_id"),
+        Index("idx_seats_accessible", "venue_id", "is_accessible"),
+    )
+    id: Mapped[int] = mapped_column(BigIntPK, primary_key=True)
+    venue_id: Mapped[int] = mapped_column(
+        BigIntFK, ForeignKey("venues.id", name="fk_seats_venue", ondelete="CASCADE", onupdate="CASCADE"), nullable=False
+    )
 
     code: Mapped[str] = mapped_column(String(50), nullable=False)
     zone: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
     row_label: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)
     seat_number: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)
 
-    is_accessible: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
-    is_blocked: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
-    is_aisle: Mapped[int] = mapped_column(Integer, nullable=False, default=0)  # NEW
+    is_accessible: Mapped[int] = mapped_column(IntFlag, nullable=False, default=0, server_default=text("0"))
+    is_blocked: Mapped[int] = mapped_column(IntFlag, nullable=False, default=0, server_default=text("0"))
+    is_aisle: Mapped[int] = mapped_column(IntFlag, nullable=False, default=0, server_default=text("0"))  # NEW
     x: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
     y: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
-    created_at: Mapped[Optional[DateTime]] = mapped_column(DateTime, nullable=True)
+    created_at = Column(TIMESTAMP, nullable=False, server_default=text("CURRENT_TIMESTAMP"))
 
 
 class Event(Base):
     __tablename__ = "events"
-    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
-    venue_id: Mapped[int] = mapped_column(ForeignKey("venues.id"), nullable=False)
+    __table_args__ = (
+        Index("idx_events_venue", "venue_id"),
+        Index("idx_events_org_date", "org_id", "event_date"),
+        Index("idx_events_org_venue", "org_id", "venue_id"),
+    )
+    id: Mapped[int] = mapped_column(BigIntPK, primary_key=True)
+    # always the venue's org_id; copied so event queries need no join to scope by tenant
+    org_id: Mapped[int] = mapped_column(
+        BigIntFK, ForeignKey("organizations.id", name="fk_events_org", ondelete="RESTRICT", onupdate="CASCADE"), nullable=False
+    )
+    venue_id: Mapped[int] = mapped_column(
+        BigIntFK, ForeignKey("venues.id", name="fk_events_venue", ondelete="RESTRICT", onupdate="CASCADE"), nullable=False
+    )
 
     name: Mapped[str] = mapped_column(String(255), nullable=False)
     event_date: Mapped[Optional[str]] = mapped_column(DateTime, nullable=True)
@@ -45,65 +92,169 @@ class Event(Base):
         Enum("draft", "preferences_open", "locked", "published", name="event_status"),
         nullable=False,
         default="draft",
+        server_default="draft",
     )
+    created_at = Column(TIMESTAMP, nullable=False, server_default=text("CURRENT_TIMESTAMP"))
 
 
 class Member(Base):
     __tablename__ = "members"
-    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    __table_args__ = (Index("idx_members_name", "last_name", "first_name"),)
+    id: Mapped[int] = mapped_column(BigIntPK, primary_key=True)
     first_name: Mapped[str] = mapped_column(String(100), nullable=False)
     last_name: Mapped[str] = mapped_column(String(100), nullable=False)
     phone: Mapped[Optional[str]] = mapped_column(String(30), nullable=True)
 
     gender: Mapped[str] = mapped_column(Enum("male", "female", name="gender_enum"), nullable=False)
     birth_date: Mapped[Optional[str]] = mapped_column(Date, nullable=True)
+    needs_accessible = Column(Boolean, nullable=False, server_default=text("0"))
+    created_at = Column(TIMESTAMP, nullable=False, server_default=text("CURRENT_TIMESTAMP"))
 
 
 class MemberPreference(Base):
     __tablename__ = "member_preferences"
+    __table_args__ = (
+        UniqueConstraint("event_id", "member_id", name="uq_event_member"),
+        UniqueConstraint("invite_token", name="uq_invite_token"),
+        UniqueConstraint("event_id", "assigned_seat_id", name="uq_event_assigned_seat"),
+        Index("idx_prefs_event", "event_id"),
+        Index("idx_prefs_member", "member_id"),
+        Index("fk_member_prefs_assigned_seat", "assigned_seat_id"),
+    )
 
-    id = Column(BigInteger, primary_key=True, index=True)
-    event_id = Column(BigInteger, ForeignKey("events.id", ondelete="CASCADE"), nullable=False)
-    member_id = Column(BigInteger, ForeignKey("members.id", ondelete="CASCADE"), nullable=False)
+    id = Column(BigIntPK, primary_key=True)
+    event_id = Column(
+        BigIntFK, ForeignKey("events.id", name="fk_prefs_event", ondelete="CASCADE", onupdate="CASCADE"), nullable=False
+    )
+    member_id = Column(
+        BigIntFK, ForeignKey("members.id", name="fk_prefs_member", ondelete="CASCADE", onupdate="CASCADE"), nullable=False
+    )
 
     group_code = Column(String(100), nullable=True)
     wants_aisle = Column(Boolean, nullable=False, server_default=text("0"))
     preferred_zone = Column(String(100), nullable=True)
     preferred_seat_code = Column(String(50), nullable=True)
     needs_accessible = Column(Boolean, nullable=False, server_default=text("0"))
-    invite_token = Column(String(36), nullable=False, unique=True)
+    invite_token = Column(CHAR(36), nullable=False)
 
     submitted_at = Column(DateTime, nullable=True)
 
-    created_at = Column(DateTime, nullable=False, server_default=text("CURRENT_TIMESTAMP"))
+    created_at = Column(TIMESTAMP, nullable=False, server_default=text("CURRENT_TIMESTAMP"))
     updated_at = Column(
-        DateTime,
+        TIMESTAMP,
         nullable=False,
         server_default=text("CURRENT_TIMESTAMP"),
         server_onupdate=text("CURRENT_TIMESTAMP"),
     )
 
-    assigned_seat_id = Column(BigInteger, ForeignKey("seats.id", ondelete="SET NULL"), nullable=True)
+    assigned_seat_id = Column(
+        BigIntFK,
+        ForeignKey("seats.id", name="fk_member_prefs_assigned_seat", ondelete="SET NULL", onupdate="CASCADE"),
+        nullable=True,
+    )
 
 
 class Organization(Base):
     __tablename__ = "organizations"
+    __table_args__ = (UniqueConstraint("name", name="uq_org_name"),)
 
-    id = Column(BigInteger, primary_key=True, autoincrement=True)
-    name = Column(String(255), nullable=False, unique=True)
+    id = Column(BigIntPK, primary_key=True, autoincrement=True)
+    name = Column(String(255), nullable=False)
     created_at = Column(TIMESTAMP, nullable=False, server_default=text("CURRENT_TIMESTAMP"))
 
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        UniqueConstraint("org_id", "email", name="uq_user_email_per_org"),
+        Index("idx_users_org", "org_id"),
+    )
 
-    id = Column(BigInteger, primary_key=True, autoincrement=True)
-    org_id = Column(BigInteger, nullable=False, index=True)
+    id = Column(BigIntPK, primary_key=True, autoincrement=True)
+    org_id = Column(
+        BigIntFK,
+        ForeignKey("organizations.id", name="fk_users_org", ondelete="RESTRICT", onupdate="CASCADE"),
+        nullable=False,
+    )
 
     email = Column(String(255), nullable=False)
     password_hash = Column(String(255), nullable=False)
 
     created_at = Column(TIMESTAMP, nullable=False, server_default=text("CURRENT_TIMESTAMP"))
 
-    refresh_token_hash = Column(String(255), nullable=True)
-    refresh_token_expires_at = Column(DateTime, nullable=True)
+    # bumped to revoke every access token issued so far (e.g. on password change)
+    token_version = Column(Integer, nullable=False, default=0, server_default=text("0"))
+
+
+class UserSession(Base):
+    """One refresh-token session; a user may have several (one per device/login)."""
+    __tablename__ = "user_sessions"
+    __table_args__ = (
+        UniqueConstraint("token_hash", name="uq_user_sessions_token"),
+        Index("idx_user_sessions_user", "user_id"),
+        Index("idx_user_sessions_expires", "expires_at"),
+    )
+
+    id = Column(BigIntPK, primary_key=True, autoincrement=True)
+    user_id = Column(
+        BigIntFK, ForeignKey("users.id", name="fk_user_sessions_user", ondelete="CASCADE"), nullable=False
+    )
+
+    # sha256 hex of the peppered refresh token; the token itself is never stored
+    token_hash = Column(CHAR(64), nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+
+    created_at = Column(TIMESTAMP, nullable=False, server_default=text("CURRENT_TIMESTAMP"))
+    rotated_at = Column(DateTime, nullable=True)
+
+
+class ImportJob(Base):
+    __tablename__ = "import_jobs"
+    __table_args__ = (
+        Index("idx_import_jobs_event", "event_id"),
+        Index("idx_import_jobs_status", "status"),
+    )
+
+    id = Column(String(36), primary_key=True)
+    event_id = Column(
+        BigIntFK, ForeignKey("events.id", name="fk_import_jobs_event", ondelete="CASCADE"), nullable=False
+    )
+
+    status = Column(String(20), nullable=False, default="queued")  # queued | running | done | failed
+    upsert = Column(Boolean, nullable=False, server_default=text("0"))
+    file_path = Column(String(500), nullable=False)
+
+    # checkpoint: data rows consumed by committed batches
+    rows_processed = Column(Integer, nullable=False, default=0)
+    created_members = Column(Integer, nullable=False, default=0)
+    updated_members = Column(Integer, nullable=False, default=0)
+    unchanged_members = Column(Integer, nullable=False, default=0)
+    preferences_created = Column(Integer, nullable=False, default=0)
+    preferences_updated = Column(Integer, nullable=False, default=0)
+    error_count = Column(Integer, nullable=False, default=0)
+    errors = Column(Text, nullable=True)  # JSON list, capped
+    message = Column(Text, nullable=True)
+
+    worker_id = Column(String(64), nullable=True)
+    attempts = Column(Integer, nullable=False, server_default=text("0"))  # claims so far
+    heartbeat_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, nullable=False, server_default=text("CURRENT_TIMESTAMP"))
+    finished_at = Column(DateTime, nullable=True)
+
+
+# The event's latest assignment run; the row doubles as the per-event run lock.
+class AssignmentRun(Base):
+    __tablename__ = "assignment_runs"
+
+    event_id = Column(
+        BigIntFK, ForeignKey("events.id", name="fk_assignment_runs_event", ondelete="CASCADE"), primary_key=True
+    )
+    run_id = Column(String(36), nullable=False)
+    status = Column(String(20), nullable=False)  # running | done | failed
+    params = Column(Text, nullable=False)  # weights as JSON; equal params coalesce
+    result = Column(Text, nullable=True)  # JSON response of a finished run
+    message = Column(Text, nullable=True)
+
+    worker_id = Column(String(64), nullable=True)
+    started_at = Column(DateTime, nullable=False)
+    finished_at = Column(DateTime, nullable=True)
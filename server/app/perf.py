@@ -0,0 +1,331 @@
+from __future__ import annotations
+
+import functools
+import inspect
+import logging
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import ORMExecuteState, Session
+from sqlalchemy.sql.elements import TextClause
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Per-request performance metrics.
+#
+# PerfMiddleware opens a RequestStats for every HTTP request. Cursor events on each
+# engine add the statement count, SQL time and statement shapes to it, and Session
+# results add the rows fetched. TimedRoute notes when the endpoint returned, so the
+# time FastAPI then spends validating and encoding the response is reported as
+# serialization. Finished requests feed per-route histograms, served by
+# /internal/metrics in Prometheus text format.
+#
+# A statement shape (the SQL with literals, parameters and IN lists collapsed) seen
+# PERF_N_PLUS_ONE_THRESHOLD times in one request is logged as a likely N+1 query.
+
+
+class RequestStats:
+    __slots__ = (
+        "route", "sql_count", "sql_seconds", "rows", "serialize_seconds", "endpoint_done", "shapes", "shapes_paused"
+    )
+
+    def __init__(self) -> None:
+        self.route: Optional[str] = None
+        self.sql_count = 0
+        self.sql_seconds = 0.0
+        self.rows = 0
+        self.serialize_seconds = 0.0
+        self.endpoint_done: Optional[float] = None
+        self.shapes: Counter = Counter()
+        self.shapes_paused = 0
+
+    def repeated_shapes(self, threshold: int) -> List[Tuple[str, int]]:
+        if threshold <= 0:
+            return []
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold]
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def current_stats() -> Optional[RequestStats]:
+    return _current.get()
+
+
+@contextmanager
+def polling() -> Iterator[None]:
+    """Statements run inside are deliberate repeats (e.g. waiting on another worker):
+    they count towards the request's SQL totals but not towards N+1 detection."""
+    stats = _current.get()
+    if stats is None:
+        yield
+        return
+    stats.shapes_paused += 1
+    try:
+        yield
+    finally:
+        stats.shapes_paused -= 1
+
+
+# ---- statement shapes ----
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAM = re.compile(r"%\(\w+\)s|%s|(?<!:):\w+|\?")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE = re.compile(r"\s+")
+
+
+@functools.lru_cache(maxsize=4096)
+def statement_shape(statement: str) -> str:
+    s = _STRING.sub("?", statement)
+    s = _PARAM.sub("?", s)
+    s = _NUMBER.sub("?", s)
+    s = _IN_LIST.sub("(?)", s)
+    return _SPACE.sub(" ", s).strip()
+
+
+# ---- SQLAlchemy hooks ----
+
+def instrument_engine(engine: Engine) -> None:
+    """Count statements and SQL time on engine (pass .sync_engine for async engines)."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if _current.get() is not None:
+            conn.info.setdefault("perf_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        stats = _current.get()
+        started = conn.info.get("perf_started")
+        if stats is None or not started:
+            return
+        stats.sql_count += 1
+        stats.sql_seconds += time.perf_counter() - started.pop()
+        if not stats.shapes_paused:
+            stats.shapes[statement_shape(statement)] += 1
+
+    # after_cursor_execute does not run when the statement raises (an IntegrityError
+    # turned into a 409, say), so pop the start time here or it stays on the pooled
+    # connection for good. The failed statement still counts.
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        conn = context.connection
+        started = conn.info.get("perf_started") if conn is not None else None
+        if not started:
+            return
+        elapsed = time.perf_counter() - started.pop()
+        stats = _current.get()
+        if stats is not None and context.statement is not None:
+            stats.sql_count += 1
+            stats.sql_seconds += elapsed
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _count_rows(state: ORMExecuteState):
+    # Rows are counted by buffering the result, which Query.all() and friends do
+    # anyway; streamed results (yield_per / stream_results) are left alone.
+    stats = _current.get()
+    if stats is None or not (state.is_select or isinstance(state.statement, TextClause)):
+        return None
+    options = state.execution_options
+    if options.get("yield_per") or options.get("stream_results"):
+        return None
+    result = state.invoke_statement()
+    if not getattr(result, "returns_rows", True):
+        return result
+    frozen = result.freeze()
+    stats.rows += len(frozen.data)
+    return frozen()
+
+
+# ---- routes ----
+
+def _mark_endpoint_done(endpoint: Callable[..., Any]) -> Callable[..., Any]:
+    if inspect.iscoroutinefunction(endpoint):
+
+        @functools.wraps(endpoint)
+        async def timed_async(*args, **kwargs):
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                stats = _current.get()
+                if stats is not None:
+                    stats.endpoint_done = time.perf_counter()
+
+        return timed_async
+
+    @functools.wraps(endpoint)
+    def timed(*args, **kwargs):
+        try:
+            return endpoint(*args, **kwargs)
+        finally:
+            stats = _current.get()
+            if stats is not None:
+                stats.endpoint_done = time.perf_counter()
+
+    return timed
+
+
+class TimedRoute(APIRoute):
+    """APIRoute that labels the request's stats with its path template and measures
+    response serialization. Use as APIRouter(route_class=TimedRoute)."""
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any):
+        super().__init__(path, _mark_endpoint_done(endpoint), **kwargs)
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        route = self.path
+
+        async def timed_handler(request):
+            stats = _current.get()
+            if stats is None:
+                return await handler(request)
+            stats.route = route
+            response = await handler(request)
+            if stats.endpoint_done is not None:
+                stats.serialize_seconds = time.perf_counter() - stats.endpoint_done
+            return response
+
+        return timed_handler
+
+
+# ---- histograms ----
+
+Labels = Tuple[str, str]  # (method, route)
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets: Sequence[float]):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        # labels -> ([per-bucket counts..., +Inf count], sum)
+        self._series: Dict[Labels, Tuple[List[int], float]] = {}
+
+    def observe(self, labels: Labels, value: float) -> None:
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._series.get(labels) or ([0] * (len(self.buckets) + 1), 0.0)
+            counts[i] += 1
+            self._series[labels] = (counts, total + value)
+
+    def render(self, out: List[str]) -> None:
+        out.append(f"# HELP {self.name} {self.help}")
+        out.append(f"# TYPE {self.name} histogram")
+        with self._lock:
+            series = sorted((k, (list(c), s)) for k, (c, s) in self._series.items())
+        for (method, route), (counts, total) in series:
+            base = f'method="{_escape(method)}",route="{_escape(route)}"'
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                out.append(f'{self.name}_bucket{{{base},le="{bound:g}"}} {cumulative}')
+            cumulative += counts[-1]
+            out.append(f'{self.name}_bucket{{{base},le="+Inf"}} {cumulative}')
+            out.append(f"{self.name}_sum{{{base}}} {total:.6g}")
+            out.append(f"{self.name}_count{{{base}}} {cumulative}")
+
+
+class CounterMetric:
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._lock = threading.Lock()
+        self._values: Counter = Counter()
+
+    def inc(self, labels: Labels, amount: int = 1) -> None:
+        with self._lock:
+            self._values[labels] += amount
+
+    def render(self, out: List[str]) -> None:
+        out.append(f"# HELP {self.name} {self.help}")
+        out.append(f"# TYPE {self.name} counter")
+        with self._lock:
+            values = sorted(self._values.items())
+        for (method, route), value in values:
+            out.append(f'{self.name}{{method="{_escape(method)}",route="{_escape(route)}"}} {value}')
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+_SECONDS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+_COUNTS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+REQUEST_SECONDS = Histogram("seatflow_request_duration_seconds", "Time to handle the request.", _SECONDS)
+SQL_STATEMENTS = Histogram("seatflow_request_sql_statements", "SQL statements executed per request.", _COUNTS)
+SQL_SECONDS = Histogram("seatflow_request_sql_seconds", "Time spent executing SQL per request.", _SECONDS)
+ROWS_FETCHED = Histogram(
+    "seatflow_request_rows_fetched", "Rows fetched through ORM sessions per request.", _COUNTS + (5000, 10000, 50000)
+)
+SERIALIZE_SECONDS = Histogram(
+    "seatflow_request_serialization_seconds", "Time spent validating and encoding the response.", _SECONDS
+)
+N_PLUS_ONE = CounterMetric("seatflow_request_n_plus_one_total", "Requests that repeated a statement shape.")
+
+_METRICS = (REQUEST_SECONDS, SQL_STATEMENTS, SQL_SECONDS, ROWS_FETCHED, SERIALIZE_SECONDS, N_PLUS_ONE)
+
+
+def render_metrics() -> str:
+    out: List[str] = []
+    for metric in _METRICS:
+        metric.render(out)
+    return "\n".join(out) + "\n"
+
+
+def _record(method: str, stats: RequestStats, seconds: float) -> None:
+    labels = (method, stats.route or "<unmatched>")
+    REQUEST_SECONDS.observe(labels, seconds)
+    SQL_STATEMENTS.observe(labels, stats.sql_count)
+    SQL_SECONDS.observe(labels, stats.sql_seconds)
+    ROWS_FETCHED.observe(labels, stats.rows)
+    SERIALIZE_SECONDS.observe(labels, stats.serialize_seconds)
+
+    repeated = stats.repeated_shapes(settings.PERF_N_PLUS_ONE_THRESHOLD)
+    if repeated:
+        N_PLUS_ONE.inc(labels)
+        for shape, n in repeated:
+            logger.warning("likely N+1 in %s %s: %d x %s", labels[0], labels[1], n, shape[:500])
+
+    logger.debug(
+        "%s %s %.1fms sql=%d/%.1fms rows=%d serialize=%.1fms",
+        labels[0], labels[1], seconds * 1000, stats.sql_count, stats.sql_seconds * 1000,
+        stats.rows, stats.serialize_seconds * 1000,
+    )
+
+
+# ---- middleware ----
+
+class PerfMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.PERF_METRICS:
+            await self.app(scope, receive, send)
+            return
+        stats = RequestStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current.reset(token)
+            _record(scope["method"], stats, time.perf_counter() - start)
@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Any, Dict, Type
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+from app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Connection pool configuration and instrumentation.
+#
+# Every engine gets a QueuePool sized from Settings and a PoolMetrics object that
+# counts checkouts, how many of them had to wait for a connection, timeouts,
+# overflow use and checkout latency. pool_snapshot() is what /internal/pool serves.
+
+
+class PoolMetrics:
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.waits = 0
+        self.timeouts = 0
+        self.pings = 0
+        self.ping_failures = 0
+        self.checkout_seconds_total = 0.0
+        self.checkout_seconds_max = 0.0
+        self.peak_checked_out = 0
+        self.peak_overflow = 0
+
+    def record_checkout(self, seconds: float, waited: bool, checked_out: int, overflow: int) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.waits += int(waited)
+            self.checkout_seconds_total += seconds
+            self.checkout_seconds_max = max(self.checkout_seconds_max, seconds)
+            self.peak_checked_out = max(self.peak_checked_out, checked_out)
+            self.peak_overflow = max(self.peak_overflow, overflow)
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def record_ping(self, ok: bool) -> None:
+        with self._lock:
+            self.pings += 1
+            self.ping_failures += int(not ok)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "waits": self.waits,
+                "timeouts": self.timeouts,
+                "pings": self.pings,
+                "ping_failures": self.ping_failures,
+                "checkout_ms_avg": round(1000 * self.checkout_seconds_total / self.checkouts, 3) if self.checkouts else 0.0,
+                "checkout_ms_max": round(1000 * self.checkout_seconds_max, 3),
+                "peak_checked_out": self.peak_checked_out,
+                "peak_overflow": self.peak_overflow,
+            }
+
+
+class _InstrumentedPoolMixin:
+    metrics: PoolMetrics
+
+    def _do_get(self):
+        # Same condition QueuePool uses to decide to block on the queue.
+        waited = self.checkedin() == 0 and self._max_overflow > -1 and self._overflow >= self._max_overflow
+        start = time.perf_counter()
+        try:
+            rec = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.record_timeout()
+            raise
+        self.metrics.record_checkout(
+            time.perf_counter() - start, waited, self.checkedout(), max(0, self.overflow())
+        )
+        return rec
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+_metrics: Dict[str, PoolMetrics] = {}
+_pools: Dict[str, Engine] = {}
+
+
+def _pool_class(base: Type[Pool], name: str) -> Type[Pool]:
+    # metrics live on a per-engine subclass so they survive Pool.recreate()
+    metrics = _metrics.setdefault(name, PoolMetrics(name))
+    return type(f"{name.title()}{base.__name__}", (base,), {"metrics": metrics})
+
+
+def engine_kwargs(url: str, name: str, is_async: bool = False) -> Dict[str, Any]:
+    """create_engine()/create_async_engine() keyword arguments for the configured pool."""
+    u = make_url(url)
+    if u.get_backend_name() == "sqlite" and (u.database or ":memory:") == ":memory:":
+        return {}  # in-memory SQLite keeps its own single-connection pool
+
+    base = InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool
+    kwargs: Dict[str, Any] = {
+        "poolclass": _pool_class(base, name),
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_PRE_PING == "always",
+    }
+    return kwargs
+
+
+def instrument(engine: Engine, name: str) -> None:
+    """Register engine for pool_snapshot() and install the idle pre-ping strategy."""
+    _pools[name] = engine
+    _metrics.setdefault(name, PoolMetrics(name))
+    if settings.DB_PRE_PING == "idle":
+        _install_idle_ping(engine.pool, _metrics[name])
+
+
+def _install_idle_ping(pool: Pool, metrics: PoolMetrics) -> None:
+    # pool_pre_ping costs a round trip on every checkout. Only connections that sat
+    # idle longer than DB_PRE_PING_IDLE_SECONDS (the ones a server or proxy may have
+    # dropped) get pinged; a failed ping makes the pool reconnect transparently.
+    idle = settings.DB_PRE_PING_IDLE_SECONDS
+
+    @event.listens_for(pool, "checkin")
+    def _checkin(dbapi_connection, record):
+        if record is not None:
+            record.info["checked_in_at"] = time.monotonic()
+
+    @event.listens_for(pool, "checkout")
+    def _checkout(dbapi_connection, record, proxy):
+        last = record.info.get("checked_in_at")
+        if last is None or time.monotonic() - last < idle:
+            return
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute("SELECT 1")
+            cursor.fetchall()
+        except Exception:
+            metrics.record_ping(False)
+            logger.info("stale pooled connection dropped after %.0fs idle", time.monotonic() - last)
+            raise exc.DisconnectionError()
+        finally:
+            try:
+                cursor.close()
+            except Exception:
+                pass
+        metrics.record_ping(True)
+
+
+def pool_snapshot() -> Dict[str, Any]:
+    out: Dict[str, Any] = {}
+    for name, engine in _pools.items():
+        pool = engine.pool
+        entry: Dict[str, Any] = {"pool": type(pool).__name__}
+        if isinstance(pool, QueuePool):
+            entry.update(
+                size=pool.size(),
+                checked_out=pool.checkedout(),
+                checked_in=pool.checkedin(),
+                overflow=max(0, pool.overflow()),
+                max_overflow=pool._max_overflow,
+            )
+        entry.update(_metrics[name].snapshot())
+        out[name] = entry
+    return out
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Read-replica routing.
+#
+# Read-only endpoints go to the replica (READ_DATABASE_URL) unless:
+#  - the client wrote something in the last READ_YOUR_WRITES_SECONDS (the
+#    ReadYourWritesMiddleware cookie) or asks for it with X-Read-Consistency: primary;
+#  - the replica is lagging more than REPLICA_MAX_LAG_SECONDS, or its lag cannot
+#    be measured. Lag is sampled at most every REPLICA_LAG_CHECK_SECONDS.
+
+RYW_COOKIE = "sf_rw"
+_SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+class ReplicaLagMonitor:
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self._lock = threading.Lock()
+        self._checked_at = 0.0
+        self._healthy = True
+        self.lag_seconds: Optional[float] = None
+
+    def due(self) -> bool:
+        """True when healthy() would sample the replica (i.e. do I/O)."""
+        return (
+            settings.REPLICA_MAX_LAG_SECONDS > 0
+            and time.monotonic() - self._checked_at >= settings.REPLICA_LAG_CHECK_SECONDS
+        )
+
+    def healthy(self) -> bool:
+        """Whether reads may use the replica; re-samples the lag when it is due."""
+        if settings.REPLICA_MAX_LAG_SECONDS <= 0:
+            return True
+        now = time.monotonic()
+        if now - self._checked_at < settings.REPLICA_LAG_CHECK_SECONDS:
+            return self._healthy
+        # one caller samples, the rest keep using the previous verdict
+        if not self._lock.acquire(blocking=False):
+            return self._healthy
+        try:
+            self._checked_at = now
+            self.lag_seconds = self._measure()
+            healthy = self.lag_seconds is not None and self.lag_seconds <= settings.REPLICA_MAX_LAG_SECONDS
+            if healthy != self._healthy:
+                logger.warning("read replica %s (lag=%s)", "back in use" if healthy else "bypassed", self.lag_seconds)
+            self._healthy = healthy
+            return healthy
+        finally:
+            self._lock.release()
+
+    def _measure(self) -> Optional[float]:
+        try:
+            with self.engine.connect() as conn:
+                if settings.REPLICA_LAG_QUERY:
+                    value = conn.execute(text(settings.REPLICA_LAG_QUERY)).scalar()
+                    return None if value is None else float(value)
+                if self.engine.dialect.name != "mysql":
+                    return 0.0  # local stand-ins (e.g. SQLite) have no replication to measure
+                row = conn.execute(text("SHOW REPLICA STATUS")).mappings().first()
+                if row is None:
+                    return 0.0  # not configured as a replica: it is the source itself
+                lag = row.get("Seconds_Behind_Source")
+                return None if lag is None else float(lag)
+        except Exception:
+            logger.exception("replica lag check failed")
+            return None
+
+
+def wants_primary(request: Request) -> bool:
+    if request.headers.get("x-read-consistency", "").lower() == "primary":
+        return True
+    until = request.cookies.get(RYW_COOKIE)
+    try:
+        return until is not None and float(until) > time.time()
+    except ValueError:
+        return False
+
+
+class ReadYourWritesMiddleware:
+    """After a successful write, pin the client's reads to the primary for a while."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] in _SAFE_METHODS
+            or not settings.READ_DATABASE_URL
+            or settings.READ_YOUR_WRITES_SECONDS <= 0
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                window = settings.READ_YOUR_WRITES_SECONDS
+                cookie = (
+                    f"{RYW_COOKIE}={time.time() + window:.3f}; Max-Age={int(window + 0.999)}; "
+                    "Path=/; HttpOnly; SameSite=Lax"
+                )
+                message = {**message, "headers": [*message["headers"], (b"set-cookie", cookie.encode("latin-1"))]}
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -1,13 +1,15 @@
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi import APIRouter, Depends, Request, Response
 from sqlalchemy.orm import Session
 
 from app.db import get_db
 from app import schemas
+from app.deps import CurrentUser, get_current_user
 from app.services import auth_service
+from app.perf import TimedRoute
 
-router = APIRouter(prefix="/auth", tags=["auth"])
+router = APIRouter(prefix="/auth", tags=["auth"], route_class=TimedRoute)
 
 COOKIE_NAME = "refresh_token"
 
@@ -29,8 +31,8 @@ def _clear_refresh_cookie(response: Response) -> None:
 
 
 @router.post("/login", response_model=schemas.TokenOut)
-def login(payload: schemas.AuthLoginIn, response: Response, db: Session = Depends(get_db)):
-    access_token, refresh_token = auth_service.login(db, payload)
+async def login(payload: schemas.AuthLoginIn, response: Response, db: Session = Depends(get_db)):
+    access_token, refresh_token = await auth_service.login(db, payload)
     _set_refresh_cookie(response, refresh_token)
     return schemas.TokenOut(access_token=access_token)
 
@@ -51,9 +53,18 @@ def logout(request: Request, response: Response, db: Session = Depends(get_db)):
     return {"ok": True}
 
 
+@router.post("/password")
+async def change_password(
+    payload: schemas.AuthPasswordChangeIn,
+    response: Response,
+    db: Session = Depends(get_db),
+    user: CurrentUser = Depends(get_current_user),
+):
+    await auth_service.change_password(db, user.id, user.org_id, payload)
+    _clear_refresh_cookie(response)
+    return {"ok": True}
+
+
 @router.get("/me", response_model=schemas.AuthMeOut)
-def me(request: Request, db: Session = Depends(get_db)):
-    auth = request.headers.get("authorization") or request.headers.get("Authorization")
-    if not auth:
-        raise HTTPException(status_code=401, detail="Missing bearer token")
-    return auth_service.me(db, auth)
\ No newline at end of file
+def me(db: Session = Depends(get_db), user: CurrentUser = Depends(get_current_user)):
+    return auth_service.me(db, user)
\ No newline at end of file
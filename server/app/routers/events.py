@@ -1,29 +1,30 @@
-from fastapi import APIRouter, Depends, Body, Query, UploadFile, File, Query
+from fastapi import APIRouter, Depends, Body, Query, Response, UploadFile, File, Query
 from sqlalchemy.orm import Session
 from typing import Optional, Dict, Any
 
 
-from app.db import get_db
+from app.db import ReadSession, get_db, get_read_db, run_read
 from app import models, schemas
-from app.deps import get_current_user
+from app.deps import CurrentUser, get_current_user
 from app.services import events_service
+from app.perf import TimedRoute
 
-router = APIRouter(tags=["events"])
+router = APIRouter(tags=["events"], route_class=TimedRoute)
 
 
 @router.get("/events", response_model=list[schemas.EventOut])
-def list_events(db: Session = Depends(get_db), user: models.User = Depends(get_current_user)):
-    return events_service.list_events(db)
+async def list_events(db: ReadSession = Depends(get_read_db), user: CurrentUser = Depends(get_current_user)):
+    return await run_read(db, events_service.list_events, user.org_id)
 
 
 @router.post("/events", response_model=schemas.EventOut, status_code=201)
-def create_event(payload: schemas.EventCreate, db: Session = Depends(get_db), user: models.User = Depends(get_current_user)):
-    return events_service.create_event(db, payload)
+def create_event(payload: schemas.EventCreate, db: Session = Depends(get_db), user: CurrentUser = Depends(get_current_user)):
+    return events_service.create_event(db, user.org_id, payload)
 
 
 @router.get("/events/{event_id}", response_model=schemas.EventOut)
-def get_event(event_id: int, db: Session = Depends(get_db), user: models.User = Depends(get_current_user)):
-    return events_service.get_event(db, event_id)
+def get_event(event_id: int, db: Session = Depends(get_db), user: CurrentUser = Depends(get_current_user)):
+    return events_service.get_event(db, user.org_id, event_id)
 
 
 @router.post("/events/{event_id}/assignments/run")
@@ -31,24 +32,24 @@ def run_assignments(
     event_id: int,
     payload: Optional[Dict[str, Any]] = Body(None),
     db: Session = Depends(get_db),
-    user: models.User = Depends(get_current_user),
+    user: CurrentUser = Depends(get_current_user),
 ):
-    return events_service.run_assignments(db, event_id, payload)
+    return events_service.run_assignments(db, user.org_id, event_id, payload)
 
 
 @router.get("/events/{event_id}/participants", response_model=list[schemas.ParticipantLink])
-def event_participants(event_id: int, db: Session = Depends(get_db), user: models.User = Depends(get_current_user)):
-    return events_service.event_participants(db, event_id)
+async def event_participants(event_id: int, db: ReadSession = Depends(get_read_db), user: CurrentUser = Depends(get_current_user)):
+    return await run_read(db, events_service.event_participants, user.org_id, event_id)
 
 
 @router.get("/events/{event_id}/seatmap")
-def event_seatmap(event_id: int, db: Session = Depends(get_db), user: models.User = Depends(get_current_user)):
-    return events_service.event_seatmap(db, event_id)
+async def event_seatmap(event_id: int, db: ReadSession = Depends(get_read_db), user: CurrentUser = Depends(get_current_user)):
+    return await run_read(db, events_service.event_seatmap, user.org_id, event_id)
 
 
 @router.get("/events/{event_id}/issues")
-def event_issues(event_id: int, db: Session = Depends(get_db), user: models.User = Depends(get_current_user)):
-    return events_service.event_issues(db, event_id)
+def event_issues(event_id: int, db: Session = Depends(get_db), user: CurrentUser = Depends(get_current_user)):
+    return events_service.event_issues(db, user.org_id, event_id)
 
 
 @router.post("/events/{event_id}/assignments/move")
@@ -57,9 +58,9 @@ def move_assignment(
     preference_id: int = Query(...),
     seat_id: int = Query(...),
     db: Session = Depends(get_db),
-    user: models.User = Depends(get_current_user),
+    user: CurrentUser = Depends(get_current_user),
 ):
-    return events_service.move_assignment(db, event_id, preference_id, seat_id)
+    return events_service.move_assignment(db, user.org_id, event_id, preference_id, seat_id)
 
 
 @router.post("/events/{event_id}/assignments/clear")
@@ -67,9 +68,19 @@ def clear_assignment(
     event_id: int,
     preference_id: int = Query(...),
     db: Session = Depends(get_db),
-    user: models.User = Depends(get_current_user),
+    user: CurrentUser = Depends(get_current_user),
 ):
-    return events_service.clear_assignment(db, event_id, preference_id)
+    return events_service.clear_assignment(db, user.org_id, event_id, preference_id)
+
+
+@router.post("/events/{event_id}/assignments/batch")
+def apply_assignment_batch(
+    event_id: int,
+    payload: schemas.AssignmentBatch,
+    db: Session = Depends(get_db),
+    user: CurrentUser = Depends(get_current_user),
+):
+    return events_service.apply_assignment_batch(db, user.org_id, event_id, payload)
 
 
 @router.patch("/events/{event_id}/status", response_model=schemas.EventOut)
@@ -77,22 +88,41 @@ def update_event_status(
     event_id: int,
     payload: schemas.EventStatusUpdate,
     db: Session = Depends(get_db),
-    user: models.User = Depends(get_current_user),
+    user: CurrentUser = Depends(get_current_user),
 ):
-    return events_service.update_event_status(db, event_id, payload)
+    return events_service.update_event_status(db, user.org_id, event_id, payload)
 
 
 @router.post("/events/{event_id}/members/import")
 async def import_event_members_csv(
     event_id: int,
+    response: Response,
     file: UploadFile = File(...),
     dry_run: int = Query(0),
+    upsert: int = Query(0),
+    background: int = Query(0),
     db: Session = Depends(get_db),
-    user: models.User = Depends(get_current_user),
+    user: CurrentUser = Depends(get_current_user),
 ):
+    if background and not dry_run:
+        response.status_code = 202
+        return await events_service.start_import_job(
+            db=db,
+            org_id=user.org_id,
+            event_id=event_id,
+            upload=file,
+            upsert=bool(upsert),
+        )
     return await events_service.import_event_members_csv(
         db=db,
+        org_id=user.org_id,
         event_id=event_id,
         upload=file,
         dry_run=bool(dry_run),
+        upsert=bool(upsert),
     )
+
+
+@router.get("/events/{event_id}/members/import/{job_id}")
+def import_job_status(event_id: int, job_id: str, db: Session = Depends(get_db), user: CurrentUser = Depends(get_current_user)):
+    return events_service.get_import_job(db, user.org_id, event_id, job_id)
@@ -0,0 +1,19 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+
+from app.deps import require_internal
+from app.pool import pool_snapshot
+from app.perf import TimedRoute, render_metrics
+
+router = APIRouter(prefix="/internal", tags=["internal"], dependencies=[Depends(require_internal)], route_class=TimedRoute)
+
+
+@router.get("/pool")
+def pool_stats():
+    return pool_snapshot()
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    # Prometheus text exposition format
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -6,8 +6,9 @@ from sqlalchemy.orm import Session
 from app.db import get_db
 from app import models, schemas
 from app.services import organizations_service
+from app.perf import TimedRoute
 
-router = APIRouter(tags=["organizations"])
+router = APIRouter(tags=["organizations"], route_class=TimedRoute)
 
 @router.get("/organizations", response_model=List[schemas.OrganizationOut])
 def list_organizations(db: Session = Depends(get_db)):
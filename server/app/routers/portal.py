@@ -1,15 +1,16 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 
-from app.db import get_db
+from app.db import ReadSession, get_db, get_read_db, run_read
 from app import schemas
 from app.services import portal_service
+from app.perf import TimedRoute
 
-router = APIRouter(tags=["portal"])
+router = APIRouter(tags=["portal"], route_class=TimedRoute)
 
 @router.get("/portal/{token}", response_model=schemas.PortalData)
-def portal_get(token: str, db: Session = Depends(get_db)):
-    return portal_service.portal_get(db, token)
+async def portal_get(token: str, db: ReadSession = Depends(get_read_db)):
+    return await run_read(db, portal_service.portal_get, token)
 
 @router.post("/portal/{token}")
 def portal_submit(token: str, payload: schemas.PortalSubmit, db: Session = Depends(get_db)):
@@ -3,12 +3,13 @@ from sqlalchemy.orm import Session
 from sqlalchemy import func, distinct, case
 from datetime import datetime
 
-from app.db import get_db
+from app.db import ReadSession, get_db, get_read_db, run_read
 from app import models, schemas
-from app.deps import get_current_user
+from app.deps import CurrentUser, get_current_user
 from app.services import venues_service
+from app.perf import TimedRoute
 
-router = APIRouter(tags=["venues"])
+router = APIRouter(tags=["venues"], route_class=TimedRoute)
 
 
 def _row_label(n: int) -> str:
@@ -46,8 +47,8 @@ def _row_label(n: int) -> str:
 #         }
 #         for v, seat_count, zones_count, events_count in rows
 #     ]
-def list_venues(db: Session = Depends(get_db), user: models.User = Depends(get_current_user)):
-    return venues_service.list_venues(db)
+async def list_venues(db: ReadSession = Depends(get_read_db), user: CurrentUser = Depends(get_current_user)):
+    return await run_read(db, venues_service.list_venues, user.org_id)
 
 
 @router.get("/venues/{venue_id}/seatmap")  # CHANGED
@@ -74,8 +75,8 @@ def list_venues(db: Session = Depends(get_db), user: models.User = Depends(get_c
 #         }
 #         for s in seats
 #     ]
-def venue_seatmap(venue_id: int, db: Session = Depends(get_db), user: models.User = Depends(get_current_user)):
-    return venues_service.venue_seatmap(db, venue_id)
+async def venue_seatmap(venue_id: int, db: ReadSession = Depends(get_read_db), user: CurrentUser = Depends(get_current_user)):
+    return await run_read(db, venues_service.venue_seatmap, user.org_id, venue_id)
 
 
 @router.post("/venues", response_model=schemas.VenueOut, status_code=201)  # CHANGED
@@ -96,8 +97,8 @@ def venue_seatmap(venue_id: int, db: Session = Depends(get_db), user: models.Use
 #     db.commit()
 #     db.refresh(v)
 #     return v
-def create_venue(payload: schemas.VenueCreate, db: Session = Depends(get_db), user: models.User = Depends(get_current_user)):
-    return venues_service.create_venue(db, payload)
+def create_venue(payload: schemas.VenueCreate, db: Session = Depends(get_db), user: CurrentUser = Depends(get_current_user)):
+    return venues_service.create_venue(db, user.org_id, payload)
 
 
 @router.post("/venues/{venue_id}/seats/generate") 
@@ -183,9 +184,9 @@ def generate_venue_seats(
     venue_id: int,
     payload: schemas.GenerateSeatsPayload = Body(...),
     db: Session = Depends(get_db),
-    user: models.User = Depends(get_current_user),
+    user: CurrentUser = Depends(get_current_user),
 ):
-    return venues_service.generate_venue_seats(db, venue_id, payload)
+    return venues_service.generate_venue_seats(db, user.org_id, venue_id, payload)
 
 
 @router.get("/venues/{venue_id}/sections", response_model=list[schemas.SectionSummary])
@@ -212,5 +213,5 @@ def generate_venue_seats(
 #         }
 #         for zone, seat_count, accessible_count, blocked_count, rows_count in rows
 #     ]
-def venue_sections(venue_id: int, db: Session = Depends(get_db), user: models.User = Depends(get_current_user)):
-    return venues_service.venue_sections(db, venue_id)
\ No newline at end of file
+def venue_sections(venue_id: int, db: Session = Depends(get_db), user: CurrentUser = Depends(get_current_user)):
+    return venues_service.venue_sections(db, user.org_id, venue_id)
\ No newline at end of file
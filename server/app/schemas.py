@@ -199,6 +199,10 @@ class AuthLoginIn(BaseModel):
     email: EmailStr
     password: str = Field(..., min_length=1, max_length=200)
 
+class AuthPasswordChangeIn(BaseModel):
+    current_password: str = Field(..., min_length=1, max_length=200)
+    new_password: str = Field(..., min_length=8, max_length=200)
+
 class TokenOut(BaseModel):
     access_token: str
     token_type: Literal["bearer"] = "bearer"
@@ -220,3 +224,12 @@ EventStatus = Literal["draft", "preferences_open", "locked", "published"]
 
 class EventStatusUpdate(BaseModel):
     status: EventStatus
+
+class AssignmentOp(BaseModel):
+    op: Literal["move", "swap", "clear"]
+    preference_id: int
+    seat_id: Optional[int] = None  # move
+    other_preference_id: Optional[int] = None  # swap
+
+class AssignmentBatch(BaseModel):
+    ops: List[AssignmentOp] = Field(..., min_length=1, max_length=500)
@@ -1,10 +1,18 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, timedelta, timezone
+import asyncio
 import hashlib
+import multiprocessing
 import os
 import secrets
-from typing import Any, Dict
+import threading
+from typing import Any, Callable, Dict, Optional
 from app.settings import settings
 
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+
 
 from jose import jwt
 from passlib.context import CryptContext
@@ -24,11 +32,91 @@ def hash_password(password: str) -> str:
 def verify_password(password: str, password_hash: str) -> bool:
     return pwd_context.verify(password, password_hash)
 
-def create_access_token(*, user_id: int, org_id: int) -> str:
+# ---- password hashing pool ----
+#
+# bcrypt costs ~250 ms of CPU per call. Running it on the request threadpool lets a
+# burst of logins starve every other sync endpoint, so hashing runs on its own small
+# process pool. At most PASSWORD_HASH_MAX_PENDING calls may be running or queued;
+# past that the caller gets a 503 right away instead of waiting.
+
+_hash_pool: Optional[ProcessPoolExecutor] = None
+_hash_pool_lock = threading.Lock()
+_hash_slots = threading.BoundedSemaphore(max(1, settings.PASSWORD_HASH_MAX_PENDING))
+
+
+def _get_hash_pool() -> ProcessPoolExecutor:
+    global _hash_pool
+    with _hash_pool_lock:
+        if _hash_pool is None:
+            _hash_pool = ProcessPoolExecutor(
+                max_workers=settings.PASSWORD_HASH_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _hash_pool
+
+
+async def _run_hash_op(fn: Callable, *args: Any) -> Any:
+    if not _hash_slots.acquire(blocking=False):
+        raise HTTPException(
+            status_code=503,
+            detail="Server busy, try again",
+            headers={"Retry-After": "1"},
+        )
+    if settings.PASSWORD_HASH_WORKERS <= 0:
+        try:
+            return await run_in_threadpool(fn, *args)
+        finally:
+            _hash_slots.release()
+
+    pool = _get_hash_pool()
+    try:
+        fut = pool.submit(fn, *args)
+    except BaseException as e:
+        _hash_slots.release()
+        if isinstance(e, BrokenProcessPool):
+            _discard_hash_pool(pool)
+        raise
+    # released when the work finishes (or is cancelled), not when the caller gives up
+    fut.add_done_callback(lambda _: _hash_slots.release())
+    try:
+        return await asyncio.wrap_future(fut)
+    except BrokenProcessPool:
+        _discard_hash_pool(pool)
+        raise
+
+
+def _discard_hash_pool(pool: ProcessPoolExecutor) -> None:
+    # a worker died; start a fresh pool on the next call instead of failing forever
+    global _hash_pool
+    with _hash_pool_lock:
+        if _hash_pool is pool:
+            _hash_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_hash_pool() -> None:
+    """Stop the worker processes; called on app shutdown so none outlive the server."""
+    global _hash_pool
+    with _hash_pool_lock:
+        pool, _hash_pool = _hash_pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run_hash_op(hash_password, password)
+
+
+async def verify_password_async(password: str, password_hash: str) -> bool:
+    return await _run_hash_op(verify_password, password, password_hash)
+
+
+def create_access_token(*, user_id: int, org_id: int, token_version: int = 0) -> str:
     now = datetime.now(timezone.utc)
     payload: Dict[str, Any] = {
         "sub": str(user_id),
         "org_id": int(org_id),
+        "tv": int(token_version),
         "iat": int(now.timestamp()),
         "exp": int((now + timedelta(minutes=ACCESS_TOKEN_MINUTES)).timestamp()),
     }
@@ -1,72 +1,97 @@
 from __future__ import annotations
 
-from datetime import datetime, timezone
+from datetime import datetime
 from typing import Optional, Tuple
-import os
+import threading
+import time
 
 from fastapi import HTTPException
-from jose import jwt, JWTError
+from sqlalchemy import delete, func, select, update
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from app.settings import settings
 
 from app import models, schemas
+from app.services.principal_cache import CurrentUser, invalidate_user
 from app.security import (
-    verify_password,
+    hash_password_async,
+    verify_password_async,
     create_access_token,
     new_refresh_token,
     hash_refresh_token,
     refresh_expiry,
 )
 
-JWT_SECRET = settings.JWT_SECRET
-JWT_ALG = os.getenv("JWT_ALG", "HS256")
-
-
-def login(db: Session, payload: schemas.AuthLoginIn) -> Tuple[str, str]:
-    email = payload.email.strip().lower()
-
-    user = (
+def _find_user(db: Session, org_id: int, email: str) -> Optional[models.User]:
+    return (
         db.query(models.User)
-        .filter(models.User.org_id == payload.org_id, models.User.email == email)
+        .filter(models.User.org_id == org_id, models.User.email == email)
         .first()
     )
-    if not user or not verify_password(payload.password, user.password_hash):
-        raise HTTPException(status_code=401, detail="Invalid credentials")
+
+
+def _session_expiry() -> datetime:
+    # stored naive UTC, like the other DateTime columns
+    return refresh_expiry().replace(tzinfo=None)
+
+
+def _start_session(db: Session, user: models.User) -> Tuple[str, str]:
+    _maybe_purge_expired_sessions(db)
 
     rt = new_refresh_token()
-    user.refresh_token_hash = hash_refresh_token(rt)
-    user.refresh_token_expires_at = refresh_expiry()
+    db.add(models.UserSession(user_id=user.id, token_hash=hash_refresh_token(rt), expires_at=_session_expiry()))
     db.commit()
 
-    access_token = create_access_token(user_id=user.id, org_id=user.org_id)
+    access_token = create_access_token(
+        user_id=user.id, org_id=user.org_id, token_version=user.token_version or 0
+    )
     return access_token, rt
 
 
-def refresh(db: Session, refresh_token: Optional[str]) -> Tuple[str, str]:
-    if not refresh_token:
-        raise HTTPException(status_code=401, detail="Missing refresh token")
+# login/change_password are async so the bcrypt call can be awaited on the hashing
+# pool; the database work still runs on the threadpool.
+async def login(db: Session, payload: schemas.AuthLoginIn) -> Tuple[str, str]:
+    email = payload.email.strip().lower()
 
-    rt_hash = hash_refresh_token(refresh_token)
+    user = await run_in_threadpool(_find_user, db, payload.org_id, email)
+    if not user or not await verify_password_async(payload.password, user.password_hash):
+        raise HTTPException(status_code=401, detail="Invalid credentials")
 
-    user = db.query(models.User).filter(models.User.refresh_token_hash == rt_hash).first()
-    if not user:
-        raise HTTPException(status_code=401, detail="Invalid refresh token")
+    return await run_in_threadpool(_start_session, db, user)
 
-    exp = user.refresh_token_expires_at
-    if exp is None:
-        raise HTTPException(status_code=401, detail="Refresh token expired")
 
-    exp_utc = exp.replace(tzinfo=timezone.utc) if exp.tzinfo is None else exp
-    if exp_utc < datetime.now(timezone.utc):
-        raise HTTPException(status_code=401, detail="Refresh token expired")
+def refresh(db: Session, refresh_token: Optional[str]) -> Tuple[str, str]:
+    if not refresh_token:
+        raise HTTPException(status_code=401, detail="Missing refresh token")
 
+    old_hash = hash_refresh_token(refresh_token)
     new_rt = new_refresh_token()
-    user.refresh_token_hash = hash_refresh_token(new_rt)
-    user.refresh_token_expires_at = refresh_expiry()
+    new_hash = hash_refresh_token(new_rt)
+    now = datetime.utcnow()
+
+    # Rotation is one guarded UPDATE on the unique token_hash index: of two
+    # concurrent refreshes with the same token only one matches the old hash.
+    rotated = db.execute(
+        update(models.UserSession)
+        .where(models.UserSession.token_hash == old_hash, models.UserSession.expires_at > now)
+        .values(token_hash=new_hash, expires_at=_session_expiry(), rotated_at=now)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if rotated != 1:
+        db.rollback()
+        raise HTTPException(status_code=401, detail="Invalid or expired refresh token")
+
+    user = db.execute(
+        select(models.User)
+        .join(models.UserSession, models.UserSession.user_id == models.User.id)
+        .where(models.UserSession.token_hash == new_hash)
+    ).scalar_one()
     db.commit()
 
-    access_token = create_access_token(user_id=user.id, org_id=user.org_id)
+    access_token = create_access_token(
+        user_id=user.id, org_id=user.org_id, token_version=user.token_version or 0
+    )
     return access_token, new_rt
 
 
@@ -75,50 +100,91 @@ def logout(db: Session, refresh_token: Optional[str]) -> None:
         return
 
     rt_hash = hash_refresh_token(refresh_token)
-    user = db.query(models.User).filter(models.User.refresh_token_hash == rt_hash).first()
-    if not user:
+    user_id = db.execute(
+        select(models.UserSession.user_id).where(models.UserSession.token_hash == rt_hash)
+    ).scalar()
+    if user_id is None:
         return
 
-    user.refresh_token_hash = None
-    user.refresh_token_expires_at = None
+    db.execute(delete(models.UserSession).where(models.UserSession.token_hash == rt_hash))
+    # revokes the user's outstanding access tokens; other devices get a fresh one on
+    # their next refresh, which reads the new version
+    db.execute(
+        update(models.User)
+        .where(models.User.id == user_id)
+        .values(token_version=func.coalesce(models.User.token_version, 0) + 1)
+    )
     db.commit()
+    invalidate_user(user_id)
+
 
+# ---- expired session cleanup ----
 
-def me(db: Session, bearer_token: Optional[str]) -> schemas.AuthMeOut:
-    if not bearer_token:
-        raise HTTPException(status_code=401, detail="Missing bearer token")
+_last_session_purge = 0.0
+_session_purge_lock = threading.Lock()
 
-    token = bearer_token.strip()
-    if token.lower().startswith("bearer "):
-        token = token.split(" ", 1)[1].strip()
 
-    try:
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALG])
-    except JWTError:
-        raise HTTPException(status_code=401, detail="Invalid token")
+def purge_expired_sessions(db: Session, batch: Optional[int] = None) -> int:
+    """Delete expired sessions in id batches (short transactions). Returns rows deleted."""
+    batch = batch or settings.SESSION_PURGE_BATCH
+    now = datetime.utcnow()
+    total = 0
+    while True:
+        ids = db.execute(
+            select(models.UserSession.id).where(models.UserSession.expires_at <= now).limit(batch)
+        ).scalars().all()
+        if not ids:
+            return total
+        db.execute(delete(models.UserSession).where(models.UserSession.id.in_(ids)))
+        db.commit()
+        total += len(ids)
 
-    sub = payload.get("sub")
-    org_id = payload.get("org_id")
-    if sub is None or org_id is None:
-        raise HTTPException(status_code=401, detail="Invalid token")
 
-    user_id = int(sub)
-    org_id = int(org_id)
+def _maybe_purge_expired_sessions(db: Session) -> None:
+    # piggybacks on logins, at most once per interval per process
+    global _last_session_purge
+    now = time.monotonic()
+    with _session_purge_lock:
+        if now - _last_session_purge < settings.SESSION_PURGE_INTERVAL_SECONDS:
+            return
+        _last_session_purge = now
+    purge_expired_sessions(db)
 
-    user = (
+
+def _get_user(db: Session, user_id: int, org_id: int) -> Optional[models.User]:
+    return (
         db.query(models.User)
         .filter(models.User.id == user_id, models.User.org_id == org_id)
         .first()
     )
-    if not user:
-        raise HTTPException(status_code=401, detail="User not found")
 
-    org = db.query(models.Organization).filter(models.Organization.id == org_id).first()
+
+def _store_password(db: Session, user: models.User, password_hash: str) -> None:
+    user.password_hash = password_hash
+    # revokes every outstanding access token and every refresh session
+    user.token_version = (user.token_version or 0) + 1
+    db.execute(delete(models.UserSession).where(models.UserSession.user_id == user.id))
+    db.commit()
+    invalidate_user(user.id)
+
+
+async def change_password(db: Session, user_id: int, org_id: int, payload: schemas.AuthPasswordChangeIn) -> None:
+    user = await run_in_threadpool(_get_user, db, user_id, org_id)
+    if not user or not await verify_password_async(payload.current_password, user.password_hash):
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+
+    password_hash = await hash_password_async(payload.new_password)
+    await run_in_threadpool(_store_password, db, user, password_hash)
+
+
+def me(db: Session, user: CurrentUser) -> schemas.AuthMeOut:
+    # user comes from deps.get_current_user, which already rejected revoked tokens
+    org = db.query(models.Organization).filter(models.Organization.id == user.org_id).first()
     if not org:
         raise HTTPException(status_code=401, detail="Organization not found")
 
     return schemas.AuthMeOut(
-        user_id=int(user.id),
+        user_id=user.id,
         email=user.email,
         org_id=int(org.id),
         org_name=org.name,
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+from typing import Dict, List
+
+from sqlalchemy import insert, text
+from sqlalchemy.orm import Session
+
+from app import models
+
+PREFERENCE_CHUNK_SIZE = 1000
+SEAT_CHUNK_SIZE = 1000
+
+# engine url -> whether multi-row INSERTs get consecutive AUTO_INCREMENT ids
+_consecutive_autoinc: Dict[str, bool] = {}
+
+
+def _mysql_consecutive_autoinc(db: Session) -> bool:
+    bind = db.get_bind()
+    key = str(bind.url)
+    if key not in _consecutive_autoinc:
+        mode, step = db.execute(text("SELECT @@innodb_autoinc_lock_mode, @@auto_increment_increment")).one()
+        # 0 ("traditional") and 1 ("consecutive") reserve one contiguous block per
+        # multi-row INSERT; 2 ("interleaved", the MySQL 8 default) does not. The
+        # block is only lastrowid, lastrowid + 1, ... when the increment is 1.
+        _consecutive_autoinc[key] = mode is not None and int(mode) in (0, 1) and int(step or 1) == 1
+    return _consecutive_autoinc[key]
+
+
+def insert_members(db: Session, rows: List[dict]) -> List[int]:
+    """Insert member rows in bulk and return their ids in input order.
+
+    - SQLite: one multi-row INSERT. The transaction holds the database write lock,
+      so the rows get consecutive rowids ending at lastrowid.
+    - Other backends with INSERT .. RETURNING (Postgres, MariaDB): executemany with
+      RETURNING sorted by parameter order.
+    - MySQL with innodb_autoinc_lock_mode 0/1 and auto_increment_increment = 1:
+      one multi-row INSERT, ids derived from lastrowid.
+    - Anything else, including MySQL 8 with its default lock mode 2: an ORM
+      flush, i.e. one INSERT per row.
+    """
+    if not rows:
+        return []
+
+    dialect = db.get_bind().dialect
+    if dialect.name == "sqlite":
+        # RETURNING order is not guaranteed here, and SQLAlchemy would fall back to
+        # one INSERT per row to sort it.
+        result = db.execute(insert(models.Member).values(rows))
+        last_id = int(result.lastrowid)
+        return list(range(last_id - len(rows) + 1, last_id + 1))
+
+    if dialect.insert_executemany_returning:
+        result = db.execute(insert(models.Member).returning(models.Member.id, sort_by_parameter_order=True), rows)
+        return [int(mid) for mid in result.scalars()]
+
+    if dialect.name == "mysql" and _mysql_consecutive_autoinc(db):
+        result = db.execute(insert(models.Member).values(rows))
+        first_id = int(result.lastrowid)
+        return list(range(first_id, first_id + len(rows)))
+
+    # No way to get a block of ids back: let the ORM flush them (one INSERT per row,
+    # but still a single flush with no interleaved preference statements).
+    mems = [models.Member(**r) for r in rows]
+    db.add_all(mems)
+    db.flush()
+    ids = [int(m.id) for m in mems]
+    for m in mems:
+        db.expunge(m)
+    return ids
+
+
+def insert_preferences(db: Session, rows: List[dict]) -> None:
+    """Insert member_preferences rows with executemany, in bounded chunks."""
+    for start in range(0, len(rows), PREFERENCE_CHUNK_SIZE):
+        db.execute(insert(models.MemberPreference), rows[start:start + PREFERENCE_CHUNK_SIZE])
+
+
+def insert_seats(db: Session, rows: List[dict]) -> None:
+    """Insert seat rows with executemany, in bounded chunks (no ids are returned)."""
+    for start in range(0, len(rows), SEAT_CHUNK_SIZE):
+        db.execute(insert(models.Seat), rows[start:start + SEAT_CHUNK_SIZE])
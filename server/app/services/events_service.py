@@ -1,19 +1,38 @@
 from __future__ import annotations
 
-from datetime import datetime, timezone, date
-from typing import Any, Dict, Tuple, List, Set, Optional
+from datetime import datetime, timedelta, timezone, date
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, Tuple, List, Set, Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import func, text
+from sqlalchemy import and_, bindparam, distinct, func, insert, or_, text, update
+from sqlalchemy.exc import IntegrityError, OperationalError
 # ADD:
 from fastapi import HTTPException, UploadFile
-import csv, re
-from io import StringIO
+from starlette.concurrency import run_in_threadpool
+import codecs, csv, json, logging, multiprocessing, os, re, shutil, socket, threading, time
+from bisect import bisect_left
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import chain, islice
 from uuid import uuid4
 
-from app import models, schemas
+from app import cache, models, perf, schemas
+from app.db import SessionLocal
+from app.services import bulk, portal_service
+from app.settings import settings
 
 
-def list_events(db: Session):
+def _get_org_event(db: Session, org_id: int, event_id: int) -> models.Event:
+    ev = (
+        db.query(models.Event)
+        .filter(models.Event.id == event_id, models.Event.org_id == org_id)
+        .first()
+    )
+    if not ev:
+        raise HTTPException(status_code=404, detail="Event not found")
+    return ev
+
+
+def list_events(db: Session, org_id: int):
     rows = (
         db.query(
             models.Event,
@@ -23,6 +42,7 @@ def list_events(db: Session):
         )
         .join(models.Venue, models.Event.venue_id == models.Venue.id, isouter=True)
         .outerjoin(models.MemberPreference, models.MemberPreference.event_id == models.Event.id)
+        .filter(models.Event.org_id == org_id)
         .group_by(models.Event.id, models.Venue.name)
         .all()
     )
@@ -42,8 +62,12 @@ def list_events(db: Session):
     ]
 
 
-def create_event(db: Session, payload: schemas.EventCreate):
-    venue = db.query(models.Venue).filter(models.Venue.id == payload.venue_id).first()
+def create_event(db: Session, org_id: int, payload: schemas.EventCreate):
+    venue = (
+        db.query(models.Venue)
+        .filter(models.Venue.id == payload.venue_id, models.Venue.org_id == org_id)
+        .first()
+    )
     if not venue:
         raise HTTPException(status_code=404, detail="Venue not found")
 
@@ -56,6 +80,7 @@ def create_event(db: Session, payload: schemas.EventCreate):
         event_dt = datetime.combine(payload.event_date, datetime.min.time()).replace(tzinfo=timezone.utc)
 
     ev = models.Event(
+        org_id=org_id,
         venue_id=payload.venue_id,
         name=name,
         event_date=event_dt,
@@ -65,6 +90,7 @@ def create_event(db: Session, payload: schemas.EventCreate):
     db.add(ev)
     db.commit()
     db.refresh(ev)
+    cache.invalidate(cache.org_venues_tag(org_id))
 
     return {
         "id": ev.id,
@@ -79,10 +105,8 @@ def create_event(db: Session, payload: schemas.EventCreate):
     }
 
 
-def get_event(db: Session, event_id: int):
-    ev = db.query(models.Event).filter(models.Event.id == event_id).first()
-    if not ev:
-        raise HTTPException(status_code=404, detail="Event not found")
+def get_event(db: Session, org_id: int, event_id: int):
+    ev = _get_org_event(db, org_id, event_id)
 
     venue_name = db.query(models.Venue.name).filter(models.Venue.id == ev.venue_id).scalar()
     total_prefs = (
@@ -123,9 +147,120 @@ def _parse_flat_weights(payload: Dict[str, Any]) -> Tuple[Dict[str, float], Dict
         {"member_preference": pref_raw / 100.0, "group": group_raw / 100.0, "stability": stab_raw / 100.0},
     )
 
-def run_assignments(db: Session, event_id: int, payload: Optional[Dict[str, Any]]):
-    payload = payload or {}
-    weights_raw, weights = _parse_flat_weights(payload)
+# ---- assignment runs ----
+# One assignment_runs row per event records its latest run and doubles as a lock
+# that holds across worker processes: a run starts by inserting the row, or by
+# taking it over once the previous run has finished or gone stale. A request that
+# finds a run in progress with the same weights waits for it and returns its result
+# instead of solving again; one with different weights gets a 409.
+_RUN_POLL_SECONDS = 0.25
+
+
+def _acquire_run(db: Session, event_id: int, params: str) -> Optional[str]:
+    """Take the event's run lock; returns the new run id, or None if a run is in progress."""
+    run_id = str(uuid4())
+    now = datetime.utcnow()
+    values = {
+        "run_id": run_id,
+        "status": "running",
+        "params": params,
+        "worker_id": _WORKER_ID,
+        "started_at": now,
+        "finished_at": None,
+        "result": None,
+        "message": None,
+    }
+    stale = now - timedelta(seconds=settings.ASSIGNMENT_RUN_STALE_SECONDS)
+    taken = (
+        db.query(models.AssignmentRun)
+        .filter(
+            models.AssignmentRun.event_id == event_id,
+            or_(models.AssignmentRun.status != "running", models.AssignmentRun.started_at < stale),
+        )
+        .update(values, synchronize_session=False)
+    )
+    if not taken:
+        try:
+            db.execute(insert(models.AssignmentRun).values(event_id=event_id, **values))
+        except (IntegrityError, OperationalError):
+            # the row exists and a run holds it (or another worker just inserted it)
+            db.rollback()
+            return None
+    db.commit()
+    return run_id
+
+
+def _finish_run(db: Session, event_id: int, run_id: str, values: dict) -> bool:
+    # Fenced on run_id: a run that went stale and was taken over must not report.
+    updated = (
+        db.query(models.AssignmentRun)
+        .filter(models.AssignmentRun.event_id == event_id, models.AssignmentRun.run_id == run_id)
+        .update({**values, "finished_at": datetime.utcnow()}, synchronize_session=False)
+    )
+    return updated == 1
+
+
+def _await_run(db: Session, event_id: int, params: str) -> Optional[Dict[str, Any]]:
+    """Wait for the run in progress and return its result; None if it ended before we attached."""
+    with perf.polling():
+        return _poll_run(db, event_id, params)
+
+
+def _poll_run(db: Session, event_id: int, params: str) -> Optional[Dict[str, Any]]:
+    deadline = time.monotonic() + settings.ASSIGNMENT_RUN_WAIT_SECONDS
+    run_id = None
+    while True:
+        db.rollback()  # end the snapshot, so each poll sees the other worker's commit
+        run = db.query(models.AssignmentRun).filter(models.AssignmentRun.event_id == event_id).first()
+        if run_id is None:
+            if run is None or run.status != "running":
+                return None
+            if run.params != params:
+                raise HTTPException(status_code=409, detail="An assignment run with different weights is in progress")
+            run_id = run.run_id
+        if run is None or run.run_id != run_id:
+            raise HTTPException(status_code=409, detail="The assignment run in progress was superseded; try again")
+        if run.status == "done":
+            return json.loads(run.result)
+        if run.status == "failed":
+            raise HTTPException(status_code=409, detail="The assignment run in progress failed; try again")
+        if time.monotonic() >= deadline:
+            raise HTTPException(status_code=409, detail="An assignment run is still in progress")
+        time.sleep(_RUN_POLL_SECONDS)
+
+
+def run_assignments(db: Session, org_id: int, event_id: int, payload: Optional[Dict[str, Any]]):
+    _, weights = _parse_flat_weights(payload or {})
+    ev = _get_org_event(db, org_id, event_id)
+    venue_id = ev.venue_id
+    params = json.dumps(weights, sort_keys=True)
+
+    while True:
+        run_id = _acquire_run(db, event_id, params)
+        if run_id is not None:
+            break
+        result = _await_run(db, event_id, params)
+        if result is not None:
+            return result
+
+    try:
+        result = _solve_assignments(db, event_id, venue_id, weights)
+    except Exception:
+        db.rollback()
+        _finish_run(db, event_id, run_id, {"status": "failed", "message": "assignment solve failed"})
+        db.commit()
+        raise
+    # the assignments and the run's result commit together
+    if not _finish_run(db, event_id, run_id, {"status": "done", "result": json.dumps(result)}):
+        db.rollback()
+        raise HTTPException(status_code=409, detail="The assignment run was taken over by another request")
+    db.commit()
+    cache.invalidate(cache.event_tag(event_id))
+    return result
+
+
+def _solve_assignments(db: Session, event_id: int, venue_id: int, weights: Dict[str, float]) -> Dict[str, Any]:
+    """Compute and stage the event's seat assignments; the caller commits."""
     w_pref = weights["member_preference"]
     w_group = weights["group"]
     w_stab  = weights["stability"]
@@ -133,13 +268,9 @@ def run_assignments(db: Session, event_id: int, payload: Optional[Dict[str, Any]
     strict_member = (w_pref >= STRICT_THRESH)
     strict_stab   = (w_stab  >= STRICT_THRESH)
 
-    ev = db.query(models.Event).filter(models.Event.id == event_id).first()
-    if not ev:
-        raise HTTPException(status_code=404, detail="Event not found")
-
     seats = (
         db.query(models.Seat)
-        .filter(models.Seat.venue_id == ev.venue_id, models.Seat.is_blocked != 1)
+        .filter(models.Seat.venue_id == venue_id, models.Seat.is_blocked != 1)
         .all()
     )
     seat_by_id = {int(s.id): s for s in seats}
@@ -259,18 +390,18 @@ def run_assignments(db: Session, event_id: int, payload: Optional[Dict[str, Any]
             if needs_accessible(p) == 1:
                 acc_demand_remaining -= 1
 
-    db.commit()
     return {
         "status": "ok",
         "weights_used": weights,  
     }
 
 
-def event_participants(db: Session, event_id: int):
+def event_participants(db: Session, org_id: int, event_id: int):
     rows = (
         db.query(models.MemberPreference, models.Member)
+        .join(models.Event, models.Event.id == models.MemberPreference.event_id)
         .join(models.Member, models.Member.id == models.MemberPreference.member_id, isouter=True)
-        .filter(models.MemberPreference.event_id == event_id)
+        .filter(models.MemberPreference.event_id == event_id, models.Event.org_id == org_id)
         .all()
     )
 
@@ -296,10 +427,17 @@ def event_participants(db: Session, event_id: int):
     return out
 
 
-def event_seatmap(db: Session, event_id: int):
-    ev = db.query(models.Event).filter(models.Event.id == event_id).first()
-    if not ev:
-        raise HTTPException(status_code=404, detail="Event not found")
+def event_seatmap(db: Session, org_id: int, event_id: int):
+    # venue seat changes invalidate the tags of the venue's events, so one tag will do
+    return cache.cached(
+        f"event_seatmap:{org_id}:{event_id}",
+        (cache.event_tag(event_id),),
+        lambda: _event_seatmap(db, org_id, event_id),
+    )
+
+
+def _event_seatmap(db: Session, org_id: int, event_id: int):
+    ev = _get_org_event(db, org_id, event_id)
 
     seats = db.query(models.Seat).filter(models.Seat.venue_id == ev.venue_id).all()
 
@@ -342,10 +480,8 @@ def event_seatmap(db: Session, event_id: int):
     ]
 
 
-def event_issues(db: Session, event_id: int):
-    ev = db.query(models.Event).filter(models.Event.id == event_id).first()
-    if not ev:
-        raise HTTPException(status_code=404, detail="Event not found")
+def event_issues(db: Session, org_id: int, event_id: int):
+    ev = _get_org_event(db, org_id, event_id)
 
     conflict_rows = (
         db.query(
@@ -423,59 +559,83 @@ def event_issues(db: Session, event_id: int):
     }
 
 
-def move_assignment(db: Session, event_id: int, preference_id: int, seat_id: int):
-    ev = db.query(models.Event).filter(models.Event.id == event_id).first()
-    if not ev:
-        raise HTTPException(status_code=404, detail="Event not found")
+# ---- manual corrections ----
+# Moves check the seat against the venue's cached layout and the event's cached
+# venue, then write with a single UPDATE: uq_event_assigned_seat is what keeps two
+# members off one seat, so concurrent moves cannot both win.
 
-    pref = (
-        db.query(models.MemberPreference)
-        .filter(
-            models.MemberPreference.id == preference_id,
-            models.MemberPreference.event_id == event_id,
-        )
-        .first()
+def _event_venue_id(db: Session, org_id: int, event_id: int) -> int:
+    # an event never changes venue or organization, so this entry needs no tags
+    return cache.cached(
+        f"event_venue:{org_id}:{event_id}", (), lambda: int(_get_org_event(db, org_id, event_id).venue_id)
     )
-    if not pref:
-        raise HTTPException(status_code=404, detail="Preference not found for event")
 
-    seat = (
-        db.query(models.Seat)
-        .filter(
-            models.Seat.id == seat_id,
-            models.Seat.venue_id == ev.venue_id,
-        )
-        .first()
+
+def _load_venue_layout(db: Session, venue_id: int) -> Dict[str, List[int]]:
+    layout: Dict[str, List[int]] = {"open": [], "blocked": []}
+    rows = (
+        db.query(models.Seat.id, models.Seat.is_blocked)
+        .filter(models.Seat.venue_id == venue_id)
+        .order_by(models.Seat.id.asc())
+        .all()
     )
-    if not seat:
-        raise HTTPException(status_code=404, detail="Seat not found for event venue")
+    for sid, blocked in rows:
+        layout["blocked" if int(blocked or 0) == 1 else "open"].append(int(sid))
+    return layout
+
+
+def _venue_layout(db: Session, venue_id: int) -> Dict[str, List[int]]:
+    """Sorted ids of the venue's open and blocked seats."""
+    return cache.cached(f"venue_layout:{venue_id}", (cache.venue_tag(venue_id),), lambda: _load_venue_layout(db, venue_id))
 
-    if int(getattr(seat, "is_blocked", 0) or 0) == 1:
+
+def _in_sorted(ids: List[int], value: int) -> bool:
+    i = bisect_left(ids, value)
+    return i < len(ids) and ids[i] == value
+
+
+def _check_seat(layout: Dict[str, List[int]], seat_id: int) -> None:
+    if _in_sorted(layout["open"], seat_id):
+        return
+    if _in_sorted(layout["blocked"], seat_id):
         raise HTTPException(status_code=400, detail="Seat is blocked")
+    raise HTTPException(status_code=404, detail="Seat not found for event venue")
 
-    taken = (
-        db.query(models.MemberPreference)
-        .filter(
-            models.MemberPreference.event_id == event_id,
-            models.MemberPreference.assigned_seat_id == seat_id,
-            models.MemberPreference.id != preference_id,
+
+def move_assignment(db: Session, org_id: int, event_id: int, preference_id: int, seat_id: int):
+    venue_id = _event_venue_id(db, org_id, event_id)
+    _check_seat(_venue_layout(db, venue_id), seat_id)
+
+    try:
+        moved = (
+            db.query(models.MemberPreference)
+            .filter(
+                models.MemberPreference.id == preference_id,
+                models.MemberPreference.event_id == event_id,
+            )
+            .update({"assigned_seat_id": seat_id}, synchronize_session=False)
         )
-        .first()
-    )
-    if taken:
+    except IntegrityError:
+        # the seat is known to exist, so this is uq_event_assigned_seat
+        db.rollback()
         raise HTTPException(status_code=409, detail="Seat already assigned")
+    if not moved:
+        db.rollback()
+        raise HTTPException(status_code=404, detail="Preference not found for event")
 
-    pref.assigned_seat_id = seat_id
     db.commit()
+    cache.invalidate(cache.event_tag(event_id))
     return {"ok": True, "event_id": event_id, "preference_id": preference_id, "seat_id": seat_id}
 
 
-def clear_assignment(db: Session, event_id: int, preference_id: int):
+def clear_assignment(db: Session, org_id: int, event_id: int, preference_id: int):
     pref = (
         db.query(models.MemberPreference)
+        .join(models.Event, models.Event.id == models.MemberPreference.event_id)
         .filter(
             models.MemberPreference.id == preference_id,
             models.MemberPreference.event_id == event_id,
+            models.Event.org_id == org_id,
         )
         .first()
     )
@@ -484,17 +644,124 @@ def clear_assignment(db: Session, event_id: int, preference_id: int):
 
     pref.assigned_seat_id = None
     db.commit()
+    cache.invalidate(cache.event_tag(event_id))
     return {"ok": True, "event_id": event_id, "preference_id": preference_id}
 
 
-def update_event_status(db: Session, event_id: int, payload: schemas.EventStatusUpdate):
-    ev = db.query(models.Event).filter(models.Event.id == event_id).first()
-    if not ev:
-        raise HTTPException(status_code=404, detail="Event not found")
+def _set_seat(seat_of: Dict[int, Optional[int]], holder: Dict[int, int], pref_id: int, seat_id: Optional[int]) -> None:
+    old = seat_of[pref_id]
+    if old is not None and holder.get(old) == pref_id:
+        del holder[old]
+    seat_of[pref_id] = seat_id
+    if seat_id is not None:
+        holder[seat_id] = pref_id
+
+
+def _apply_batch_op(
+    op: schemas.AssignmentOp,
+    layout: Dict[str, List[int]],
+    seat_of: Dict[int, Optional[int]],
+    holder: Dict[int, int],
+) -> Dict[str, Any]:
+    """Apply one operation to the in-memory seating; raises HTTPException if it is invalid."""
+    pid = op.preference_id
+    if pid not in seat_of:
+        raise HTTPException(status_code=404, detail="Preference not found for event")
+
+    if op.op == "clear":
+        _set_seat(seat_of, holder, pid, None)
+        return {"preference_id": pid, "seat_id": None}
+
+    if op.op == "move":
+        if op.seat_id is None:
+            raise HTTPException(status_code=400, detail="seat_id is required for move")
+        _check_seat(layout, op.seat_id)
+        if holder.get(op.seat_id, pid) != pid:
+            raise HTTPException(status_code=409, detail="Seat already assigned")
+        _set_seat(seat_of, holder, pid, op.seat_id)
+        return {"preference_id": pid, "seat_id": op.seat_id}
+
+    other = op.other_preference_id
+    if other is None:
+        raise HTTPException(status_code=400, detail="other_preference_id is required for swap")
+    if other not in seat_of:
+        raise HTTPException(status_code=404, detail="Preference not found for event")
+    if other == pid:
+        raise HTTPException(status_code=400, detail="Cannot swap a preference with itself")
+    seat, other_seat = seat_of[pid], seat_of[other]
+    _set_seat(seat_of, holder, pid, None)
+    _set_seat(seat_of, holder, other, seat)
+    _set_seat(seat_of, holder, pid, other_seat)
+    return {"preference_id": pid, "seat_id": other_seat, "other_preference_id": other, "other_seat_id": seat}
+
+
+def apply_assignment_batch(db: Session, org_id: int, event_id: int, payload: schemas.AssignmentBatch):
+    """Validate a list of move/swap/clear operations against the event's seating in
+    memory, in order, then write the net result in one transaction (all or nothing)."""
+    venue_id = _event_venue_id(db, org_id, event_id)
+    layout = _venue_layout(db, venue_id)
+
+    P = models.MemberPreference
+    pref_ids = {op.preference_id for op in payload.ops}
+    pref_ids |= {op.other_preference_id for op in payload.ops if op.other_preference_id is not None}
+    target_seats = {op.seat_id for op in payload.ops if op.op == "move" and op.seat_id is not None}
+    involved = P.id.in_(pref_ids)
+    if target_seats:
+        involved = or_(involved, P.assigned_seat_id.in_(target_seats))
+    # The preferences in the batch plus whoever sits on a target seat, locked until
+    # commit so they cannot change between validation and the write.
+    rows = db.query(P.id, P.assigned_seat_id).filter(P.event_id == event_id, involved).with_for_update().all()
+    seat_of: Dict[int, Optional[int]] = {int(pid): (int(sid) if sid is not None else None) for pid, sid in rows}
+    holder = {sid: pid for pid, sid in seat_of.items() if sid is not None}
+    before = dict(seat_of)
+
+    results: List[Dict[str, Any]] = []
+    for index, op in enumerate(payload.ops):
+        try:
+            results.append({"index": index, "op": op.op, "ok": True, **_apply_batch_op(op, layout, seat_of, holder)})
+        except HTTPException as e:
+            results.append({"index": index, "op": op.op, "ok": False, "status": e.status_code, "error": e.detail})
+
+    failures = [r for r in results if not r["ok"]]
+    if failures:
+        db.rollback()
+        status = 409 if all(r["status"] == 409 for r in failures) else 400
+        raise HTTPException(
+            status_code=status,
+            detail={"message": "Batch rejected; no changes were applied", "results": results},
+        )
+
+    changed = {pid: sid for pid, sid in seat_of.items() if sid != before[pid]}
+    if changed:
+        try:
+            # Vacate first, then seat: a swap never has two rows on one seat in between.
+            (
+                db.query(P)
+                .filter(P.event_id == event_id, P.id.in_(changed))
+                .update({"assigned_seat_id": None}, synchronize_session=False)
+            )
+            seated = [{"id": pid, "assigned_seat_id": sid} for pid, sid in changed.items() if sid is not None]
+            if seated:
+                db.execute(update(P), seated)
+        except IntegrityError:
+            # a seat was taken by a request outside this batch after we read the seating
+            db.rollback()
+            raise HTTPException(status_code=409, detail="Seat already assigned")
+        db.commit()
+        cache.invalidate(cache.event_tag(event_id))
+    else:
+        db.rollback()
+
+    return {"ok": True, "event_id": event_id, "changed": len(changed), "results": results}
+
+
+def update_event_status(db: Session, org_id: int, event_id: int, payload: schemas.EventStatusUpdate):
+    ev = _get_org_event(db, org_id, event_id)
 
     ev.status = payload.status
     db.commit()
     db.refresh(ev)
+    cache.invalidate(cache.event_tag(event_id))
 
     venue_name = db.query(models.Venue.name).filter(models.Venue.id == ev.venue_id).scalar()
     total_prefs = (
@@ -524,32 +791,77 @@ def update_event_status(db: Session, event_id: int, payload: schemas.EventStatus
 # ---- CSV import helpers ----
 _REQUIRED = {"first_name", "last_name", "gender", "phone", "birth_date"}
 
+_CSV_CHUNK_BYTES = 64 * 1024
+_IMPORT_BATCH_SIZE = 1000
+_MAX_REPORTED_ERRORS = 200
+
 def _sniff_delimiter(text: str) -> str:
     sample = text[:4096]
     counts = {d: sample.count(d) for d in [",", "\t", ";"]}
     best = max(counts, key=counts.get)
     return best if counts[best] > 0 else ","
 
-def _normalize_headers(fieldnames: list[str] | None) -> dict[str, str]:
-    out: dict[str, str] = {}
-    for h in (fieldnames or []):
+def _iter_text_chunks(fileobj: BinaryIO, chunk_size: int = _CSV_CHUNK_BYTES) -> Iterator[str]:
+    # Incremental decoder so multi-byte characters split across chunks decode correctly.
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    while True:
+        raw = fileobj.read(chunk_size)
+        if not raw:
+            tail = decoder.decode(b"", final=True)
+            if tail:
+                yield tail
+            return
+        text = decoder.decode(raw)
+        if text:
+            yield text
+
+def _iter_lines(chunks: Iterable[str]) -> Iterator[str]:
+    # Split on "\n" only (like iterating a StringIO); the last partial line is carried over.
+    buf = ""
+    for text in chunks:
+        buf += text
+        lines = buf.split("\n")
+        buf = lines.pop()
+        for line in lines:
+            yield line + "\n"
+    if buf:
+        yield buf
+
+def _normalize_headers(fieldnames: list[str] | None) -> dict[str, int]:
+    out: dict[str, int] = {}
+    for i, h in enumerate(fieldnames or []):
         norm = re.sub(r"[\s\-]+", "_", (h or "").strip().lower())
-        out[norm] = h
+        out[norm] = i
     return out
 
+_DATE_FORMATS = ("iso", "%d/%m/%Y", "%d-%m-%Y", "%Y/%m/%d")
+# A roster almost always uses one format throughout, so try the last one that worked first.
+_last_date_format = _DATE_FORMATS[0]
+
+def _parse_date_as(s: str, fmt: str) -> date:
+    if fmt == "iso":
+        return date.fromisoformat(s)
+    return datetime.strptime(s, fmt).date()
+
 def _parse_birth_date(val: str | None) -> date | None:
+    global _last_date_format
     if not val or not str(val).strip():
         return None
     s = str(val).strip()
+    last = _last_date_format
     try:
-        return date.fromisoformat(s) 
-    except Exception:
+        return _parse_date_as(s, last)
+    except ValueError:
         pass
-    for fmt in ("%d/%m/%Y", "%d-%m-%Y", "%Y/%m/%d"):
+    for fmt in _DATE_FORMATS:
+        if fmt == last:
+            continue
         try:
-            return datetime.strptime(s, fmt).date()
-        except Exception:
+            parsed = _parse_date_as(s, fmt)
+        except ValueError:
             continue
+        _last_date_format = fmt
+        return parsed
     raise ValueError("birth_date must be YYYY-MM-DD (or DD/MM/YYYY)")
 
 def _norm_gender(val: str | None) -> str:
@@ -560,24 +872,341 @@ def _norm_gender(val: str | None) -> str:
         return "female"
     raise ValueError("gender must be 'male' or 'female'")
 
-async def import_event_members_csv(db: Session, event_id: int, upload: UploadFile, dry_run: bool):
-    ev = db.query(models.Event).filter(models.Event.id == event_id).first()
-    if not ev:
-        raise HTTPException(status_code=404, detail="Event not found")
+def _open_csv_reader(fileobj: BinaryIO) -> Tuple[Iterator[list[str]], dict[str, int]]:
+    chunks = _iter_text_chunks(fileobj)
+    first = next(chunks, "")
+    delim = _sniff_delimiter(first)
+    reader = csv.reader(_iter_lines(chain([first], chunks)), delimiter=delim)
+    header = next(reader, [])
+    # Blank lines are skipped, as csv.DictReader does.
+    return (row for row in reader if row), _normalize_headers(header)
 
-    raw = await upload.read()
-    text = raw.decode("utf-8-sig", errors="replace")
+def _cell(row: list[str], header_map: dict[str, int], name: str) -> str:
+    i = header_map[name]
+    return row[i] if i < len(row) else ""
 
-    delim = _sniff_delimiter(text)
-    reader = csv.DictReader(StringIO(text), delimiter=delim)
+_PREF_COLUMNS = ("preferred_zone", "wants_aisle", "needs_accessible", "group_code")
+_TRUE_VALUES = {"1", "true", "yes", "y"}
+_FALSE_VALUES = {"", "0", "false", "no", "n"}
+
+def _parse_flag(val: str, field: str) -> int:
+    s = (val or "").strip().lower()
+    if s in _TRUE_VALUES:
+        return 1
+    if s in _FALSE_VALUES:
+        return 0
+    raise ValueError(f"{field} must be 1/0, yes/no or true/false")
+
+def _venue_zone_lookup(db: Session, venue_id: int) -> dict[str, str]:
+    # One query per import; maps lower-cased zone -> zone as stored on the seats.
+    rows = db.query(distinct(models.Seat.zone)).filter(models.Seat.venue_id == venue_id).all()
+    return {z.lower(): z for (z,) in rows if z}
+
+def _validate_prefs(row: list[str], header_map: dict[str, int], zones: dict[str, str]) -> dict:
+    prefs: dict = {}
+    if "preferred_zone" in header_map:
+        zone = _cell(row, header_map, "preferred_zone").strip()
+        if zone and zone.lower() not in zones:
+            raise ValueError(f"preferred_zone '{zone}' is not a zone of this venue")
+        prefs["preferred_zone"] = zones[zone.lower()] if zone else None
+    if "wants_aisle" in header_map:
+        prefs["wants_aisle"] = _parse_flag(_cell(row, header_map, "wants_aisle"), "wants_aisle")
+    if "needs_accessible" in header_map:
+        prefs["needs_accessible"] = _parse_flag(_cell(row, header_map, "needs_accessible"), "needs_accessible")
+    if "group_code" in header_map:
+        group_code = _cell(row, header_map, "group_code").strip()
+        if len(group_code) > 100:
+            raise ValueError("group_code must be at most 100 characters")
+        prefs["group_code"] = group_code or None
+    return prefs
+
+def _validate_row(row: list[str], header_map: dict[str, int], zones: dict[str, str]) -> Tuple[dict, dict]:
+    first = _cell(row, header_map, "first_name").strip()
+    last = _cell(row, header_map, "last_name").strip()
+    if not first or not last:
+        raise ValueError("first_name and last_name are required")
+    gender = _norm_gender(_cell(row, header_map, "gender"))
+    phone = _cell(row, header_map, "phone").strip() or None
+    bd = _parse_birth_date(_cell(row, header_map, "birth_date"))
+    member = {
+        "first_name": first,
+        "last_name": last,
+        "gender": gender,
+        "phone": phone,
+        "birth_date": bd,
+    }
+    return member, _validate_prefs(row, header_map, zones)
+
+def _iter_validated(header_map: dict[str, int], zones: dict[str, str], start: int, rows: Iterable[list[str]]) -> Iterator[tuple]:
+    for idx, row in enumerate(rows, start=start):
+        try:
+            yield idx, _validate_row(row, header_map, zones), None
+        except Exception as e:
+            yield idx, None, str(e)
+
+def _validate_chunk(header_map: dict[str, int], zones: dict[str, str], start: int, rows: list[list[str]]) -> list[tuple]:
+    return list(_iter_validated(header_map, zones, start, rows))
+
+_validation_pool: ProcessPoolExecutor | None = None
+_validation_pool_lock = threading.Lock()
+
+def _get_validation_pool() -> ProcessPoolExecutor:
+    global _validation_pool
+    with _validation_pool_lock:
+        if _validation_pool is None:
+            # spawn, not fork: the API process runs threads (import jobs, sweeper).
+            _validation_pool = ProcessPoolExecutor(
+                max_workers=settings.IMPORT_VALIDATION_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _validation_pool
+
+def _iter_validated_rows(
+    rows: Iterator[list[str]],
+    header_map: dict[str, int],
+    zones: dict[str, str],
+    start: int = 2,
+) -> Iterator[tuple]:
+    """Yield (row_index, (member, prefs) or None, error or None) in file order.
+
+    With IMPORT_VALIDATION_WORKERS > 1, rows are validated in chunks on a process
+    pool. Only a few chunks are in flight at once, so memory stays bounded.
+    """
+    workers = settings.IMPORT_VALIDATION_WORKERS
+    if workers <= 1:
+        # row by row, so nothing beyond the current write batch is held in memory
+        yield from _iter_validated(header_map, zones, start, rows)
+        return
+
+    pool = _get_validation_pool()
+    chunk_size = settings.IMPORT_VALIDATION_CHUNK_ROWS
+    in_flight: deque = deque()
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        in_flight.append(pool.submit(_validate_chunk, header_map, zones, start, chunk))
+        start += len(chunk)
+        if len(in_flight) >= workers * 2:
+            yield from in_flight.popleft().result()
+    while in_flight:
+        yield from in_flight.popleft().result()
+
+def _norm_phone(phone: str | None) -> str | None:
+    digits = re.sub(r"\D", "", phone or "")
+    return digits or None
+
+def _name_key(values: dict) -> tuple:
+    return (values["last_name"].lower(), values["first_name"].lower())
+
+class _MemberIndex:
+    """Hash index of members by phone and by (last, first, birth_date).
+
+    A phone only identifies a member together with their name, since families
+    often share one number; without a phone match, (last, first, birth_date) is
+    tried, which also finds members whose phone changed or was removed.
+    """
+
+    def __init__(self):
+        self._by_phone: dict[str, set[int]] = {}
+        self._by_name: dict[tuple, set[int]] = {}
+        self._keys_by_id: dict[int, Tuple[str | None, tuple]] = {}
+        self._names: dict[int, tuple] = {}
+
+    def add(self, member_id: int, member: dict) -> None:
+        self.discard(member_id)
+        phone = _norm_phone(member.get("phone"))
+        name = _name_key(member)
+        full = (*name, member.get("birth_date"))
+        if phone:
+            self._by_phone.setdefault(phone, set()).add(member_id)
+        self._by_name.setdefault(full, set()).add(member_id)
+        self._keys_by_id[member_id] = (phone, full)
+        self._names[member_id] = name
+
+    def discard(self, member_id: int) -> None:
+        keys = self._keys_by_id.pop(member_id, None)
+        if keys is None:
+            return
+        phone, full = keys
+        if phone:
+            self._by_phone[phone].discard(member_id)
+        self._by_name[full].discard(member_id)
+        del self._names[member_id]
+
+    def find(self, member: dict) -> Optional[int]:
+        phone = _norm_phone(member.get("phone"))
+        name = _name_key(member)
+        if phone:
+            ids = [mid for mid in self._by_phone.get(phone, ()) if self._names[mid] == name]
+            if ids:
+                return min(ids)
+        ids = self._by_name.get((*name, member.get("birth_date")))
+        return min(ids) if ids else None
+
+    def clear(self) -> None:
+        self._by_phone.clear()
+        self._by_name.clear()
+        self._keys_by_id.clear()
+        self._names.clear()
+
+_MEMBER_FIELDS = ("first_name", "last_name", "phone", "gender", "birth_date")
+
+class _MemberImportWriter:
+    """Buffers validated rows and writes them in bounded batches.
+
+    In upsert mode the event's existing members and their preferences are loaded
+    once into a _MemberIndex; matching rows become bulk
+    UPDATEs (or are counted as unchanged) and only unmatched rows are inserted.
+    Preference columns missing from the file are left untouched. When ``write`` is
+    False nothing touches the database beyond the index load, but the counts are
+    still computed.
+    """
+
+    def __init__(self, db: Session, event_id: int, upsert: bool, write: bool):
+        self.db = db
+        self.event_id = event_id
+        self.upsert = upsert
+        self.write = write
+
+        self.created = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.preferences_created = 0
+        self.preferences_updated = 0
+
+        self._index = _MemberIndex()
+        self._values_by_id: dict[int, tuple] = {}
+        self._prefs_by_id: dict[int, dict] = {}
+        self._pending: list[Tuple[dict, dict]] = []
+        self._pending_index = _MemberIndex()
+        self._member_updates: list[dict] = []
+        self._pref_updates: list[dict] = []
+        self._next_fake_id = -1
+
+        if upsert:
+            self._load_index()
+
+    def _load_index(self) -> None:
+        pref_cols = [getattr(models.MemberPreference, c) for c in _PREF_COLUMNS]
+        rows = (
+            self.db.query(
+                models.Member.id,
+                models.Member.first_name,
+                models.Member.last_name,
+                models.Member.phone,
+                models.Member.gender,
+                models.Member.birth_date,
+                *pref_cols,
+            )
+            .join(models.MemberPreference, models.MemberPreference.member_id == models.Member.id)
+            .filter(models.MemberPreference.event_id == self.event_id)
+            .yield_per(5000)
+        )
+        n = len(_MEMBER_FIELDS)
+        for mid, *values in rows:
+            member = dict(zip(_MEMBER_FIELDS, values[:n]))
+            self._remember(int(mid), member, dict(zip(_PREF_COLUMNS, values[n:])))
+
+    def _remember(self, member_id: int, member: dict, prefs: dict) -> None:
+        self._index.add(member_id, member)
+        self._values_by_id[member_id] = tuple(member.get(f) for f in _MEMBER_FIELDS)
+        self._prefs_by_id.setdefault(member_id, {}).update(prefs)
+
+    def _batch_full(self) -> bool:
+        return len(self._pending) + len(self._member_updates) + len(self._pref_updates) >= _IMPORT_BATCH_SIZE
+
+    def add(self, values: Tuple[dict, dict]) -> None:
+        member, prefs = values
+        if self.upsert:
+            if self._pending_index.find(member) is not None:
+                # Same person twice in the file: insert the first copy, then match it.
+                self.flush()
+            member_id = self._index.find(member)
+            if member_id is not None:
+                self._update(member_id, member, prefs)
+                return
+            self._pending_index.add(len(self._pending), member)
+
+        self._pending.append((member, prefs))
+        if self._batch_full():
+            self.flush()
+
+    def _update(self, member_id: int, member: dict, prefs: dict) -> None:
+        member_changed = self._values_by_id.get(member_id) != tuple(member.get(f) for f in _MEMBER_FIELDS)
+        old_prefs = self._prefs_by_id.get(member_id, {})
+        prefs_changed = any(old_prefs.get(k) != v for k, v in prefs.items())
+        # Every matched row counts as updated or unchanged by its member columns, so
+        # created + updated + unchanged is the number of rows written; preference
+        # changes are counted on their own in preferences_updated.
+        if not member_changed:
+            self.unchanged += 1
+            if not prefs_changed:
+                return
+        else:
+            self.updated += 1
+            if member_id > 0:
+                self._member_updates.append({"id": member_id, **member})
+        if prefs_changed:
+            self.preferences_updated += 1
+            if member_id > 0:
+                self._pref_updates.append({"b_member_id": member_id, **prefs})
+        self._remember(member_id, member, prefs)
+        if self._batch_full():
+            self.flush()
+
+    def _apply_pref_updates(self) -> None:
+        # Keyed on (event_id, member_id) -- uq_event_member -- so rows inserted earlier
+        # in this import can be updated without knowing their preference ids.
+        t = models.MemberPreference.__table__
+        stmt = (
+            t.update()
+            .where(t.c.event_id == self.event_id, t.c.member_id == bindparam("b_member_id"))
+            .values({k: bindparam(k) for k in self._pref_updates[0] if k != "b_member_id"})
+        )
+        self.db.execute(stmt, self._pref_updates)
+
+    def flush(self) -> None:
+        if self.write:
+            member_ids = bulk.insert_members(self.db, [m for m, _ in self._pending])
+            bulk.insert_preferences(
+                self.db,
+                [
+                    {"event_id": self.event_id, "member_id": mid, "invite_token": str(uuid4()), **prefs}
+                    for mid, (_, prefs) in zip(member_ids, self._pending)
+                ],
+            )
+            if self._member_updates:
+                self.db.execute(update(models.Member), self._member_updates)
+            if self._pref_updates:
+                self._apply_pref_updates()
+        else:
+            member_ids = list(range(self._next_fake_id, self._next_fake_id - len(self._pending), -1))
+            self._next_fake_id -= len(self._pending)
 
-    header_map = _normalize_headers(reader.fieldnames)
+        self.created += len(member_ids)
+        self.preferences_created += len(member_ids)
+        if self.upsert:
+            for mid, (member, prefs) in zip(member_ids, self._pending):
+                self._remember(mid, member, prefs)
+
+        self._pending.clear()
+        self._pending_index.clear()
+        self._member_updates.clear()
+        self._pref_updates.clear()
+
+def _import_members_stream(db: Session, org_id: int, event_id: int, fileobj: BinaryIO, dry_run: bool, upsert: bool = False):
+    ev = _get_org_event(db, org_id, event_id)
+
+    rows, header_map = _open_csv_reader(fileobj)
     missing = sorted(list(_REQUIRED - set(header_map.keys())))
     if missing:
         resp = {
             "ok": False,
             "dry_run": True,
             "created_members": 0,
+            "updated_members": 0,
+            "unchanged_members": 0,
             "preferences_created": 0,
             "preferences_updated": 0,
             "errors": [{"row": 1, "error": f"Missing required columns: {missing}"}],
@@ -587,68 +1216,341 @@ async def import_event_members_csv(db: Session, event_id: int, upload: UploadFil
         raise HTTPException(status_code=400, detail=resp)
 
     errors: list[dict] = []
-    valid: list[dict] = []
+    error_count = 0
+    zones = _venue_zone_lookup(db, ev.venue_id)
+    writer = _MemberImportWriter(db, event_id, upsert=upsert, write=not dry_run)
+
+    # Rows are validated one at a time and written in bounded batches inside a single
+    # transaction. Once any row fails, writing stops and the transaction is rolled back,
+    # so the import stays all-or-nothing without holding the file in memory.
+    for idx, values, err in _iter_validated_rows(rows, header_map, zones):
+        if err is not None:
+            error_count += 1
+            if len(errors) < _MAX_REPORTED_ERRORS:
+                errors.append({"row": idx, "error": err})
+            continue
 
-    for idx, row in enumerate(reader, start=2):
-        try:
-            first = (row.get(header_map["first_name"]) or "").strip()
-            last = (row.get(header_map["last_name"]) or "").strip()
-            if not first or not last:
-                raise ValueError("first_name and last_name are required")
-            gender = _norm_gender(row.get(header_map["gender"]))
-            phone = (row.get(header_map["phone"]) or "").strip() or None
-            bd = _parse_birth_date(row.get(header_map["birth_date"]))
-            valid.append({
-                "first_name": first,
-                "last_name": last,
-                "gender": gender,
-                "phone": phone,
-                "birth_date": bd,
-            })
-        except Exception as e:
-            errors.append({"row": idx, "error": str(e)})
+        if error_count and not dry_run:
+            continue
+        writer.add(values)
 
     if dry_run:
+        writer.flush()
         return {
-            "ok": (len(errors) == 0),
+            "ok": (error_count == 0),
             "dry_run": True,
-            "created_members": len(valid),
-            "preferences_created": 0,
-            "preferences_updated": 0,
-            "errors": errors[:200],
+            "created_members": writer.created,
+            "updated_members": writer.updated,
+            "unchanged_members": writer.unchanged,
+            "preferences_created": writer.preferences_created,
+            "preferences_updated": writer.preferences_updated,
+            "errors": errors,
         }
 
-    if errors:
-        raise HTTPException(status_code=400, detail={"message": "CSV validation failed", "errors": errors[:200]})
-
-    created_members = 0
-    preferences_created = 0
-    for r in valid:
-        mem = models.Member(
-            first_name=r["first_name"],
-            last_name=r["last_name"],
-            phone=r["phone"],
-            gender=r["gender"],
-            birth_date=r["birth_date"],
-        )
-        db.add(mem)
-        db.flush()
-        created_members += 1
-
-        pref = models.MemberPreference(
-            event_id=event_id,
-            member_id=mem.id,
-            invite_token=str(uuid4()),
-        )
-        db.add(pref)
-        preferences_created += 1
+    if error_count:
+        db.rollback()
+        raise HTTPException(status_code=400, detail={"message": "CSV validation failed", "errors": errors})
 
+    writer.flush()
     db.commit()
+    cache.invalidate(cache.event_tag(event_id))
     return {
         "ok": True,
         "dry_run": False,
-        "created_members": created_members,
-        "preferences_created": preferences_created,
-        "preferences_updated": 0,
+        "created_members": writer.created,
+        "updated_members": writer.updated,
+        "unchanged_members": writer.unchanged,
+        "preferences_created": writer.preferences_created,
+        "preferences_updated": writer.preferences_updated,
         "errors": [],
     }
+
+async def import_event_members_csv(db: Session, org_id: int, event_id: int, upload: UploadFile, dry_run: bool, upsert: bool = False):
+    # Starlette spools large uploads to a temp file; read it in chunks instead of upload.read().
+    # The file reads and DB batches are blocking, so run them off the event loop.
+    return await run_in_threadpool(_import_members_stream, db, org_id, event_id, upload.file, dry_run, upsert)
+
+
+# ---- Background import jobs ----
+# A job stages the upload on local disk, then commits it in checkpointed batches:
+# each batch's rows and the job's progress counters go in the same transaction, so
+# after a crash the job resumes from rows_processed. Invalid rows are skipped and
+# reported instead of failing the whole import.
+_WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+_JOB_SWEEP_SECONDS = 30
+_JOB_COUNTERS = ("created_members", "updated_members", "unchanged_members", "preferences_created", "preferences_updated")
+
+logger = logging.getLogger(__name__)
+
+def _job_out(job: models.ImportJob) -> dict:
+    return {
+        "job_id": job.id,
+        "event_id": int(job.event_id),
+        "status": job.status,
+        "upsert": bool(job.upsert),
+        "rows_processed": int(job.rows_processed or 0),
+        **{k: int(getattr(job, k) or 0) for k in _JOB_COUNTERS},
+        "error_count": int(job.error_count or 0),
+        "errors": json.loads(job.errors or "[]"),
+        "message": job.message,
+        "created_at": job.created_at,
+        "finished_at": job.finished_at,
+    }
+
+def _stage_upload(fileobj: BinaryIO, path: str) -> None:
+    with open(path, "wb") as out:
+        shutil.copyfileobj(fileobj, out, _CSV_CHUNK_BYTES)
+
+def _create_import_job(db: Session, org_id: int, event_id: int, fileobj: BinaryIO, upsert: bool) -> models.ImportJob:
+    _get_org_event(db, org_id, event_id)
+
+    job_id = str(uuid4())
+    os.makedirs(settings.IMPORT_STAGING_DIR, exist_ok=True)
+    path = os.path.join(settings.IMPORT_STAGING_DIR, f"{job_id}.csv")
+    _stage_upload(fileobj, path)
+
+    job = models.ImportJob(
+        id=job_id,
+        event_id=event_id,
+        status="queued",
+        upsert=upsert,
+        file_path=path,
+        rows_processed=0,
+        error_count=0,
+        attempts=0,
+        **{k: 0 for k in _JOB_COUNTERS},
+    )
+    try:
+        db.add(job)
+        db.commit()
+    except Exception:
+        db.rollback()
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        raise
+    db.refresh(job)
+    return job
+
+async def start_import_job(db: Session, org_id: int, event_id: int, upload: UploadFile, upsert: bool = False):
+    # Staging and the job insert block on disk and the primary; keep them off the event loop.
+    job = await run_in_threadpool(_create_import_job, db, org_id, event_id, upload.file, upsert)
+    _schedule_import_job(job.id)
+    return _job_out(job)
+
+def get_import_job(db: Session, org_id: int, event_id: int, job_id: str):
+    job = (
+        db.query(models.ImportJob)
+        .join(models.Event, models.Event.id == models.ImportJob.event_id)
+        .filter(
+            models.ImportJob.id == job_id,
+            models.ImportJob.event_id == event_id,
+            models.Event.org_id == org_id,
+        )
+        .first()
+    )
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return _job_out(job)
+
+def _unattended_jobs_filter():
+    stale = datetime.utcnow() - timedelta(seconds=settings.IMPORT_JOB_STALE_SECONDS)
+    return or_(
+        models.ImportJob.status == "queued",
+        and_(
+            models.ImportJob.status == "running",
+            or_(models.ImportJob.heartbeat_at.is_(None), models.ImportJob.heartbeat_at < stale),
+        ),
+    )
+
+def _claimable_jobs_filter():
+    return and_(_unattended_jobs_filter(), models.ImportJob.attempts < settings.IMPORT_JOB_MAX_ATTEMPTS)
+
+def _claim_import_job(db: Session, job_id: str) -> bool:
+    claimed = (
+        db.query(models.ImportJob)
+        .filter(models.ImportJob.id == job_id, _claimable_jobs_filter())
+        .update(
+            {
+                "status": "running",
+                "worker_id": _WORKER_ID,
+                "attempts": models.ImportJob.attempts + 1,
+                "heartbeat_at": datetime.utcnow(),
+            },
+            synchronize_session=False,
+        )
+    )
+    db.commit()
+    return claimed == 1
+
+def _checkpoint_import_job(db: Session, job_id: str, values: dict) -> bool:
+    # Fenced on worker_id: if another worker took the job over, drop this batch.
+    updated = (
+        db.query(models.ImportJob)
+        .filter(models.ImportJob.id == job_id, models.ImportJob.worker_id == _WORKER_ID)
+        .update({**values, "heartbeat_at": datetime.utcnow()}, synchronize_session=False)
+    )
+    if updated != 1:
+        db.rollback()
+        return False
+    db.commit()
+    return True
+
+def _process_import_job(db: Session, job: models.ImportJob) -> None:
+    job_id = job.id
+    with open(job.file_path, "rb") as f:
+        rows, header_map = _open_csv_reader(f)
+        missing = sorted(list(_REQUIRED - set(header_map.keys())))
+        if missing:
+            _checkpoint_import_job(db, job_id, {
+                "status": "failed",
+                "message": f"Missing required columns: {missing}",
+                "finished_at": datetime.utcnow(),
+            })
+            return
+
+        rows_processed = int(job.rows_processed or 0)
+        error_count = int(job.error_count or 0)
+        errors: list[dict] = json.loads(job.errors or "[]")
+        base = {k: int(getattr(job, k) or 0) for k in _JOB_COUNTERS}
+        ev = db.get(models.Event, job.event_id)
+        zones = _venue_zone_lookup(db, ev.venue_id) if ev else {}
+        writer = _MemberImportWriter(db, job.event_id, upsert=bool(job.upsert), write=True)
+
+        def progress() -> dict:
+            writer.flush()
+            return {
+                "rows_processed": rows_processed,
+                "error_count": error_count,
+                "errors": json.dumps(errors, default=str),
+                **{k: base[k] + v for k, v in (
+                    ("created_members", writer.created),
+                    ("updated_members", writer.updated),
+                    ("unchanged_members", writer.unchanged),
+                    ("preferences_created", writer.preferences_created),
+                    ("preferences_updated", writer.preferences_updated),
+                )},
+            }
+
+        since_checkpoint = 0
+        remaining = islice(rows, rows_processed, None)
+        for idx, values, err in _iter_validated_rows(remaining, header_map, zones, start=rows_processed + 2):
+            if err is not None:
+                error_count += 1
+                if len(errors) < _MAX_REPORTED_ERRORS:
+                    errors.append({"row": idx, "error": err})
+            else:
+                writer.add(values)
+            rows_processed += 1
+            since_checkpoint += 1
+            if since_checkpoint >= _IMPORT_BATCH_SIZE:
+                if not _checkpoint_import_job(db, job_id, progress()):
+                    return
+                cache.invalidate(cache.event_tag(job.event_id))
+                since_checkpoint = 0
+
+        if not _checkpoint_import_job(db, job_id, {**progress(), "status": "done", "finished_at": datetime.utcnow()}):
+            return
+        cache.invalidate(cache.event_tag(job.event_id))
+
+    try:
+        os.remove(job.file_path)
+    except OSError:
+        pass
+
+def run_import_job(job_id: str) -> None:
+    db = SessionLocal()
+    try:
+        if not _claim_import_job(db, job_id):
+            return
+        job = db.get(models.ImportJob, job_id)
+        attempts = int(job.attempts)
+        try:
+            _process_import_job(db, job)
+        except (OSError, csv.Error) as e:
+            db.rollback()
+            _checkpoint_import_job(db, job_id, {
+                "status": "failed", "message": str(e), "finished_at": datetime.utcnow(),
+            })
+        except Exception as e:
+            db.rollback()
+            if attempts < settings.IMPORT_JOB_MAX_ATTEMPTS:
+                raise
+            logger.exception("import job %s failed on attempt %d, giving up", job_id, attempts)
+            _checkpoint_import_job(db, job_id, {
+                "status": "failed",
+                "message": f"Import failed after {attempts} attempts: {e}",
+                "finished_at": datetime.utcnow(),
+            })
+    except Exception:
+        # Left as "running"; the sweeper picks it up again once the heartbeat goes stale.
+        logger.exception("import job %s interrupted", job_id)
+    finally:
+        db.close()
+
+# Jobs run on a bounded pool; _scheduled_jobs keeps the sweeper from queueing a job
+# again while it is still waiting for a worker here.
+_job_executor: ThreadPoolExecutor | None = None
+_job_executor_lock = threading.Lock()
+_scheduled_jobs: set[str] = set()
+
+def _run_scheduled_import_job(job_id: str) -> None:
+    try:
+        run_import_job(job_id)
+    finally:
+        with _job_executor_lock:
+            _scheduled_jobs.discard(job_id)
+
+def _schedule_import_job(job_id: str) -> None:
+    global _job_executor
+    with _job_executor_lock:
+        if job_id in _scheduled_jobs:
+            return
+        if _job_executor is None:
+            _job_executor = ThreadPoolExecutor(
+                max_workers=max(1, settings.IMPORT_JOB_WORKERS), thread_name_prefix="import-job"
+            )
+        _scheduled_jobs.add(job_id)
+    _job_executor.submit(_run_scheduled_import_job, job_id)
+
+def _fail_exhausted_import_jobs(db: Session) -> None:
+    # Jobs that crashed their worker (or kept failing) IMPORT_JOB_MAX_ATTEMPTS times.
+    failed = (
+        db.query(models.ImportJob)
+        .filter(_unattended_jobs_filter(), models.ImportJob.attempts >= settings.IMPORT_JOB_MAX_ATTEMPTS)
+        .update(
+            {
+                "status": "failed",
+                "message": f"Import did not finish after {settings.IMPORT_JOB_MAX_ATTEMPTS} attempts",
+                "finished_at": datetime.utcnow(),
+            },
+            synchronize_session=False,
+        )
+    )
+    db.commit()
+    if failed:
+        logger.warning("marked %d import job(s) failed after %d attempts", failed, settings.IMPORT_JOB_MAX_ATTEMPTS)
+
+def resume_import_jobs() -> None:
+    db = SessionLocal()
+    try:
+        _fail_exhausted_import_jobs(db)
+        job_ids = [jid for (jid,) in db.query(models.ImportJob.id).filter(_claimable_jobs_filter()).all()]
+    finally:
+        db.close()
+    for job_id in job_ids:
+        _schedule_import_job(job_id)
+
+def start_import_job_sweeper() -> threading.Thread:
+    def sweep() -> None:
+        while True:
+            try:
+                resume_import_jobs()
+            except Exception:
+                logger.exception("import job sweep failed")
+            time.sleep(_JOB_SWEEP_SECONDS)
+
+    t = threading.Thread(target=sweep, name="import-job-sweeper", daemon=True)
+    t.start()
+    return t
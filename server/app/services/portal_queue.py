@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import os
+import socket
+import sqlite3
+import threading
+import time
+from typing import List, Optional, Tuple
+
+from app import schemas
+from app.settings import settings
+
+# Durable local queue for portal submissions (PORTAL_WRITE_BEHIND mode).
+#
+# Submissions are appended to a SQLite file next to the app, so they survive a
+# restart and are visible to every worker process on the box. Exactly one writer
+# (whoever holds the lease row) drains the queue in batches, applying each batch in
+# one database transaction. Applying a submission is idempotent, so a batch that
+# was applied but not yet acknowledged before a crash is simply replayed.
+
+_WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+_LEASE_SECONDS = 30
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS portal_submissions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    token TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    enqueued_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_portal_submissions_token ON portal_submissions (token, id);
+CREATE TABLE IF NOT EXISTS writer_lease (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+
+class PortalWriteQueue:
+    def __init__(self, path: str):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def enqueue(self, token: str, payload: schemas.PortalSubmit) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO portal_submissions (token, payload, enqueued_at) VALUES (?, ?, ?)",
+                (token, payload.model_dump_json(), time.time()),
+            )
+
+    def latest(self, token: str) -> Optional[schemas.PortalSubmit]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload FROM portal_submissions WHERE token = ? ORDER BY id DESC LIMIT 1",
+                (token,),
+            ).fetchone()
+        return schemas.PortalSubmit.model_validate_json(row[0]) if row else None
+
+    def acquire_lease(self) -> bool:
+        now = time.time()
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT INTO writer_lease (id, owner, expires_at) VALUES (1, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+                "WHERE writer_lease.owner = excluded.owner OR writer_lease.expires_at < ?",
+                (_WORKER_ID, now + _LEASE_SECONDS, now),
+            )
+            return cur.rowcount == 1
+
+    def peek(self, limit: int) -> List[Tuple[int, str, str]]:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT id, token, payload FROM portal_submissions ORDER BY id LIMIT ?",
+                (limit,),
+            ).fetchall()
+
+    def ack(self, ids: List[int]) -> None:
+        if not ids:
+            return
+        with self._lock:
+            self._conn.executemany("DELETE FROM portal_submissions WHERE id = ?", [(i,) for i in ids])
+
+
+_queue: Optional[PortalWriteQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_queue() -> PortalWriteQueue:
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = PortalWriteQueue(settings.PORTAL_QUEUE_PATH)
+        return _queue
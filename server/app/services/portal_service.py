@@ -1,71 +1,153 @@
 from __future__ import annotations
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 from uuid import uuid4
+import logging
+import re
+import threading
+import time
 
 from fastapi import HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import distinct
+from pydantic import ValidationError
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import and_, distinct, or_, update
+from sqlalchemy.exc import DataError, IntegrityError
 
-from app import models, schemas
+from app import cache, models, schemas
+from app.db import SessionLocal
+from app.services import bulk, portal_queue
+from app.settings import settings
 
+logger = logging.getLogger(__name__)
 
-def portal_get(db: Session, token: str):
-    pref = db.query(models.MemberPreference).filter(models.MemberPreference.invite_token == token).first()
-    if not pref and token.isdigit():
-        pref = db.query(models.MemberPreference).get(int(token))
-    if not pref:
-        raise HTTPException(status_code=404, detail="Invite not found")
 
-    ev = db.query(models.Event).filter(models.Event.id == pref.event_id).first()
-    venue = db.query(models.Venue).filter(models.Venue.id == ev.venue_id).first() if ev else None
-    member = db.query(models.Member).filter(models.Member.id == pref.member_id).first()
+# ---- per-event portal context ----
+# Event name, venue name and zone list are the same for every invitee of an event,
+# so they are cached per event in the shared response cache under the event's tag.
+# Status changes and seat generation bump that tag on every worker.
 
-    assigned_code = None
-    if pref.assigned_seat_id:
-        seat = db.query(models.Seat).filter(models.Seat.id == pref.assigned_seat_id).first()
-        assigned_code = seat.code if seat else None
 
+def _load_event_context(db: Session, event_id: int) -> Dict[str, Any]:
+    row = (
+        db.query(models.Event.name, models.Event.venue_id, models.Venue.name)
+        .outerjoin(models.Venue, models.Venue.id == models.Event.venue_id)
+        .filter(models.Event.id == event_id)
+        .first()
+    )
+    if not row:
+        return {"event_name": "", "venue_id": None, "venue_name": None, "zones": []}
+
+    event_name, venue_id, venue_name = row
     zones: List[str] = []
-    if ev and ev.venue_id:
+    if venue_id:
         zone_rows = (
             db.query(distinct(models.Seat.zone))
-            .filter(models.Seat.venue_id == ev.venue_id)
+            .filter(models.Seat.venue_id == venue_id)
             .order_by(models.Seat.zone.asc())
             .all()
         )
         zones = [z for (z,) in zone_rows if z]
+    return {"event_name": event_name, "venue_id": venue_id, "venue_name": venue_name, "zones": zones}
 
-    guests: List[Dict[str, Any]] = []
-
-    if getattr(pref, "group_code", None):
-        guest_rows = (
-            db.query(models.MemberPreference, models.Member)
-            .join(models.Member, models.Member.id == models.MemberPreference.member_id)
-            .filter(
-                models.MemberPreference.event_id == pref.event_id,
-                models.MemberPreference.group_code == pref.group_code,
-                models.MemberPreference.id != pref.id,
-            )
-            .all()
-        )
-        guests = [
-            {
-                "first_name": m.first_name,
-                "last_name": getattr(m, "last_name", None),
-                "phone": getattr(m, "phone", None),
-                "gender": getattr(m, "gender", None),
-                "preferred_zone": getattr(p, "preferred_zone", None),
+
+def get_event_context(db: Session, event_id: int) -> Dict[str, Any]:
+    return cache.cached(f"portal_ctx:{event_id}", (cache.event_tag(event_id),), lambda: _load_event_context(db, event_id))
+
+
+def warm_event_contexts() -> int:
+    """Load the context of every event whose portal is open. Optional, see
+    WARM_CACHES_ON_STARTUP; failures are logged and leave the cache cold."""
+    db = SessionLocal()
+    try:
+        event_ids = [
+            eid for (eid,) in db.query(models.Event.id).filter(models.Event.status == "preferences_open").all()
+        ]
+        for event_id in event_ids:
+            get_event_context(db, event_id)
+        logger.info("warmed portal context for %d events", len(event_ids))
+        return len(event_ids)
+    except Exception:
+        logger.exception("portal context warmup failed")
+        return 0
+    finally:
+        db.close()
+
+
+def _token_filter(token: str):
+    if token.isdigit():
+        return or_(models.MemberPreference.invite_token == token, models.MemberPreference.id == int(token))
+    return models.MemberPreference.invite_token == token
+
+
+def portal_get(db: Session, token: str):
+    _, out = cache.cached(f"portal:{token}", lambda view: (cache.event_tag(view[0]),), lambda: _portal_view(db, token))
+
+    if settings.PORTAL_WRITE_BEHIND:
+        # Read your own writes: a queued submission wins over what is in the database.
+        pending = portal_queue.get_queue().latest(token)
+        if pending is not None:
+            out = {
+                **out,
+                "preferred_zone": pending.preferred_zone,
                 "preferred_seat_code": None,
-                "wants_aisle": int(getattr(p, "wants_aisle", 0) or 0),
-                "needs_accessible": int(getattr(p, "needs_accessible", 0) or 0),
+                "wants_aisle": int(pending.wants_aisle or 0),
+                "needs_accessible": int(pending.needs_accessible or 0),
+                "guests": [{**g.model_dump(), "preferred_seat_code": None} for g in pending.guests],
             }
-            for p, m in guest_rows
-        ]
+    return out
+
+
+def _portal_view(db: Session, token: str) -> Tuple[int, Dict[str, Any]]:
+    """(event_id, portal data) as stored in the database."""
+    # One round trip for everything invitee-specific: the preference, its member,
+    # the assigned seat code and the rest of the group (one row per guest).
+    Guest = aliased(models.MemberPreference)
+    GuestMember = aliased(models.Member)
+    rows = (
+        db.query(models.MemberPreference, models.Member, models.Seat.code, Guest, GuestMember)
+        .outerjoin(models.Member, models.Member.id == models.MemberPreference.member_id)
+        .outerjoin(models.Seat, models.Seat.id == models.MemberPreference.assigned_seat_id)
+        .outerjoin(
+            Guest,
+            and_(
+                Guest.event_id == models.MemberPreference.event_id,
+                Guest.group_code == models.MemberPreference.group_code,
+                Guest.id != models.MemberPreference.id,
+            ),
+        )
+        .outerjoin(GuestMember, GuestMember.id == Guest.member_id)
+        .filter(_token_filter(token))
+        .order_by(Guest.id.asc())
+        .all()
+    )
+    if not rows:
+        raise HTTPException(status_code=404, detail="Invite not found")
+
+    # A numeric token can also match by id; an exact invite_token match wins.
+    pref = next((r[0] for r in rows if r[0].invite_token == token), rows[0][0])
+    rows = [r for r in rows if r[0] is pref]
+    _, member, assigned_code, _, _ = rows[0]
+
+    ctx = get_event_context(db, pref.event_id)
+
+    guests: List[Dict[str, Any]] = [
+        {
+            "first_name": m.first_name,
+            "last_name": getattr(m, "last_name", None),
+            "phone": getattr(m, "phone", None),
+            "gender": getattr(m, "gender", None),
+            "preferred_zone": getattr(p, "preferred_zone", None),
+            "preferred_seat_code": None,
+            "wants_aisle": int(getattr(p, "wants_aisle", 0) or 0),
+            "needs_accessible": int(getattr(p, "needs_accessible", 0) or 0),
+        }
+        for _, _, _, p, m in rows
+        if p is not None and m is not None
+    ]
 
-    return {
-        "event_name": ev.name if ev else "",
-        "venue_name": venue.name if venue else None,
+    out = {
+        "event_name": ctx["event_name"],
+        "venue_name": ctx["venue_name"],
         "member_first_name": member.first_name if member else "",
         "member_last_name": member.last_name if member else "",
         "wants_aisle": pref.wants_aisle,
@@ -73,17 +155,47 @@ def portal_get(db: Session, token: str):
         "preferred_seat_code": pref.preferred_seat_code,
         "needs_accessible": pref.needs_accessible,
         "assigned_seat_code": assigned_code,
-        "zones": zones,
+        "zones": ctx["zones"],
         "guests": guests,
     }
+    return int(pref.event_id), out
 
 
-def portal_submit(db: Session, token: str, payload: schemas.PortalSubmit):
-    pref = db.query(models.MemberPreference).filter(models.MemberPreference.invite_token == token).first()
-    if not pref and token.isdigit():
-        pref = db.query(models.MemberPreference).get(int(token))
-    if not pref:
+def _guest_key(first_name: str | None, last_name: str | None, phone: str | None) -> Tuple[str, str, str]:
+    return (
+        (first_name or "").strip().lower(),
+        (last_name or "").strip().lower(),
+        re.sub(r"\D", "", phone or ""),
+    )
+
+
+def _find_pref(db: Session, token: str) -> models.MemberPreference:
+    prefs = db.query(models.MemberPreference).filter(_token_filter(token)).all()
+    if not prefs:
         raise HTTPException(status_code=404, detail="Invite not found")
+    return next((p for p in prefs if p.invite_token == token), prefs[0])
+
+
+def _validate_guests(payload: schemas.PortalSubmit) -> List[str]:
+    genders: List[str] = []
+    for g in (payload.guests or []):
+        gender = (getattr(g, "gender", None) or "").strip().lower()
+        if gender not in ("male", "female"):
+            raise HTTPException(status_code=400, detail="Guest gender must be 'male' or 'female'")
+        genders.append(gender)
+    return genders
+
+
+def _apply_submission(db: Session, pref: models.MemberPreference, payload: schemas.PortalSubmit) -> None:
+    """Apply a portal submission to ``pref`` and its group without committing.
+
+    Guests are diffed against the ones already in the group by identity (name +
+    phone): matched guests keep their ids, tokens and seats and only changed fields
+    are updated, guests no longer listed are deleted, and new ones are
+    inserted in one batch with fresh tokens and no seat. An unmatched guest is never
+    written into another guest's rows, so a removed guest's link cannot reach them.
+    """
+    genders = _validate_guests(payload)
 
     base_group_code = getattr(pref, "group_code", None)
     if not base_group_code:
@@ -95,38 +207,185 @@ def portal_submit(db: Session, token: str, payload: schemas.PortalSubmit):
     pref.wants_aisle = int(getattr(payload, "wants_aisle", 0) or 0)
     pref.needs_accessible = int(getattr(payload, "needs_accessible", 0) or 0)
 
-    db.query(models.MemberPreference).filter(
-        models.MemberPreference.event_id == pref.event_id,
-        models.MemberPreference.group_code == base_group_code,
-        models.MemberPreference.id != pref.id,
-    ).delete(synchronize_session=False)
+    existing = (
+        db.query(models.MemberPreference, models.Member)
+        .join(models.Member, models.Member.id == models.MemberPreference.member_id)
+        .filter(
+            models.MemberPreference.event_id == pref.event_id,
+            models.MemberPreference.group_code == base_group_code,
+            models.MemberPreference.id != pref.id,
+        )
+        .order_by(models.MemberPreference.id.asc())
+        .all()
+    )
+    by_key: Dict[Tuple[str, str, str], List[Tuple[Any, Any]]] = {}
+    for gp, gm in existing:
+        by_key.setdefault(_guest_key(gm.first_name, gm.last_name, gm.phone), []).append((gp, gm))
 
-    for g in (payload.guests or []):
-        gender = (getattr(g, "gender", None) or "").strip().lower()
-        if gender not in ("male", "female"):
-            raise HTTPException(status_code=400, detail="Guest gender must be 'male' or 'female'")
+    submitted = []
+    for g, gender in zip(payload.guests or [], genders):
+        member_values = {
+            "first_name": g.first_name,
+            "last_name": getattr(g, "last_name", None),
+            "phone": getattr(g, "phone", None),
+            "gender": gender,
+        }
+        pref_values = {
+            "preferred_zone": getattr(g, "preferred_zone", None),
+            "preferred_seat_code": None,
+            "wants_aisle": int(getattr(g, "wants_aisle", 0) or 0),
+            "needs_accessible": int(getattr(g, "needs_accessible", 0) or 0),
+        }
+        submitted.append((member_values, pref_values))
+
+    matched: List[Tuple[Tuple[Any, Any], Tuple[dict, dict]]] = []
+    new_guests: List[Tuple[dict, dict]] = []
+    for member_values, pref_values in submitted:
+        candidates = by_key.get(_guest_key(member_values["first_name"], member_values["last_name"], member_values["phone"]))
+        if candidates:
+            matched.append((candidates.pop(0), (member_values, pref_values)))
+        else:
+            new_guests.append((member_values, pref_values))
+    removed = [pair for pairs in by_key.values() for pair in pairs]
+
+    member_updates: List[Dict[str, Any]] = []
+    pref_updates: List[Dict[str, Any]] = []
+    for (gp, gm), (member_values, pref_values) in matched:
+        if any(getattr(gm, k) != v for k, v in member_values.items()):
+            member_updates.append({"id": gm.id, **member_values})
+        if any(getattr(gp, k) != v for k, v in pref_values.items()):
+            pref_updates.append({"id": gp.id, **pref_values})
 
-        mem = models.Member(
-            first_name=g.first_name,
-            last_name=getattr(g, "last_name", None),
-            phone=getattr(g, "phone", None),
-            gender=gender,
-            birth_date=getattr(g, "birth_date", None),
+    if member_updates:
+        db.execute(update(models.Member), member_updates)
+    if pref_updates:
+        db.execute(update(models.MemberPreference), pref_updates)
+    if removed:
+        db.query(models.MemberPreference).filter(
+            models.MemberPreference.id.in_([int(gp.id) for gp, _ in removed])
+        ).delete(synchronize_session=False)
+
+    if new_guests:
+        member_ids = bulk.insert_members(
+            db, [{**member_values, "birth_date": None} for member_values, _ in new_guests]
         )
-        db.add(mem)
-        db.flush()
-
-        gp = models.MemberPreference(
-            event_id=pref.event_id,
-            member_id=mem.id,
-            preferred_zone=getattr(g, "preferred_zone", None),
-            preferred_seat_code=None,
-            wants_aisle=int(getattr(g, "wants_aisle", 0) or 0),
-            needs_accessible=int(getattr(g, "needs_accessible", 0) or 0),
-            group_code=base_group_code,
-            invite_token=str(uuid4()),
+        bulk.insert_preferences(
+            db,
+            [
+                {
+                    "event_id": pref.event_id,
+                    "member_id": mid,
+                    "group_code": base_group_code,
+                    "invite_token": str(uuid4()),
+                    **pref_values,
+                }
+                for mid, (_, pref_values) in zip(member_ids, new_guests)
+            ],
         )
-        db.add(gp)
 
+
+def portal_submit(db: Session, token: str, payload: schemas.PortalSubmit):
+    pref = _find_pref(db, token)
+
+    if settings.PORTAL_WRITE_BEHIND:
+        _validate_guests(payload)
+        portal_queue.get_queue().enqueue(token, payload)
+        return {"ok": True, "queued": True}
+
+    event_id = int(pref.event_id)
+    _apply_submission(db, pref, payload)
     db.commit()
-    return {"ok": True}
\ No newline at end of file
+    cache.invalidate(cache.event_tag(event_id))
+    return {"ok": True}
+
+
+# ---- write-behind writer ----
+def _apply_queued(db: Session, token: str, payload: str) -> Optional[int]:
+    """Apply one queued submission; returns its event id (None if the invite is gone)."""
+    try:
+        pref = _find_pref(db, token)
+    except HTTPException:
+        return None  # invite deleted since it was queued
+    _apply_submission(db, pref, schemas.PortalSubmit.model_validate_json(payload))
+    return int(pref.event_id)
+
+
+# A submission that fails with one of these will fail the same way on every retry,
+# so it is dropped. Anything else (a lost connection, a lock timeout, ...) is left
+# in the queue for the next drain.
+_PERMANENT_ERRORS = (HTTPException, ValidationError, IntegrityError, DataError)
+
+
+def _apply_queued_batch(items: List[Tuple[int, str, str]]) -> List[int]:
+    """Apply queued submissions; returns the ids of the items that can be acked.
+
+    That is the items that were applied (or superseded by a later submission for the
+    same token that was) and those that failed permanently. Items that hit a
+    transient error are not returned, so they stay queued.
+    """
+    # Later submissions for a token supersede earlier ones in the same batch.
+    latest: Dict[str, str] = {}
+    item_ids: Dict[str, List[int]] = {}
+    for item_id, token, payload in items:
+        latest[token] = payload
+        item_ids.setdefault(token, []).append(item_id)
+
+    db = SessionLocal()
+    event_ids = set()
+    done: List[str] = []
+    try:
+        try:
+            batch_event_ids = {_apply_queued(db, token, payload) for token, payload in latest.items()}
+            db.commit()
+            event_ids |= batch_event_ids
+            done.extend(latest)
+        except Exception:
+            # Isolate the bad submission(s): retry with one transaction per token.
+            db.rollback()
+            logger.exception("portal write-behind batch failed; retrying one by one")
+            for token, payload in latest.items():
+                try:
+                    event_id = _apply_queued(db, token, payload)
+                    db.commit()
+                    event_ids.add(event_id)
+                    done.append(token)
+                except _PERMANENT_ERRORS:
+                    db.rollback()
+                    logger.exception("dropping queued portal submission for token %s", token)
+                    done.append(token)
+                except Exception:
+                    db.rollback()
+                    logger.exception("queued portal submission for token %s failed; keeping it for retry", token)
+    finally:
+        db.close()
+        event_ids.discard(None)
+        cache.invalidate(*(cache.event_tag(eid) for eid in event_ids))
+    return [item_id for token in done for item_id in item_ids[token]]
+
+
+def drain_write_behind_queue() -> int:
+    """Drain one batch; returns the number of submissions acked."""
+    queue = portal_queue.get_queue()
+    if not queue.acquire_lease():
+        return 0
+    items = queue.peek(settings.PORTAL_QUEUE_BATCH)
+    if not items:
+        return 0
+    acked = _apply_queued_batch(items)
+    queue.ack(acked)
+    return len(acked)
+
+
+def start_write_behind_writer() -> threading.Thread:
+    def run() -> None:
+        while True:
+            try:
+                if drain_write_behind_queue():
+                    continue
+            except Exception:
+                logger.exception("portal write-behind drain failed")
+            time.sleep(settings.PORTAL_QUEUE_POLL_SECONDS)
+
+    t = threading.Thread(target=run, name="portal-write-behind", daemon=True)
+    t.start()
+    return t
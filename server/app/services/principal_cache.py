@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from app import models
+from app.db import SessionLocal
+from app.settings import settings
+
+
+@dataclass(frozen=True)
+class CurrentUser:
+    id: int
+    org_id: int
+    email: str
+    token_version: int = 0
+
+
+# (user_id, org_id) -> (expires_at, principal). Bounded LRU with a short TTL, so a
+# verified token usually needs no database round trip. Entries are dropped when
+# the user's token_version is bumped (logout, password change) in this process;
+# other workers still accept the old token until their entry expires, so
+# AUTH_CACHE_TTL_SECONDS bounds how long a revoked token stays usable.
+_principal_cache: "OrderedDict[Tuple[int, int], Tuple[float, CurrentUser]]" = OrderedDict()
+_principal_lock = threading.Lock()
+
+
+def get_principal(key: Tuple[int, int]) -> Optional[CurrentUser]:
+    now = time.monotonic()
+    with _principal_lock:
+        hit = _principal_cache.get(key)
+        if not hit:
+            return None
+        if hit[0] <= now:
+            del _principal_cache[key]
+            return None
+        _principal_cache.move_to_end(key)
+        return hit[1]
+
+
+def store_principal(key: Tuple[int, int], principal: CurrentUser) -> None:
+    with _principal_lock:
+        _principal_cache[key] = (time.monotonic() + settings.AUTH_CACHE_TTL_SECONDS, principal)
+        _principal_cache.move_to_end(key)
+        while len(_principal_cache) > settings.AUTH_CACHE_MAX_ENTRIES:
+            _principal_cache.popitem(last=False)
+
+
+def invalidate_user(user_id: int) -> None:
+    with _principal_lock:
+        for key in [k for k in _principal_cache if k[0] == int(user_id)]:
+            del _principal_cache[key]
+
+
+def load_principal(user_id: int, org_id: int) -> Optional[CurrentUser]:
+    db = SessionLocal()
+    try:
+        user = (
+            db.query(models.User)
+            .filter(models.User.id == user_id, models.User.org_id == org_id)
+            .first()
+        )
+        if not user:
+            return None
+        return CurrentUser(
+            id=int(user.id),
+            org_id=int(user.org_id),
+            email=user.email,
+            token_version=int(user.token_version or 0),
+        )
+    finally:
+        db.close()
@@ -3,7 +3,8 @@ from fastapi import HTTPException
 from sqlalchemy.orm import Session
 from sqlalchemy import func, distinct, case
 
-from app import models, schemas
+from app import cache, models, schemas
+from app.services import bulk
 
 
 def _row_label(n: int) -> str:
@@ -14,7 +15,11 @@ def _row_label(n: int) -> str:
     return s
 
 
-def list_venues(db: Session):
+def list_venues(db: Session, org_id: int):
+    return cache.cached(f"venues:{org_id}", (cache.org_venues_tag(org_id),), lambda: _list_venues(db, org_id))
+
+
+def _list_venues(db: Session, org_id: int):
     rows = (
         db.query(
             models.Venue,
@@ -24,6 +29,7 @@ def list_venues(db: Session):
         )
         .outerjoin(models.Seat, models.Seat.venue_id == models.Venue.id)
         .outerjoin(models.Event, models.Event.venue_id == models.Venue.id)
+        .filter(models.Venue.org_id == org_id)
         .group_by(models.Venue.id)
         .all()
     )
@@ -42,10 +48,27 @@ def list_venues(db: Session):
     ]
 
 
-def venue_seatmap(db: Session, venue_id: int):
-    venue = db.query(models.Venue).filter(models.Venue.id == venue_id).first()
+def _get_org_venue(db: Session, org_id: int, venue_id: int) -> models.Venue:
+    venue = (
+        db.query(models.Venue)
+        .filter(models.Venue.id == venue_id, models.Venue.org_id == org_id)
+        .first()
+    )
     if not venue:
         raise HTTPException(status_code=404, detail="Venue not found")
+    return venue
+
+
+def venue_seatmap(db: Session, org_id: int, venue_id: int):
+    return cache.cached(
+        f"venue_seatmap:{org_id}:{venue_id}",
+        (cache.venue_tag(venue_id),),
+        lambda: _venue_seatmap(db, org_id, venue_id),
+    )
+
+
+def _venue_seatmap(db: Session, org_id: int, venue_id: int):
+    _get_org_venue(db, org_id, venue_id)
 
     seats = db.query(models.Seat).filter(models.Seat.venue_id == venue_id).all()
 
@@ -67,14 +90,15 @@ def venue_seatmap(db: Session, venue_id: int):
     ]
 
 
-def create_venue(db: Session, payload: schemas.VenueCreate):
-    q = db.query(models.Venue).filter(models.Venue.name == payload.name)
+def create_venue(db: Session, org_id: int, payload: schemas.VenueCreate):
+    q = db.query(models.Venue).filter(models.Venue.org_id == org_id, models.Venue.name == payload.name)
     if payload.location:
         q = q.filter(models.Venue.location == payload.location)
     if q.first():
         raise HTTPException(status_code=409, detail="Venue already exists")
 
     v = models.Venue(
+        org_id=org_id,
         name=payload.name,
         location=payload.location,
         status=payload.status,
@@ -83,13 +107,12 @@ def create_venue(db: Session, payload: schemas.VenueCreate):
     db.add(v)
     db.commit()
     db.refresh(v)
+    cache.invalidate(cache.org_venues_tag(org_id))
     return v
 
 
-def generate_venue_seats(db: Session, venue_id: int, payload: schemas.GenerateSeatsPayload):
-    venue = db.query(models.Venue).filter(models.Venue.id == venue_id).first()
-    if not venue:
-        raise HTTPException(status_code=404, detail="Venue not found")
+def generate_venue_seats(db: Session, org_id: int, venue_id: int, payload: schemas.GenerateSeatsPayload):
+    _get_org_venue(db, org_id, venue_id)
 
     STEP_X = 10
     STEP_Y = 10
@@ -135,7 +158,7 @@ def generate_venue_seats(db: Session, venue_id: int, payload: schemas.GenerateSe
                 )) else 0
 
                 seats_to_create.append(
-                    models.Seat(
+                    dict(
                         venue_id=venue_id,
                         code=code,
                         zone=z.zone,
@@ -155,12 +178,26 @@ def generate_venue_seats(db: Session, venue_id: int, payload: schemas.GenerateSe
         else:
             zone_offset_x += zone_width + ZONE_GAP
 
-    db.add_all(seats_to_create)
+    bulk.insert_seats(db, seats_to_create)
     db.commit()
+    event_ids = [eid for (eid,) in db.query(models.Event.id).filter(models.Event.venue_id == venue_id).all()]
+    cache.invalidate(
+        cache.venue_tag(venue_id),
+        cache.org_venues_tag(org_id),
+        *(cache.event_tag(eid) for eid in event_ids),
+    )
     return {"ok": True, "venue_id": venue_id, "created": len(seats_to_create)}
 
 
-def venue_sections(db: Session, venue_id: int):
+def venue_sections(db: Session, org_id: int, venue_id: int):
+    return cache.cached(
+        f"venue_sections:{org_id}:{venue_id}",
+        (cache.venue_tag(venue_id),),
+        lambda: _venue_sections(db, org_id, venue_id),
+    )
+
+
+def _venue_sections(db: Session, org_id: int, venue_id: int):
     rows = (
         db.query(
             models.Seat.zone.label("zone"),
@@ -169,7 +206,8 @@ def venue_sections(db: Session, venue_id: int):
             func.sum(case((models.Seat.is_blocked == 1, 1), else_=0)).label("blocked_count"),
             func.count(distinct(models.Seat.row_label)).label("rows_count"),
         )
-        .filter(models.Seat.venue_id == venue_id)
+        .join(models.Venue, models.Venue.id == models.Seat.venue_id)
+        .filter(models.Seat.venue_id == venue_id, models.Venue.org_id == org_id)
         .group_by(models.Seat.zone)
         .all()
     )
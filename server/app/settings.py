@@ -1,9 +1,89 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
     DATABASE_URL: str
+    # optional async driver URL for read endpoints, e.g. mysql+aiomysql://...
+    ASYNC_DATABASE_URL: str = ""
+
+    # optional read replica for read-only endpoints (see app/replica.py)
+    READ_DATABASE_URL: str = ""
+    READ_ASYNC_DATABASE_URL: str = ""
+    REPLICA_MAX_LAG_SECONDS: float = 5.0  # 0 = never check lag
+    REPLICA_LAG_CHECK_SECONDS: float = 5.0
+    REPLICA_LAG_QUERY: str = ""  # SQL returning lag in seconds; default SHOW REPLICA STATUS on MySQL
+    READ_YOUR_WRITES_SECONDS: float = 5.0
+
+    # connection pool, per engine and per process
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800  # seconds; -1 keeps connections forever
+    # "always" pings on every checkout, "idle" only after DB_PRE_PING_IDLE_SECONDS unused, "never"
+    DB_PRE_PING: Literal["always", "idle", "never"] = "idle"
+    DB_PRE_PING_IDLE_SECONDS: int = 30
+
+    # /internal/* requires X-Internal-Token == INTERNAL_TOKEN (unset = closed). Loopback
+    # clients can be let in without it, but only when no proxy on the same host
+    # forwards outside traffic (never together with TRUST_FORWARDED_FOR).
+    INTERNAL_TOKEN: str = ""
+    INTERNAL_TRUST_LOOPBACK: bool = False
+
+    # per-request SQL/serialization metrics, served at /internal/metrics
+    PERF_METRICS: bool = True
+    PERF_N_PLUS_ONE_THRESHOLD: int = 5  # same statement shape this often in one request is logged; 0 = off
     JWT_SECRET: str
 
+    IMPORT_STAGING_DIR: str = "var/imports"
+    IMPORT_JOB_STALE_SECONDS: int = 120
+    IMPORT_JOB_MAX_ATTEMPTS: int = 3  # a job still unfinished after this many claims is marked failed
+    IMPORT_JOB_WORKERS: int = 2  # import jobs run concurrently per process
+    IMPORT_VALIDATION_WORKERS: int = 0
+    IMPORT_VALIDATION_CHUNK_ROWS: int = 5000
+
+    # per-event assignment run lock (assignment_runs): a run older than this may be taken over,
+    # and a duplicate request waits this long for the run in progress
+    ASSIGNMENT_RUN_STALE_SECONDS: int = 600
+    ASSIGNMENT_RUN_WAIT_SECONDS: float = 120.0
+
+    # response cache for hot reads (see app/cache.py): "sqlite" is one file shared by
+    # every worker on the host, "memory" is per process (single worker only)
+    RESPONSE_CACHE_BACKEND: Literal["none", "memory", "sqlite"] = "sqlite"
+    RESPONSE_CACHE_TTL_SECONDS: int = 30  # 0 = off
+    RESPONSE_CACHE_PATH: str = "var/response_cache.sqlite3"
+    RESPONSE_CACHE_MAX_ENTRIES: int = 10000  # memory backend only
+
+    # preload portal contexts for open events in the background after startup
+    WARM_CACHES_ON_STARTUP: bool = False
+    PORTAL_WRITE_BEHIND: bool = False
+    PORTAL_QUEUE_PATH: str = "var/portal_queue.sqlite3"
+    PORTAL_QUEUE_BATCH: int = 200
+    PORTAL_QUEUE_POLL_SECONDS: float = 0.5
+
+    # admission control (0 = unlimited)
+    PORTAL_MAX_CONCURRENCY: int = 16
+    ADMIN_MAX_CONCURRENCY: int = 0
+    PORTAL_IP_RATE: float = 10.0
+    PORTAL_IP_BURST: int = 40
+    PORTAL_TOKEN_RATE: float = 1.0
+    PORTAL_TOKEN_BURST: int = 10
+    TRUST_FORWARDED_FOR: bool = False
+    TRUSTED_PROXY_HOPS: int = 1  # proxies in front of the app that append to X-Forwarded-For
+
+    # verified principals are cached per worker; a logout or password change only clears
+    # the entry on the worker that handled it, so other workers keep accepting the
+    # revoked token for up to this long. Keep it far below ACCESS_TOKEN_MINUTES.
+    AUTH_CACHE_TTL_SECONDS: int = 10
+    AUTH_CACHE_MAX_ENTRIES: int = 10000
+
+    # bcrypt process pool (0 workers = run on the threadpool, still bounded)
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 32
+
+    SESSION_PURGE_INTERVAL_SECONDS: int = 600
+    SESSION_PURGE_BATCH: int = 5000
+
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
 settings = Settings()
@@ -0,0 +1,179 @@
+"""baseline: schema of the original seatflow.sql dump
+
+Databases restored from that dump already have all of this; run
+`alembic stamp 0001` on them once, then `alembic upgrade head`.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+revision: str = "0001"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Kept local on purpose: migrations must not change when app.models does.
+ID_FK = sa.BigInteger().with_variant(mysql.BIGINT(unsigned=True), "mysql")
+ID = ID_FK.with_variant(sa.Integer(), "sqlite")
+FLAG = sa.Boolean().with_variant(mysql.TINYINT(1), "mysql")
+INT_FLAG = sa.Integer().with_variant(mysql.TINYINT(1), "mysql")  # seats flags are read as 0/1 ints
+NOW = sa.text("CURRENT_TIMESTAMP")
+TABLE_OPTS = {"mysql_engine": "InnoDB", "mysql_charset": "utf8mb4", "mysql_collate": "utf8mb4_0900_ai_ci"}
+
+
+def _updated_at_default():
+    if op.get_bind().dialect.name == "mysql":
+        return sa.text("CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP")
+    return NOW
+
+
+def upgrade() -> None:
+    op.create_table(
+        "organizations",
+        sa.Column("id", ID, primary_key=True, autoincrement=True),
+        sa.Column("name", sa.String(255), nullable=False),
+        sa.Column("created_at", sa.TIMESTAMP(), nullable=False, server_default=NOW),
+        sa.UniqueConstraint("name", name="uq_org_name"),
+        **TABLE_OPTS,
+    )
+    op.create_table(
+        "users",
+        sa.Column("id", ID, primary_key=True, autoincrement=True),
+        sa.Column("org_id", ID_FK, nullable=False),
+        sa.Column("email", sa.String(255), nullable=False),
+        sa.Column("password_hash", sa.String(255), nullable=False),
+        sa.Column("created_at", sa.TIMESTAMP(), nullable=False, server_default=NOW),
+        sa.Column("refresh_token_hash", sa.String(255), nullable=True),
+        sa.Column("refresh_token_expires_at", sa.DateTime(), nullable=True),
+        sa.UniqueConstraint("org_id", "email", name="uq_user_email_per_org"),
+        sa.ForeignKeyConstraint(
+            ["org_id"], ["organizations.id"], name="fk_users_org", ondelete="RESTRICT", onupdate="CASCADE"
+        ),
+        **TABLE_OPTS,
+    )
+    op.create_index("idx_users_org", "users", ["org_id"])
+
+    op.create_table(
+        "venues",
+        sa.Column("id", ID, primary_key=True, autoincrement=True),
+        sa.Column("name", sa.String(255), nullable=False),
+        sa.Column("created_at", sa.TIMESTAMP(), nullable=False, server_default=NOW),
+        sa.Column("location", sa.String(255), nullable=True),
+        sa.Column(
+            "status", sa.Enum("active", "inactive", name="venue_status"), nullable=False, server_default="active"
+        ),
+        sa.Column(
+            "category",
+            sa.Enum(
+                "Convention", "Stadium", "Theater", "Synagogue", "EventHall", "Airplane", "Other",
+                name="venue_category",
+            ),
+            nullable=False,
+            server_default="Other",
+        ),
+        **TABLE_OPTS,
+    )
+    op.create_table(
+        "seats",
+        sa.Column("id", ID, primary_key=True, autoincrement=True),
+        sa.Column("venue_id", ID_FK, nullable=False),
+        sa.Column("code", sa.String(50), nullable=False),
+        sa.Column("zone", sa.String(100), nullable=True),
+        sa.Column("row_label", sa.String(50), nullable=True),
+        sa.Column("seat_number", sa.String(50), nullable=True),
+        sa.Column("is_accessible", INT_FLAG, nullable=False, server_default=sa.text("0")),
+        sa.Column("is_blocked", INT_FLAG, nullable=False, server_default=sa.text("0")),
+        sa.Column("x", sa.Integer(), nullable=True),
+        sa.Column("y", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.TIMESTAMP(), nullable=False, server_default=NOW),
+        sa.Column("is_aisle", INT_FLAG, nullable=False, server_default=sa.text("0")),
+        sa.UniqueConstraint("venue_id", "code", name="uq_seat_code_per_venue"),
+        sa.ForeignKeyConstraint(
+            ["venue_id"], ["venues.id"], name="fk_seats_venue", ondelete="CASCADE", onupdate="CASCADE"
+        ),
+        **TABLE_OPTS,
+    )
+    op.create_index("idx_seats_venue", "seats", ["venue_id"])
+    op.create_index("idx_seats_accessible", "seats", ["venue_id", "is_accessible"])
+
+    op.create_table(
+        "events",
+        sa.Column("id", ID, primary_key=True, autoincrement=True),
+        sa.Column("venue_id", ID_FK, nullable=False),
+        sa.Column("name", sa.String(255), nullable=False),
+        sa.Column("event_date", sa.DateTime(), nullable=True),
+        sa.Column(
+            "status",
+            sa.Enum("draft", "preferences_open", "locked", "published", name="event_status"),
+            nullable=False,
+            server_default="draft",
+        ),
+        sa.Column("created_at", sa.TIMESTAMP(), nullable=False, server_default=NOW),
+        sa.ForeignKeyConstraint(
+            ["venue_id"], ["venues.id"], name="fk_events_venue", ondelete="RESTRICT", onupdate="CASCADE"
+        ),
+        **TABLE_OPTS,
+    )
+    op.create_index("idx_events_venue", "events", ["venue_id"])
+    op.create_index("idx_events_date", "events", ["event_date"])
+
+    op.create_table(
+        "members",
+        sa.Column("id", ID, primary_key=True, autoincrement=True),
+        sa.Column("first_name", sa.String(100), nullable=False),
+        sa.Column("last_name", sa.String(100), nullable=False),
+        sa.Column("phone", sa.String(30), nullable=True),
+        sa.Column("gender", sa.Enum("male", "female", name="gender_enum"), nullable=False),
+        sa.Column("birth_date", sa.Date(), nullable=True),
+        sa.Column("needs_accessible", FLAG, nullable=False, server_default=sa.text("0")),
+        sa.Column("created_at", sa.TIMESTAMP(), nullable=False, server_default=NOW),
+        **TABLE_OPTS,
+    )
+    op.create_index("idx_members_name", "members", ["last_name", "first_name"])
+
+    op.create_table(
+        "member_preferences",
+        sa.Column("id", ID, primary_key=True, autoincrement=True),
+        sa.Column("event_id", ID_FK, nullable=False),
+        sa.Column("member_id", ID_FK, nullable=False),
+        sa.Column("group_code", sa.String(100), nullable=True),
+        sa.Column("wants_aisle", FLAG, nullable=False, server_default=sa.text("0")),
+        sa.Column("preferred_zone", sa.String(100), nullable=True),
+        sa.Column("preferred_seat_code", sa.String(50), nullable=True),
+        sa.Column("needs_accessible", FLAG, nullable=False, server_default=sa.text("0")),
+        sa.Column("invite_token", sa.CHAR(36), nullable=False),
+        sa.Column("submitted_at", sa.DateTime(), nullable=True),
+        sa.Column("created_at", sa.TIMESTAMP(), nullable=False, server_default=NOW),
+        sa.Column("updated_at", sa.TIMESTAMP(), nullable=False, server_default=_updated_at_default()),
+        sa.Column("assigned_seat_id", ID_FK, nullable=True),
+        sa.UniqueConstraint("event_id", "member_id", name="uq_event_member"),
+        sa.UniqueConstraint("invite_token", name="uq_invite_token"),
+        sa.UniqueConstraint("event_id", "assigned_seat_id", name="uq_event_assigned_seat"),
+        sa.ForeignKeyConstraint(
+            ["assigned_seat_id"], ["seats.id"], name="fk_member_prefs_assigned_seat",
+            ondelete="SET NULL", onupdate="CASCADE",
+        ),
+        sa.ForeignKeyConstraint(
+            ["event_id"], ["events.id"], name="fk_prefs_event", ondelete="CASCADE", onupdate="CASCADE"
+        ),
+        sa.ForeignKeyConstraint(
+            ["member_id"], ["members.id"], name="fk_prefs_member", ondelete="CASCADE", onupdate="CASCADE"
+        ),
+        **TABLE_OPTS,
+    )
+    op.create_index("idx_prefs_event", "member_preferences", ["event_id"])
+    op.create_index("idx_prefs_member", "member_preferences", ["member_id"])
+    if op.get_bind().dialect.name != "mysql":
+        # InnoDB already created this one, named after the foreign key
+        op.create_index("fk_member_prefs_assigned_seat", "member_preferences", ["assigned_seat_id"])
+
+
+def downgrade() -> None:
+    for table in ("member_preferences", "members", "events", "seats", "venues", "users", "organizations"):
+        op.drop_table(table)
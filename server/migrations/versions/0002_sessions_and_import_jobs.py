@@ -0,0 +1,89 @@
+"""user sessions, token versions and import jobs
+
+Tables that older builds created through create_all() at startup are only
+created here when missing, so this also applies cleanly to those databases.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ID_FK = sa.BigInteger().with_variant(mysql.BIGINT(unsigned=True), "mysql")
+ID = ID_FK.with_variant(sa.Integer(), "sqlite")
+NOW = sa.text("CURRENT_TIMESTAMP")
+TABLE_OPTS = {"mysql_engine": "InnoDB", "mysql_charset": "utf8mb4", "mysql_collate": "utf8mb4_0900_ai_ci"}
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    tables = set(inspector.get_table_names())
+    user_columns = {c["name"] for c in inspector.get_columns("users")}
+
+    with op.batch_alter_table("users") as batch:
+        if "token_version" not in user_columns:
+            batch.add_column(sa.Column("token_version", sa.Integer(), nullable=False, server_default=sa.text("0")))
+        for name in ("refresh_token_hash", "refresh_token_expires_at"):
+            if name in user_columns:
+                batch.drop_column(name)
+
+    if "user_sessions" not in tables:
+        op.create_table(
+            "user_sessions",
+            sa.Column("id", ID, primary_key=True, autoincrement=True),
+            sa.Column("user_id", ID_FK, nullable=False),
+            sa.Column("token_hash", sa.CHAR(64), nullable=False),
+            sa.Column("expires_at", sa.DateTime(), nullable=False),
+            sa.Column("created_at", sa.TIMESTAMP(), nullable=False, server_default=NOW),
+            sa.Column("rotated_at", sa.DateTime(), nullable=True),
+            sa.UniqueConstraint("token_hash", name="uq_user_sessions_token"),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"], name="fk_user_sessions_user", ondelete="CASCADE"),
+            **TABLE_OPTS,
+        )
+        op.create_index("idx_user_sessions_user", "user_sessions", ["user_id"])
+        op.create_index("idx_user_sessions_expires", "user_sessions", ["expires_at"])
+
+    if "import_jobs" not in tables:
+        op.create_table(
+            "import_jobs",
+            sa.Column("id", sa.String(36), primary_key=True),
+            sa.Column("event_id", ID_FK, nullable=False),
+            sa.Column("status", sa.String(20), nullable=False),
+            sa.Column("upsert", sa.Boolean(), nullable=False, server_default=sa.text("0")),
+            sa.Column("file_path", sa.String(500), nullable=False),
+            sa.Column("rows_processed", sa.Integer(), nullable=False),
+            sa.Column("created_members", sa.Integer(), nullable=False),
+            sa.Column("updated_members", sa.Integer(), nullable=False),
+            sa.Column("unchanged_members", sa.Integer(), nullable=False),
+            sa.Column("preferences_created", sa.Integer(), nullable=False),
+            sa.Column("preferences_updated", sa.Integer(), nullable=False),
+            sa.Column("error_count", sa.Integer(), nullable=False),
+            sa.Column("errors", sa.Text(), nullable=True),
+            sa.Column("message", sa.Text(), nullable=True),
+            sa.Column("worker_id", sa.String(64), nullable=True),
+            sa.Column("heartbeat_at", sa.DateTime(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=False, server_default=NOW),
+            sa.Column("finished_at", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["event_id"], ["events.id"], name="fk_import_jobs_event", ondelete="CASCADE"),
+            **TABLE_OPTS,
+        )
+        op.create_index("idx_import_jobs_event", "import_jobs", ["event_id"])
+        op.create_index("idx_import_jobs_status", "import_jobs", ["status"])
+
+
+def downgrade() -> None:
+    op.drop_table("import_jobs")
+    op.drop_table("user_sessions")
+    with op.batch_alter_table("users") as batch:
+        batch.drop_column("token_version")
+        batch.add_column(sa.Column("refresh_token_hash", sa.String(255), nullable=True))
+        batch.add_column(sa.Column("refresh_token_expires_at", sa.DateTime(), nullable=True))
@@ -0,0 +1,70 @@
+"""org_id on venues and events, with indexes leading with it
+
+Single-tenant assumption: every existing venue is given to the oldest
+organization (the seatflow.sql dump has exactly one), and events take their
+venue's org_id. A database with venues but no organization gets a
+"Default Center" organization first, so the backfill never writes NULL.
+Databases that already hold several tenants' venues need their org_id
+reassigned by hand after upgrading.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+revision: str = "0003"
+down_revision: Union[str, Sequence[str], None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ID_FK = sa.BigInteger().with_variant(mysql.BIGINT(unsigned=True), "mysql")
+
+
+def upgrade() -> None:
+    for table in ("venues", "events"):
+        with op.batch_alter_table(table) as batch:
+            batch.add_column(sa.Column("org_id", ID_FK, nullable=True))
+
+    conn = op.get_bind()
+    has_venues = conn.execute(sa.text("SELECT 1 FROM venues LIMIT 1")).first() is not None
+    has_orgs = conn.execute(sa.text("SELECT 1 FROM organizations LIMIT 1")).first() is not None
+    if has_venues and not has_orgs:
+        op.execute("INSERT INTO organizations (name) VALUES ('Default Center')")
+    op.execute("UPDATE venues SET org_id = (SELECT MIN(id) FROM organizations)")
+    op.execute("UPDATE events SET org_id = (SELECT v.org_id FROM venues v WHERE v.id = events.venue_id)")
+
+    # indexes before foreign keys, so MySQL uses them instead of adding its own
+    with op.batch_alter_table("venues") as batch:
+        batch.alter_column("org_id", existing_type=ID_FK, nullable=False)
+        batch.create_index("idx_venues_org_name", ["org_id", "name"])
+        batch.create_foreign_key(
+            "fk_venues_org", "organizations", ["org_id"], ["id"], ondelete="RESTRICT", onupdate="CASCADE"
+        )
+
+    with op.batch_alter_table("events") as batch:
+        batch.alter_column("org_id", existing_type=ID_FK, nullable=False)
+        batch.drop_index("idx_events_date")
+        batch.create_index("idx_events_org_date", ["org_id", "event_date"])
+        batch.create_index("idx_events_org_venue", ["org_id", "venue_id"])
+        batch.create_foreign_key(
+            "fk_events_org", "organizations", ["org_id"], ["id"], ondelete="RESTRICT", onupdate="CASCADE"
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("events") as batch:
+        batch.drop_constraint("fk_events_org", type_="foreignkey")
+        batch.drop_index("idx_events_org_venue")
+        batch.drop_index("idx_events_org_date")
+        batch.create_index("idx_events_date", ["event_date"])
+        batch.drop_column("org_id")
+
+    with op.batch_alter_table("venues") as batch:
+        batch.drop_constraint("fk_venues_org", type_="foreignkey")
+        batch.drop_index("idx_venues_org_name")
+        batch.drop_column("org_id")
@@ -0,0 +1,40 @@
+"""assignment_runs: per-event run lock and last result
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+revision: str = "0004"
+down_revision: Union[str, Sequence[str], None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ID_FK = sa.BigInteger().with_variant(mysql.BIGINT(unsigned=True), "mysql")
+TABLE_OPTS = {"mysql_engine": "InnoDB", "mysql_charset": "utf8mb4", "mysql_collate": "utf8mb4_0900_ai_ci"}
+
+
+def upgrade() -> None:
+    op.create_table(
+        "assignment_runs",
+        sa.Column("event_id", ID_FK, primary_key=True),
+        sa.Column("run_id", sa.String(36), nullable=False),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("params", sa.Text(), nullable=False),
+        sa.Column("result", sa.Text(), nullable=True),
+        sa.Column("message", sa.Text(), nullable=True),
+        sa.Column("worker_id", sa.String(64), nullable=True),
+        sa.Column("started_at", sa.DateTime(), nullable=False),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["event_id"], ["events.id"], name="fk_assignment_runs_event", ondelete="CASCADE"),
+        **TABLE_OPTS,
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("assignment_runs")
@@ -0,0 +1,68 @@
+"""Minimal in-process HTTP client for driving the ASGI app from benchmark scripts.
+
+Requests go straight into the app (no sockets, no lifespan), so the numbers measure
+the app itself: routing, dependencies, the threadpool and the database.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import Any, Dict, Optional, Tuple
+
+Response = Tuple[int, Dict[str, str], bytes]
+
+
+async def request(
+    app,
+    method: str,
+    path: str,
+    body: Any = None,
+    headers: Optional[Dict[str, str]] = None,
+    client: Tuple[str, int] = ("127.0.0.1", 50000),
+) -> Response:
+    path, _, query = path.partition("?")
+    headers = {k.lower(): v for k, v in (headers or {}).items()}
+    if isinstance(body, bytes):
+        data = body  # sent as is, with the caller's content-type
+    else:
+        data = json.dumps(body).encode() if body is not None else b""
+        headers.setdefault("content-type", "application/json")
+    raw_headers = [(k.encode(), v.encode()) for k, v in headers.items()]
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": raw_headers,
+        "client": client,
+        "server": ("testserver", 80),
+    }
+    sent = False
+    messages = []
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": data, "more_body": False}
+        await asyncio.Event().wait()
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    start = next(m for m in messages if m["type"] == "http.response.start")
+    payload = b"".join(m.get("body", b"") for m in messages if m["type"] == "http.response.body")
+    return start["status"], {k.decode(): v.decode() for k, v in start["headers"]}, payload
+
+
+def percentile(values, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))]
@@ -0,0 +1,156 @@
+"""Sync vs async read-path benchmark.
+
+Seeds a SQLite database, then drives the read endpoints (portal, seatmaps,
+participants, event list) in-process at high concurrency, once with the sync
+engine (threadpool) and once with ASYNC_DATABASE_URL (aiosqlite), and prints
+requests/sec and latency percentiles for each.
+
+    cd server
+    python -m scripts.bench_async --requests 1000 --concurrency 100
+
+Each mode runs in its own interpreter because the engines are built at import.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def _seed(seats: int, members: int) -> dict:
+    from app import models
+    from app.db import Base, SessionLocal, engine
+    from app.security import hash_password
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    org = models.Organization(name="bench")
+    db.add(org)
+    db.flush()
+    db.add(models.User(org_id=org.id, email="bench@example.com", password_hash=hash_password("bench-password")))
+    venue = models.Venue(org_id=org.id, name="Bench Hall", status="active", category="Other")
+    db.add(venue)
+    db.flush()
+    db.add_all(
+        models.Seat(venue_id=venue.id, code=f"S-{i}", zone="ABCD"[i % 4], row_label=str(i // 20), seat_number=str(i % 20))
+        for i in range(seats)
+    )
+    ev = models.Event(org_id=org.id, venue_id=venue.id, name="Bench Night", status="preferences_open")
+    db.add(ev)
+    db.flush()
+    mems = [models.Member(first_name=f"F{i}", last_name=f"L{i}", gender="male") for i in range(members)]
+    db.add_all(mems)
+    db.flush()
+    db.add_all(
+        models.MemberPreference(event_id=ev.id, member_id=m.id, invite_token=f"tok{i}")
+        for i, m in enumerate(mems)
+    )
+    db.commit()
+    out = {"org_id": org.id, "venue_id": venue.id, "event_id": ev.id}
+    db.close()
+    return out
+
+
+def _run_mode(args) -> None:
+    from app.db import async_engine
+    from app.main import app
+    from scripts.asgi_client import percentile, request
+
+    ids = json.loads(args.ids)
+
+    async def run():
+        status, _, body = await request(
+            app, "POST", "/auth/login",
+            {"org_id": ids["org_id"], "email": "bench@example.com", "password": "bench-password"},
+        )
+        headers = {"authorization": "Bearer " + json.loads(body)["access_token"]}
+        paths = [
+            (f"/portal/tok{{i}}", None),
+            (f"/events/{ids['event_id']}/seatmap", headers),
+            (f"/events/{ids['event_id']}/participants", headers),
+            (f"/venues/{ids['venue_id']}/seatmap", headers),
+            ("/events", headers),
+        ]
+        gate = asyncio.Semaphore(args.concurrency)
+        latencies, errors = [], 0
+
+        async def one(n: int):
+            nonlocal errors
+            path, hdrs = paths[n % len(paths)]
+            async with gate:
+                t0 = time.perf_counter()
+                try:
+                    status, _, _ = await request(
+                        app, "GET", path.format(i=n % args.members), headers=hdrs,
+                        client=(f"10.0.{n % 250}.{n % 200}", 1),
+                    )
+                except Exception:  # e.g. connection pool timeout; a server would send a 500
+                    status = 500
+                latencies.append((time.perf_counter() - t0) * 1000)
+                if status != 200:
+                    errors += 1
+
+        await asyncio.gather(*(one(n) for n in range(50)))  # warm-up
+        latencies.clear()
+        t0 = time.perf_counter()
+        await asyncio.gather(*(one(n) for n in range(args.requests)))
+        elapsed = time.perf_counter() - t0
+        if async_engine is not None:
+            await async_engine.dispose()
+        return elapsed, latencies, errors
+
+    elapsed, latencies, errors = asyncio.run(run())
+    print(
+        f"{args.mode:5s}  {args.requests / elapsed:8.1f} req/s  "
+        f"p50={percentile(latencies, 50):7.1f}ms  p99={percentile(latencies, 99):7.1f}ms  non-200={errors}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--seats", type=int, default=400)
+    parser.add_argument("--members", type=int, default=300)
+    parser.add_argument("--mode", choices=["sync", "async"], help=argparse.SUPPRESS)
+    parser.add_argument("--ids", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        _run_mode(args)
+        return
+
+    path = os.path.join(tempfile.mkdtemp(prefix="seatflow-bench-"), "bench.db")
+    env = dict(os.environ)
+    env.update(
+        DATABASE_URL=f"sqlite:///{path}",
+        JWT_SECRET=env.get("JWT_SECRET", "bench"),
+        PASSWORD_HASH_WORKERS="0",
+        # admission control would shed most of this load; measure the raw path
+        PORTAL_MAX_CONCURRENCY="0",
+        PORTAL_IP_RATE="0",
+        PORTAL_TOKEN_RATE="0",
+    )
+    os.environ.update(env)
+    ids = _seed(args.seats, args.members)
+
+    for mode in ("sync", "async"):
+        mode_env = dict(env)
+        if mode == "async":
+            mode_env["ASYNC_DATABASE_URL"] = f"sqlite+aiosqlite:///{path}"
+        subprocess.run(
+            [sys.executable, "-m", "scripts.bench_async", "--mode", mode, "--ids", json.dumps(ids),
+             "--requests", str(args.requests), "--concurrency", str(args.concurrency),
+             "--members", str(args.members)],
+            env=mode_env,
+            check=True,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Login throughput benchmark.
+
+Fires a burst of concurrent logins at the app in-process while a background reader
+keeps hitting a cheap sync endpoint, then reports login throughput/latency, how many
+logins were shed with 503, and how much the reader's latency suffered.
+
+    cd server
+    python -m scripts.bench_login --logins 200 --concurrency 50 --workers 2
+    python -m scripts.bench_login --workers 0   # bcrypt on the request threadpool
+
+Uses a throwaway SQLite database unless DATABASE_URL is already set.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=2, help="PASSWORD_HASH_WORKERS")
+    parser.add_argument("--max-pending", type=int, default=32, help="PASSWORD_HASH_MAX_PENDING")
+    args = parser.parse_args()
+
+    os.environ["PASSWORD_HASH_WORKERS"] = str(args.workers)
+    os.environ["PASSWORD_HASH_MAX_PENDING"] = str(args.max_pending)
+    os.environ.setdefault("JWT_SECRET", "bench")
+    os.environ["ADMIN_MAX_CONCURRENCY"] = "0"
+    if "DATABASE_URL" not in os.environ:
+        path = os.path.join(tempfile.mkdtemp(prefix="seatflow-bench-"), "bench.db")
+        os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+
+    # imported late so the settings above are picked up
+    from app import models
+    from app.db import Base, SessionLocal, engine
+    from app.main import app
+    from app.security import hash_password
+    from scripts.asgi_client import percentile, request
+
+    Base.metadata.create_all(bind=engine)  # throwaway database; real ones use alembic
+    db = SessionLocal()
+    org = models.Organization(name=f"bench-{int(time.time())}")
+    db.add(org)
+    db.flush()
+    db.add(models.User(org_id=org.id, email="bench@example.com", password_hash=hash_password("bench-password")))
+    db.commit()
+    org_id = org.id
+    db.close()
+
+    creds = {"org_id": org_id, "email": "bench@example.com", "password": "bench-password"}
+
+    async def run():
+        gate = asyncio.Semaphore(args.concurrency)
+        login_ms, statuses, read_ms = [], {}, []
+        done = asyncio.Event()
+
+        async def one_login():
+            async with gate:
+                t0 = time.perf_counter()
+                status, _, _ = await request(app, "POST", "/auth/login", creds)
+                login_ms.append((time.perf_counter() - t0) * 1000)
+                statuses[status] = statuses.get(status, 0) + 1
+
+        async def reader():
+            while not done.is_set():
+                t0 = time.perf_counter()
+                await request(app, "GET", "/organizations")
+                read_ms.append((time.perf_counter() - t0) * 1000)
+                await asyncio.sleep(0.01)
+
+        # warm the pool so process start-up is not counted
+        await request(app, "POST", "/auth/login", creds)
+
+        reader_task = asyncio.create_task(reader())
+        t0 = time.perf_counter()
+        await asyncio.gather(*(one_login() for _ in range(args.logins)))
+        elapsed = time.perf_counter() - t0
+        done.set()
+        await reader_task
+        return elapsed, login_ms, statuses, read_ms
+
+    elapsed, login_ms, statuses, read_ms = asyncio.run(run())
+    ok = statuses.get(200, 0)
+    print(f"workers={args.workers} max_pending={args.max_pending} concurrency={args.concurrency}")
+    print(f"logins: {args.logins} in {elapsed:.2f}s, {ok / elapsed:.1f} ok/s, statuses={statuses}")
+    print(
+        f"login latency ms: p50={percentile(login_ms, 50):.0f} "
+        f"p95={percentile(login_ms, 95):.0f} p99={percentile(login_ms, 99):.0f}"
+    )
+    print(
+        f"reader latency ms during burst ({len(read_ms)} reqs): p50={percentile(read_ms, 50):.1f} "
+        f"p99={percentile(read_ms, 99):.1f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
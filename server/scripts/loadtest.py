@@ -0,0 +1,534 @@
+"""Offline load test: synthetic data plus a mixed admin/portal workload.
+
+Seeds a scratch database through app.models with a configurable number of venues,
+seats, events, members and preferences, then drives a weighted mix of admin and
+portal requests at the app and prints throughput and p50/p95/p99 latency per route.
+
+    cd server
+    python -m scripts.loadtest --venues 5 --seats 800 --events 4 --members 5000 --prefs 600
+    python -m scripts.loadtest --target uvicorn --workers 4 --users 200 --duration 60
+
+--target inprocess (default) calls the ASGI app directly; --target uvicorn starts
+`uvicorn app.main:app` on a local port and talks HTTP/1.1 to it, so worker count
+and the real server loop are part of the measurement. The default database is a
+fresh SQLite file; --database-url points it at a local scratch MySQL instead (the
+tables are created with create_all, so do not use a database you care about).
+--skip-seed reuses whatever is already in --database-url.
+
+Everything runs on the local machine; nothing is downloaded or contacted.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+ADMIN_EMAIL = "loadtest@example.com"
+ADMIN_PASSWORD = "loadtest-password"
+_ZONES = "ABCDEFGH"
+
+# (route label, weight, statuses that count as success). Portal traffic dominates
+# in production: every invitee opens their link, a fraction submits.
+MIX: List[Tuple[str, int, Tuple[int, ...]]] = [
+    ("GET /portal/{token}", 40, (200,)),
+    ("POST /portal/{token}", 10, (200,)),
+    ("GET /events", 6, (200,)),
+    ("GET /events/{event_id}", 4, (200,)),
+    ("GET /events/{event_id}/seatmap", 10, (200,)),
+    ("GET /events/{event_id}/participants", 8, (200,)),
+    ("GET /events/{event_id}/issues", 4, (200,)),
+    ("GET /venues", 4, (200,)),
+    ("GET /venues/{venue_id}/seatmap", 4, (200,)),
+    ("GET /venues/{venue_id}/sections", 3, (200,)),
+    ("POST /events/{event_id}/assignments/move", 4, (200, 409)),
+    ("POST /events/{event_id}/assignments/run", 1, (200,)),
+]
+
+
+# ---- synthetic data ----
+
+def _chunks(rows: List[dict], size: int = 2000):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def seed(args) -> None:
+    from sqlalchemy import insert, select
+
+    from app import models
+    from app.db import Base, SessionLocal, engine
+    from app.security import hash_password
+    from app.services import events_service
+
+    rnd = random.Random(args.seed)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    t0 = time.perf_counter()
+
+    org = models.Organization(name=f"loadtest-{uuid.uuid4().hex[:8]}")
+    db.add(org)
+    db.flush()
+    db.add(models.User(org_id=org.id, email=ADMIN_EMAIL, password_hash=hash_password(ADMIN_PASSWORD)))
+
+    venues = [
+        models.Venue(org_id=org.id, name=f"Venue {i + 1}", location=f"City {i % 7}", status="active", category="Theater")
+        for i in range(args.venues)
+    ]
+    db.add_all(venues)
+    db.flush()
+
+    per_row = 20
+    seat_rows = []
+    for v in venues:
+        zones = _ZONES[: max(1, min(len(_ZONES), args.seats // 200 or 1))]
+        for n in range(args.seats):
+            zone = zones[n % len(zones)]
+            k = n // len(zones)
+            row, num = divmod(k, per_row)
+            seat_rows.append(
+                dict(
+                    venue_id=v.id, code=f"{zone}-{row + 1}-{num + 1:02d}", zone=zone, row_label=str(row + 1),
+                    seat_number=f"{num + 1:02d}", is_accessible=int(num == 0 and row % 3 == 0),
+                    is_blocked=int(rnd.random() < 0.01), is_aisle=int(num in (0, per_row - 1)),
+                    x=(num + 1) * 10, y=(row + 1) * 10,
+                )
+            )
+    for chunk in _chunks(seat_rows):
+        db.execute(insert(models.Seat), chunk)
+
+    genders = ("male", "female")
+    member_rows = [
+        dict(
+            first_name=f"First{i}", last_name=f"Last{i % 997}", phone=f"05{i:08d}", gender=genders[i % 2],
+            needs_accessible=int(rnd.random() < 0.03),
+        )
+        for i in range(args.members)
+    ]
+    for chunk in _chunks(member_rows):
+        db.execute(insert(models.Member), chunk)
+    member_ids = list(db.execute(select(models.Member.id)).scalars())
+
+    events = [
+        models.Event(org_id=org.id, venue_id=v.id, name=f"{v.name} night {j + 1}", status="preferences_open")
+        for v in venues
+        for j in range(args.events)
+    ]
+    db.add_all(events)
+    db.flush()
+
+    pref_rows = []
+    for ev in events:
+        invited = rnd.sample(member_ids, min(args.prefs, len(member_ids)))
+        group = 0
+        i = 0
+        while i < len(invited):
+            size = rnd.choice((1, 1, 1, 2, 2, 3, 4))  # most come alone, some with family
+            code = f"G{ev.id}-{group}" if size > 1 else None
+            group += 1
+            for mid in invited[i:i + size]:
+                pref_rows.append(
+                    dict(
+                        event_id=ev.id, member_id=mid, invite_token=str(uuid.UUID(int=rnd.getrandbits(128))),
+                        group_code=code, wants_aisle=int(rnd.random() < 0.15),
+                        preferred_zone=rnd.choice(_ZONES[:4]) if rnd.random() < 0.6 else None,
+                        needs_accessible=int(rnd.random() < 0.03),
+                    )
+                )
+            i += size
+    for chunk in _chunks(pref_rows):
+        db.execute(insert(models.MemberPreference), chunk)
+    db.commit()
+
+    if not args.no_assign:
+        for ev in events:
+            events_service.run_assignments(db, org.id, ev.id, None)
+
+    print(
+        f"seeded {len(venues)} venues, {len(seat_rows)} seats, {len(events)} events, "
+        f"{len(member_rows)} members, {len(pref_rows)} preferences in {time.perf_counter() - t0:.1f}s"
+    )
+    db.close()
+
+
+def load_targets() -> Dict[str, Any]:
+    """Ids and tokens the workload picks from, read back from the database."""
+    from sqlalchemy import select
+
+    from app import models
+    from app.db import SessionLocal
+
+    db = SessionLocal()
+    try:
+        user = db.execute(
+            select(models.User).where(models.User.email == ADMIN_EMAIL).order_by(models.User.id.desc())
+        ).scalars().first()
+        if user is None:
+            raise SystemExit(f"no {ADMIN_EMAIL} user in the database; run without --skip-seed first")
+        # only the seeded tenant's rows: other tenants' ids would all 404
+        events = list(
+            db.execute(select(models.Event.id, models.Event.venue_id).where(models.Event.org_id == user.org_id))
+        )
+        prefs = defaultdict(list)
+        tokens, solo_tokens = [], []
+        P = models.MemberPreference
+        for pid, event_id, token, group_code in db.execute(
+            select(P.id, P.event_id, P.invite_token, P.group_code)
+            .join(models.Event, models.Event.id == P.event_id)
+            .where(models.Event.org_id == user.org_id)
+        ):
+            prefs[event_id].append(pid)
+            tokens.append(token)
+            if group_code is None:
+                solo_tokens.append(token)
+        seats = defaultdict(list)
+        for sid, venue_id in db.execute(
+            select(models.Seat.id, models.Seat.venue_id)
+            .join(models.Venue, models.Venue.id == models.Seat.venue_id)
+            .where(models.Venue.org_id == user.org_id, models.Seat.is_blocked == 0)
+        ):
+            seats[venue_id].append(sid)
+        return {
+            "org_id": user.org_id,
+            "events": [(int(e), int(v)) for e, v in events],
+            "venues": sorted({int(v) for _, v in events}),
+            "prefs": {int(k): v for k, v in prefs.items()},
+            "seats": {int(k): v for k, v in seats.items()},
+            "tokens": tokens,
+            # a submission replaces the invitee's guest list, so only solo invitees submit
+            "solo_tokens": solo_tokens,
+        }
+    finally:
+        db.close()
+
+
+# ---- transports ----
+
+# send(method, path, json_body, headers, client_ip) -> (status, response body)
+Send = Callable[[str, str, Any, Dict[str, str], str], Awaitable[Tuple[int, bytes]]]
+
+
+def inprocess_transport() -> Tuple[Callable[[], Send], Callable[[], Awaitable[None]]]:
+    from app.db import async_engine
+    from app.main import app
+    from scripts.asgi_client import request
+
+    def connect() -> Send:
+        async def send(method, path, body, headers, client_ip):
+            status, _, payload = await request(app, method, path, body, headers, client=(client_ip, 50000))
+            return status, payload
+
+        return send
+
+    async def close():
+        if async_engine is not None:
+            await async_engine.dispose()
+
+    return connect, close
+
+
+class _HttpConnection:
+    """One keep-alive HTTP/1.1 connection; enough of the protocol for uvicorn's responses."""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+    async def send(self, method, path, body, headers, client_ip):
+        data = json.dumps(body).encode() if body is not None else b""
+        lines = [
+            f"{method} {path} HTTP/1.1",
+            f"Host: {self.host}:{self.port}",
+            f"Content-Length: {len(data)}",
+            "Content-Type: application/json",
+            f"X-Forwarded-For: {client_ip}",
+        ]
+        lines += [f"{k}: {v}" for k, v in headers.items()]
+        raw = ("\r\n".join(lines) + "\r\n\r\n").encode() + data
+        for attempt in (0, 1):
+            if self.writer is None:
+                self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+            try:
+                self.writer.write(raw)
+                await self.writer.drain()
+                return await self._read_response()
+            except (ConnectionError, asyncio.IncompleteReadError):
+                self.close()
+                if attempt:
+                    raise  # the server dropped a fresh connection too
+        raise AssertionError("unreachable")
+
+    async def _read_response(self) -> Tuple[int, bytes]:
+        status = int((await self.reader.readuntil(b"\r\n")).split()[1])
+        length, chunked, close = 0, False, False
+        while True:
+            line = await self.reader.readuntil(b"\r\n")
+            if line == b"\r\n":
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            name, value = name.strip().lower(), value.strip().lower()
+            if name == "content-length":
+                length = int(value)
+            elif name == "transfer-encoding":
+                chunked = "chunked" in value
+            elif name == "connection":
+                close = value == "close"
+        if chunked:
+            parts = []
+            while True:
+                size = int((await self.reader.readuntil(b"\r\n")).split(b";")[0], 16)
+                parts.append((await self.reader.readexactly(size + 2))[:size])
+                if size == 0:
+                    break
+            payload = b"".join(parts)
+        else:
+            payload = await self.reader.readexactly(length) if length else b""
+        if close:
+            self.close()
+        return status, payload
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def uvicorn_transport(workers: int) -> Tuple[Callable[[], Send], Callable[[], Awaitable[None]]]:
+    port = _free_port()
+    proc = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+            "--workers", str(workers), "--log-level", "warning", "--no-access-log",
+        ],
+        env=dict(os.environ),
+    )
+    deadline = time.monotonic() + 60
+    while True:
+        if proc.poll() is not None:
+            raise SystemExit(f"uvicorn exited with status {proc.returncode}")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            break
+        except OSError:
+            if time.monotonic() > deadline:
+                proc.terminate()
+                raise SystemExit("uvicorn did not start within 60s")
+            time.sleep(0.2)
+
+    connections: List[_HttpConnection] = []
+
+    def connect() -> Send:
+        conn = _HttpConnection("127.0.0.1", port)
+        connections.append(conn)
+        return conn.send
+
+    async def close():
+        for conn in connections:
+            conn.close()
+        proc.terminate()
+        proc.wait(timeout=30)
+
+    return connect, close
+
+
+# ---- workload ----
+
+class Recorder:
+    def __init__(self) -> None:
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.failures: Dict[str, int] = defaultdict(int)
+        self.statuses: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+        self.recording = False
+
+    def add(self, route: str, ms: float, status: int, ok: bool) -> None:
+        if not self.recording:
+            return
+        self.latencies[route].append(ms)
+        self.statuses[route][status] += 1
+        if not ok:
+            self.failures[route] += 1
+
+
+def _request_for(route: str, rnd: random.Random, targets: Dict[str, Any]) -> Tuple[str, str, Any]:
+    """Concrete (method, path, body) for one request of the given route label."""
+    method = route.split(" ", 1)[0]
+    event_id, venue_id = rnd.choice(targets["events"])
+    if route == "GET /portal/{token}":
+        return method, f"/portal/{rnd.choice(targets['tokens'])}", None
+    if route == "POST /portal/{token}":
+        body = {
+            "preferred_zone": rnd.choice(("A", "B", "C", None)),
+            "wants_aisle": int(rnd.random() < 0.2),
+            "needs_accessible": 0,
+        }
+        return method, f"/portal/{rnd.choice(targets['solo_tokens'])}", body
+    if route == "POST /events/{event_id}/assignments/move":
+        pref = rnd.choice(targets["prefs"][event_id])
+        seat = rnd.choice(targets["seats"][venue_id])
+        return method, f"/events/{event_id}/assignments/move?preference_id={pref}&seat_id={seat}", None
+    path = route.split(" ", 1)[1].replace("{event_id}", str(event_id)).replace("{venue_id}", str(venue_id))
+    return method, path, None
+
+
+async def _user(
+    n: int, send: Send, auth: Dict[str, str], targets: Dict[str, Any], recorder: Recorder,
+    stop_at: float, rnd: random.Random, think_ms: float,
+) -> None:
+    routes = [r for r, _, _ in MIX]
+    weights = [w for _, w, _ in MIX]
+    expected = {r: ok for r, _, ok in MIX}
+    client_ip = f"10.{n // 62500 % 256}.{n // 250 % 250}.{n % 250 + 1}"
+    while time.monotonic() < stop_at:
+        route = rnd.choices(routes, weights)[0]
+        method, path, body = _request_for(route, rnd, targets)
+        headers = {} if route.startswith(("GET /portal", "POST /portal")) else auth
+        t0 = time.perf_counter()
+        try:
+            status, _ = await send(method, path, body, headers, client_ip)
+        except Exception:  # e.g. a pool timeout surfacing in-process; a server would send a 500
+            status = 599
+        recorder.add(route, (time.perf_counter() - t0) * 1000, status, status in expected[route])
+        if think_ms:
+            await asyncio.sleep(rnd.expovariate(1000.0 / think_ms))
+
+
+async def run_load(args, targets: Dict[str, Any], transport) -> Tuple[Recorder, float]:
+    connect, close = transport
+    recorder = Recorder()
+    try:
+        send = connect()
+        login = {"org_id": targets["org_id"], "email": ADMIN_EMAIL, "password": ADMIN_PASSWORD}
+        status, payload = await send("POST", "/auth/login", login, {}, "127.0.0.1")
+        if status != 200:
+            raise SystemExit(f"login failed with {status}: {payload[:200]!r}")
+        auth = {"authorization": f"Bearer {json.loads(payload)['access_token']}"}
+
+        start = time.monotonic()
+        stop_at = start + args.warmup + args.duration
+        loop = asyncio.get_running_loop()
+        loop.call_later(args.warmup, lambda: setattr(recorder, "recording", True))
+        rnd = random.Random(args.seed)
+        await asyncio.gather(
+            *(
+                _user(n, connect(), auth, targets, recorder, stop_at, random.Random(rnd.random()), args.think_ms)
+                for n in range(args.users)
+            )
+        )
+        return recorder, args.duration
+    finally:
+        await close()
+
+
+def report(recorder: Recorder, seconds: float, as_json: Optional[str]) -> None:
+    from scripts.asgi_client import percentile
+
+    rows = []
+    for route, values in sorted(recorder.latencies.items()):
+        rows.append(
+            {
+                "route": route,
+                "requests": len(values),
+                "rps": round(len(values) / seconds, 1),
+                "p50_ms": round(percentile(values, 50), 1),
+                "p95_ms": round(percentile(values, 95), 1),
+                "p99_ms": round(percentile(values, 99), 1),
+                "failed": recorder.failures.get(route, 0),
+                "statuses": dict(recorder.statuses[route]),
+            }
+        )
+    everything = [v for values in recorder.latencies.values() for v in values]
+    total = {
+        "route": "TOTAL",
+        "requests": len(everything),
+        "rps": round(len(everything) / seconds, 1),
+        "p50_ms": round(percentile(everything, 50), 1),
+        "p95_ms": round(percentile(everything, 95), 1),
+        "p99_ms": round(percentile(everything, 99), 1),
+        "failed": sum(recorder.failures.values()),
+    }
+
+    print(f"{'route':45s} {'reqs':>7s} {'req/s':>8s} {'p50':>8s} {'p95':>8s} {'p99':>8s} {'failed':>7s}")
+    for row in rows + [total]:
+        print(
+            f"{row['route']:45s} {row['requests']:7d} {row['rps']:8.1f} {row['p50_ms']:8.1f} "
+            f"{row['p95_ms']:8.1f} {row['p99_ms']:8.1f} {row['failed']:7d}"
+        )
+    for row in rows:
+        if row["failed"]:
+            codes = ", ".join(f"{code}: {n}" for code, n in sorted(row["statuses"].items()))
+            print(f"  {row['route']} statuses: {codes}")
+    if as_json:
+        with open(as_json, "w") as f:
+            json.dump({"routes": rows, "total": total}, f, indent=2)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    data = parser.add_argument_group("synthetic data")
+    data.add_argument("--venues", type=int, default=3)
+    data.add_argument("--seats", type=int, default=600, help="seats per venue")
+    data.add_argument("--events", type=int, default=2, help="events per venue")
+    data.add_argument("--members", type=int, default=3000)
+    data.add_argument("--prefs", type=int, default=400, help="invitations (preferences) per event")
+    data.add_argument("--no-assign", action="store_true", help="do not run assignments after seeding")
+    data.add_argument("--skip-seed", action="store_true", help="reuse the data already in --database-url")
+    data.add_argument("--seed", type=int, default=1, help="random seed for data and traffic")
+
+    load = parser.add_argument_group("load")
+    load.add_argument("--target", choices=["inprocess", "uvicorn"], default="inprocess")
+    load.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    load.add_argument("--users", type=int, default=50, help="concurrent virtual users")
+    load.add_argument("--duration", type=float, default=30.0, help="measured seconds")
+    load.add_argument("--warmup", type=float, default=5.0, help="unmeasured seconds before that")
+    load.add_argument("--think-ms", type=float, default=0.0, help="mean pause between a user's requests")
+    load.add_argument("--database-url", help="scratch database (default: a new SQLite file)")
+    load.add_argument(
+        "--no-admission", action="store_true", help="disable portal admission control (measure the raw path)"
+    )
+    load.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    if not args.database_url:
+        if args.skip_seed:
+            parser.error("--skip-seed needs --database-url")
+        args.database_url = "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="seatflow-load-"), "load.db")
+    os.environ.update(
+        DATABASE_URL=args.database_url,
+        JWT_SECRET=os.environ.get("JWT_SECRET", "loadtest"),
+        # virtual users are told apart by X-Forwarded-For when going through uvicorn
+        TRUST_FORWARDED_FOR="true",
+    )
+    if args.no_admission:
+        os.environ.update(PORTAL_MAX_CONCURRENCY="0", PORTAL_IP_RATE="0", PORTAL_TOKEN_RATE="0")
+
+    if not args.skip_seed:
+        seed(args)
+    targets = load_targets()
+    transport = inprocess_transport() if args.target == "inprocess" else uvicorn_transport(args.workers)
+    print(
+        f"{args.target}: {args.users} users for {args.duration:g}s (+{args.warmup:g}s warm-up) "
+        f"against {len(targets['events'])} events, {len(targets['tokens'])} invitations"
+    )
+    recorder, seconds = asyncio.run(run_load(args, targets, transport))
+    report(recorder, seconds, args.json)
+
+
+if __name__ == "__main__":
+    main()
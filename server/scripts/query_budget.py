@@ -0,0 +1,339 @@
+"""Query-budget check for every API route.
+
+Seeds a SQLite database at two sizes, calls each route in-process and counts the
+SQL statements it runs. Every route has a budget: the most statements it may run
+at the small size, and a scaling class. "constant" routes must run exactly as many
+statements at the large size as at the small one, so a change that turns a route
+into a per-seat or per-preference loop fails here. "batched" routes (bulk writes in
+chunks) may grow by a few statements, never by one per row.
+
+    cd server
+    python -m scripts.query_budget            # exits 1 if any budget is exceeded
+    python -m scripts.query_budget --report   # statement counts for every route
+
+Failures print the route's statements, repeated shapes first. Each size runs in
+its own interpreter because the engines are built at import. Caches (auth
+principals, portal contexts) are disabled so the uncached path is what is measured.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from collections import Counter
+from typing import Dict, List
+
+CONSTANT = "constant"
+BATCHED = "batched"
+
+# "METHOD /route" -> (max statements at the small size, scaling class). Authenticated
+# routes include the principal lookup, since the auth cache is off.
+BUDGETS: Dict[str, tuple] = {
+    "POST /auth/login": (4, CONSTANT),
+    "POST /auth/refresh": (3, CONSTANT),
+    "GET /auth/me": (2, CONSTANT),
+    "POST /auth/password": (5, CONSTANT),
+    "POST /auth/logout": (1, CONSTANT),
+    "GET /organizations": (1, CONSTANT),
+    "GET /venues": (2, CONSTANT),
+    "POST /venues": (4, CONSTANT),
+    "POST /venues/{venue_id}/seats/generate": (4, BATCHED),  # + the venue's events, for cache invalidation
+    "GET /venues/{venue_id}/seatmap": (3, CONSTANT),
+    "GET /venues/{venue_id}/sections": (2, CONSTANT),
+    "GET /events": (2, CONSTANT),
+    "POST /events": (5, CONSTANT),
+    "GET /events/{event_id}": (5, CONSTANT),
+    "POST /events/{event_id}/assignments/run": (8, BATCHED),  # + run lock: take/insert, then fenced finish
+    "GET /events/{event_id}/participants": (3, CONSTANT),
+    "GET /events/{event_id}/seatmap": (4, CONSTANT),
+    "GET /events/{event_id}/issues": (6, CONSTANT),
+    "POST /events/{event_id}/assignments/move": (4, CONSTANT),
+    "POST /events/{event_id}/assignments/batch": (6, CONSTANT),
+    "POST /events/{event_id}/assignments/clear": (3, CONSTANT),
+    "PATCH /events/{event_id}/status": (7, CONSTANT),
+    "POST /events/{event_id}/members/import": (5, CONSTANT),
+    "POST /events/{event_id}/members/import (background)": (4, CONSTANT),
+    "GET /events/{event_id}/members/import/{job_id}": (2, CONSTANT),
+    "GET /portal/{token}": (3, CONSTANT),
+    "POST /portal/{token}": (7, CONSTANT),  # reads 2, updates 2, removed guests 1, new guests 2
+    "GET /internal/pool": (0, CONSTANT),
+    "GET /internal/metrics": (0, CONSTANT),
+}
+
+SIZES = {"small": 1, "large": 8}
+_IMPORT_CSV = "first_name;last_name;gender;phone;birth_date\n" + "".join(
+    f"Imp{i};Row{i};f;0500{i:04d};1990-01-{1 + i % 28:02d}\n" for i in range(20)
+)
+
+
+def _seed(scale: int) -> dict:
+    from app import models
+    from app.db import Base, SessionLocal, engine
+    from app.security import hash_password
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    org = models.Organization(name="budget")
+    db.add(org)
+    db.flush()
+    db.add(models.User(org_id=org.id, email="budget@example.com", password_hash=hash_password("budget-password")))
+
+    venue = models.Venue(org_id=org.id, name="Budget Hall", status="active", category="Theater")
+    db.add(venue)
+    db.flush()
+    seats = [
+        models.Seat(
+            venue_id=venue.id, code=f"{zone}-{row}-{n}", zone=zone, row_label=str(row), seat_number=str(n),
+            is_accessible=int(n == 1), is_aisle=int(n in (1, 10)), x=n * 10, y=row * 10,
+        )
+        for zone in "ABC"
+        for row in range(1, 2 * scale + 1)
+        for n in range(1, 11)
+    ]
+    seats[-1].is_blocked = 1
+    db.add_all(seats)
+
+    ev = models.Event(org_id=org.id, venue_id=venue.id, name="Budget Night", status="preferences_open")
+    db.add(ev)
+    db.flush()
+    members = [
+        models.Member(first_name=f"F{i}", last_name=f"L{i}", gender="female" if i % 2 else "male")
+        for i in range(15 * scale)
+    ]
+    db.add_all(members)
+    db.flush()
+    db.add_all(
+        models.MemberPreference(
+            event_id=ev.id, member_id=m.id, invite_token=f"tok{i}",
+            group_code=f"G{i // 3}" if i % 4 else None, preferred_zone="ABC"[i % 3], wants_aisle=int(i % 5 == 0),
+        )
+        for i, m in enumerate(members)
+    )
+    db.commit()
+    out = {"org_id": org.id, "venue_id": venue.id, "event_id": ev.id, "scale": scale}
+    db.close()
+    return out
+
+
+def _multipart(filename: str, content: str) -> tuple:
+    boundary = "querybudgetboundary"
+    body = (
+        f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"{filename}\"\r\n"
+        f"Content-Type: text/csv\r\n\r\n{content}\r\n--{boundary}--\r\n"
+    ).encode()
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+def _measure(ids: dict) -> Dict[str, dict]:
+    """Call every route once; returns {"METHOD /route": {"status": ..., "statements": [...]}}."""
+    from sqlalchemy import event
+
+    from app.db import engine
+    from app.main import app
+    from app.perf import current_stats
+    from app.settings import settings
+    from scripts.asgi_client import request
+
+    captured: List[str] = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _capture(conn, cursor, statement, parameters, context, executemany):
+        if current_stats() is not None:  # only statements run on behalf of a request
+            captured.append(statement)
+
+    results: Dict[str, dict] = {}
+    ev, venue = ids["event_id"], ids["venue_id"]
+
+    async def call(key: str, path: str, body=None, headers=None, expect=(200, 201, 202)):
+        method = key.split(" ", 1)[0]
+        captured.clear()
+        status, resp_headers, payload = await request(app, method, path, body, headers)
+        results[key] = {"status": status, "statements": list(captured)}
+        if status not in expect:
+            raise SystemExit(f"{key} ({path}) returned {status}: {payload[:300]!r}")
+        return resp_headers, json.loads(payload) if payload[:1] in (b"{", b"[") else payload
+
+    async def run():
+        login = {"org_id": ids["org_id"], "email": "budget@example.com", "password": "budget-password"}
+        hdrs, token = await call("POST /auth/login", "/auth/login", login)
+        auth = {"authorization": f"Bearer {token['access_token']}"}
+        cookie = hdrs["set-cookie"].split(";", 1)[0]
+        hdrs, _ = await call("POST /auth/refresh", "/auth/refresh", headers={"cookie": cookie})
+        cookie = hdrs["set-cookie"].split(";", 1)[0]
+        await call("GET /auth/me", "/auth/me", headers=auth)
+        await call("GET /organizations", "/organizations", headers=auth)
+
+        await call("GET /venues", "/venues", headers=auth)
+        await call("GET /venues/{venue_id}/sections", f"/venues/{venue}/sections", headers=auth)
+        await call("GET /venues/{venue_id}/seatmap", f"/venues/{venue}/seatmap", headers=auth)
+        _, new_venue = await call("POST /venues", "/venues", {"name": "Budget Annex", "category": "Other"}, auth)
+        generate = {"zones": [{"zone": "Z", "rows": 5 * ids["scale"], "seats_per_row": 20, "accessible_rows": [1]}]}
+        await call(
+            "POST /venues/{venue_id}/seats/generate", f"/venues/{new_venue['id']}/seats/generate", generate, auth
+        )
+
+        await call("GET /events", "/events", headers=auth)
+        await call("POST /events", "/events", {"venue_id": venue, "name": "Budget Matinee"}, auth)
+        await call("GET /events/{event_id}", f"/events/{ev}", headers=auth)
+        await call("GET /portal/{token}", "/portal/tok1")
+        submit = {
+            "preferred_zone": "B",
+            "wants_aisle": 1,
+            "guests": [{"first_name": "Guest", "last_name": "One", "gender": "male"}],
+        }
+        await call("POST /portal/{token}", "/portal/tok1", submit)
+        await call("POST /events/{event_id}/assignments/run", f"/events/{ev}/assignments/run", headers=auth)
+        _, participants = await call(
+            "GET /events/{event_id}/participants", f"/events/{ev}/participants", headers=auth
+        )
+        _, seatmap = await call("GET /events/{event_id}/seatmap", f"/events/{ev}/seatmap", headers=auth)
+        await call("GET /events/{event_id}/issues", f"/events/{ev}/issues", headers=auth)
+
+        pref = participants[0]["preference_id"]
+        free = next(s["id"] for s in seatmap if not s.get("assignment") and not s.get("is_blocked"))
+        await call(
+            "POST /events/{event_id}/assignments/move",
+            f"/events/{ev}/assignments/move?preference_id={pref}&seat_id={free}",
+            headers=auth,
+        )
+        await call(
+            "POST /events/{event_id}/assignments/clear",
+            f"/events/{ev}/assignments/clear?preference_id={pref}",
+            headers=auth,
+        )
+        a, b = [s["assignment"]["preference_id"] for s in seatmap if s.get("assignment")][:2]
+        ops = [
+            {"op": "swap", "preference_id": a, "other_preference_id": b},
+            {"op": "move", "preference_id": pref, "seat_id": free},
+        ]
+        await call("POST /events/{event_id}/assignments/batch", f"/events/{ev}/assignments/batch", {"ops": ops}, auth)
+
+        body, ctype = _multipart("members.csv", _IMPORT_CSV)
+        await call(
+            "POST /events/{event_id}/members/import", f"/events/{ev}/members/import",
+            body, {**auth, "content-type": ctype},
+        )
+        body, ctype = _multipart("more-members.csv", _IMPORT_CSV.replace("Imp", "More"))
+        _, job = await call(
+            "POST /events/{event_id}/members/import (background)", f"/events/{ev}/members/import?background=1",
+            body, {**auth, "content-type": ctype},
+        )
+        await call(
+            "GET /events/{event_id}/members/import/{job_id}", f"/events/{ev}/members/import/{job['job_id']}",
+            headers=auth,
+        )
+        await call("PATCH /events/{event_id}/status", f"/events/{ev}/status", {"status": "locked"}, auth)
+
+        internal = {"x-internal-token": settings.INTERNAL_TOKEN}
+        await call("GET /internal/pool", "/internal/pool", headers=internal)
+        await call("GET /internal/metrics", "/internal/metrics", headers=internal)
+
+        change = {"current_password": "budget-password", "new_password": "budget-password-2"}
+        await call("POST /auth/password", "/auth/password", change, auth)
+        await call("POST /auth/logout", "/auth/logout", headers={"cookie": cookie})
+
+    asyncio.run(run())
+    return results
+
+
+def _shape_report(statements: List[str]) -> List[str]:
+    from app.perf import statement_shape
+
+    shapes = Counter(statement_shape(s) for s in statements)
+    return [f"    {n:4d} x {shape[:240]}" for shape, n in shapes.most_common()]
+
+
+def _check(counts: Dict[str, Dict[str, dict]]) -> List[str]:
+    small, large = counts["small"], counts["large"]
+    ratio = SIZES["large"] / SIZES["small"]
+    failures: List[str] = []
+    for key, (limit, scaling) in BUDGETS.items():
+        if key not in small or key not in large:
+            failures.append(f"{key}: not exercised")
+            continue
+        n_small, n_large = len(small[key]["statements"]), len(large[key]["statements"])
+        problems = []
+        if n_small > limit:
+            problems.append(f"{n_small} statements at the small size, budget is {limit}")
+        if scaling == CONSTANT and n_large != n_small:
+            problems.append(f"constant route ran {n_small} statements at the small size but {n_large} at the large one")
+        if scaling == BATCHED and n_large - n_small > ratio:
+            problems.append(f"batched route grew from {n_small} to {n_large} statements with {ratio:g}x the data")
+        if problems:
+            failures.append(f"{key}: " + "; ".join(problems))
+            failures.extend(_shape_report(large[key]["statements"]))
+    for key in sorted(set(small) - set(BUDGETS)):
+        failures.append(f"{key}: no budget defined ({len(small[key]['statements'])} statements)")
+    return failures
+
+
+def _run_size(args) -> None:
+    ids = _seed(SIZES[args.size])
+    results = _measure(ids)
+    with open(args.out, "w") as f:
+        json.dump(results, f)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--report", action="store_true", help="print statement counts instead of checking")
+    parser.add_argument("--size", choices=list(SIZES), help=argparse.SUPPRESS)
+    parser.add_argument("--out", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.size:
+        _run_size(args)
+        return
+
+    workdir = tempfile.mkdtemp(prefix="seatflow-budget-")
+    counts: Dict[str, Dict[str, dict]] = {}
+    for size in SIZES:
+        out = os.path.join(workdir, f"{size}.json")
+        env = dict(os.environ)
+        env.update(
+            DATABASE_URL=f"sqlite:///{os.path.join(workdir, size + '.db')}",
+            ASYNC_DATABASE_URL="",
+            READ_DATABASE_URL="",
+            JWT_SECRET=env.get("JWT_SECRET", "budget"),
+            PASSWORD_HASH_WORKERS="0",
+            AUTH_CACHE_TTL_SECONDS="0",
+            RESPONSE_CACHE_BACKEND="none",  # budgets are for the uncached path
+            PORTAL_WRITE_BEHIND="false",
+            PERF_METRICS="true",
+            PERF_N_PLUS_ONE_THRESHOLD="0",  # this script reports repeated shapes itself
+            IMPORT_STAGING_DIR=os.path.join(workdir, f"imports-{size}"),
+            PORTAL_MAX_CONCURRENCY="0",
+            PORTAL_IP_RATE="0",
+            PORTAL_TOKEN_RATE="0",
+            INTERNAL_TOKEN="budget-internal",
+        )
+        subprocess.run(
+            [sys.executable, "-m", "scripts.query_budget", "--size", size, "--out", out], env=env, check=True
+        )
+        with open(out) as f:
+            counts[size] = json.load(f)
+
+    if args.report:
+        print(f"{'route':55s} {'small':>6s} {'large':>6s}  budget")
+        for key in sorted(counts["small"]):
+            limit, scaling = BUDGETS.get(key, ("-", "-"))
+            print(
+                f"{key:55s} {len(counts['small'][key]['statements']):6d} "
+                f"{len(counts['large'].get(key, {}).get('statements', [])):6d}  {limit} {scaling}"
+            )
+        return
+
+    failures = _check(counts)
+    if failures:
+        print("query budget exceeded:")
+        print("\n".join(failures))
+        sys.exit(1)
+    print(f"query budgets ok for {len(BUDGETS)} routes")
+
+
+if __name__ == "__main__":
+    main()
@@ -25,6 +25,60 @@ SET @@SESSION.SQL_LOG_BIN= 0;
 
 SET @@GLOBAL.GTID_PURGED=/*!80000 '+'*/ 'ff4e81f8-f6bc-11f0-a030-f157df581978:1-114';
 
+--
+-- Table structure for table `alembic_version`
+--
+
+DROP TABLE IF EXISTS `alembic_version`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!50503 SET character_set_client = utf8mb4 */;
+CREATE TABLE `alembic_version` (
+  `version_num` varchar(32) NOT NULL,
+  PRIMARY KEY (`version_num`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
+--
+-- Dumping data for table `alembic_version`
+--
+
+LOCK TABLES `alembic_version` WRITE;
+/*!40000 ALTER TABLE `alembic_version` DISABLE KEYS */;
+INSERT INTO `alembic_version` VALUES ('0005');
+/*!40000 ALTER TABLE `alembic_version` ENABLE KEYS */;
+UNLOCK TABLES;
+
+--
+-- Table structure for table `assignment_runs`
+--
+
+DROP TABLE IF EXISTS `assignment_runs`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!50503 SET character_set_client = utf8mb4 */;
+CREATE TABLE `assignment_runs` (
+  `event_id` bigint unsigned NOT NULL,
+  `run_id` varchar(36) NOT NULL,
+  `status` varchar(20) NOT NULL,
+  `params` text NOT NULL,
+  `result` text,
+  `message` text,
+  `worker_id` varchar(64) DEFAULT NULL,
+  `started_at` datetime NOT NULL,
+  `finished_at` datetime DEFAULT NULL,
+  PRIMARY KEY (`event_id`),
+  CONSTRAINT `fk_assignment_runs_event` FOREIGN KEY (`event_id`) REFERENCES `events` (`id`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
+--
+-- Dumping data for table `assignment_runs`
+--
+
+LOCK TABLES `assignment_runs` WRITE;
+/*!40000 ALTER TABLE `assignment_runs` DISABLE KEYS */;
+/*!40000 ALTER TABLE `assignment_runs` ENABLE KEYS */;
+UNLOCK TABLES;
+
 --
 -- Table structure for table `events`
 --
@@ -39,9 +93,12 @@ CREATE TABLE `events` (
   `event_date` datetime DEFAULT NULL,
   `status` enum('draft','preferences_open','locked','published') NOT NULL DEFAULT 'draft',
   `created_at` timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  `org_id` bigint unsigned NOT NULL,
   PRIMARY KEY (`id`),
   KEY `idx_events_venue` (`venue_id`),
-  KEY `idx_events_date` (`event_date`),
+  KEY `idx_events_org_date` (`org_id`,`event_date`),
+  KEY `idx_events_org_venue` (`org_id`,`venue_id`),
+  CONSTRAINT `fk_events_org` FOREIGN KEY (`org_id`) REFERENCES `organizations` (`id`) ON DELETE RESTRICT ON UPDATE CASCADE,
   CONSTRAINT `fk_events_venue` FOREIGN KEY (`venue_id`) REFERENCES `venues` (`id`) ON DELETE RESTRICT ON UPDATE CASCADE
 ) ENGINE=InnoDB AUTO_INCREMENT=4 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
 /*!40101 SET character_set_client = @saved_cs_client */;
@@ -52,10 +109,44 @@ CREATE TABLE `events` (
 
 LOCK TABLES `events` WRITE;
 /*!40000 ALTER TABLE `events` DISABLE KEYS */;
-INSERT INTO `events` VALUES (1,1,'Annual Conference 2026','2026-01-25 19:00:00','preferences_open','2026-01-24 16:00:27'),(2,4,'Theater Show','2026-02-19 00:00:00','preferences_open','2026-02-03 13:58:23'),(3,4,'Show','2026-03-06 00:00:00','draft','2026-02-04 18:00:12');
+INSERT INTO `events` VALUES (1,1,'Annual Conference 2026','2026-01-25 19:00:00','preferences_open','2026-01-24 16:00:27',1),(2,4,'Theater Show','2026-02-19 00:00:00','preferences_open','2026-02-03 13:58:23',1),(3,4,'Show','2026-03-06 00:00:00','draft','2026-02-04 18:00:12',1);
 /*!40000 ALTER TABLE `events` ENABLE KEYS */;
 UNLOCK TABLES;
 
+--
+-- Table structure for table `import_jobs`
+--
+
+DROP TABLE IF EXISTS `import_jobs`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!50503 SET character_set_client = utf8mb4 */;
+CREATE TABLE `import_jobs` (
+  `id` varchar(36) NOT NULL,
+  `event_id` bigint unsigned NOT NULL,
+  `status` varchar(20) NOT NULL,
+  `upsert` tinyint(1) NOT NULL DEFAULT '0',
+  `file_path` varchar(500) NOT NULL,
+  `rows_processed` int NOT NULL,
+  `created_members` int NOT NULL,
+  `updated_members` int NOT NULL,
+  `unchanged_members` int NOT NULL,
+  `preferences_created` int NOT NULL,
+  `preferences_updated` int NOT NULL,
+  `error_count` int NOT NULL,
+  `errors` text,
+  `message` text,
+  `worker_id` varchar(64) DEFAULT NULL,
+  `attempts` int NOT NULL DEFAULT '0',
+  `heartbeat_at` datetime DEFAULT NULL,
+  `created_at` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  `finished_at` datetime DEFAULT NULL,
+  PRIMARY KEY (`id`),
+  KEY `idx_import_jobs_event` (`event_id`),
+  KEY `idx_import_jobs_status` (`status`),
+  CONSTRAINT `fk_import_jobs_event` FOREIGN KEY (`event_id`) REFERENCES `events` (`id`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
 --
 -- Table structure for table `member_preferences`
 --
@@ -195,6 +286,28 @@ INSERT INTO `seats` VALUES (1,1,'VIP-A-01','VIP','A','01',1,0,10,10,'2026-01-24
 /*!40000 ALTER TABLE `seats` ENABLE KEYS */;
 UNLOCK TABLES;
 
+--
+-- Table structure for table `user_sessions`
+--
+
+DROP TABLE IF EXISTS `user_sessions`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!50503 SET character_set_client = utf8mb4 */;
+CREATE TABLE `user_sessions` (
+  `id` bigint unsigned NOT NULL AUTO_INCREMENT,
+  `user_id` bigint unsigned NOT NULL,
+  `token_hash` char(64) NOT NULL,
+  `expires_at` datetime NOT NULL,
+  `created_at` timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  `rotated_at` datetime DEFAULT NULL,
+  PRIMARY KEY (`id`),
+  UNIQUE KEY `uq_user_sessions_token` (`token_hash`),
+  KEY `idx_user_sessions_user` (`user_id`),
+  KEY `idx_user_sessions_expires` (`expires_at`),
+  CONSTRAINT `fk_user_sessions_user` FOREIGN KEY (`user_id`) REFERENCES `users` (`id`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
 --
 -- Table structure for table `users`
 --
@@ -208,8 +321,7 @@ CREATE TABLE `users` (
   `email` varchar(255) NOT NULL,
   `password_hash` varchar(255) NOT NULL,
   `created_at` timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP,
-  `refresh_token_hash` varchar(255) DEFAULT NULL,
-  `refresh_token_expires_at` datetime DEFAULT NULL,
+  `token_version` int NOT NULL DEFAULT '0',
   PRIMARY KEY (`id`),
   UNIQUE KEY `uq_user_email_per_org` (`org_id`,`email`),
   KEY `idx_users_org` (`org_id`),
@@ -223,7 +335,7 @@ CREATE TABLE `users` (
 
 LOCK TABLES `users` WRITE;
 /*!40000 ALTER TABLE `users` DISABLE KEYS */;
-INSERT INTO `users` VALUES (1,1,'admin@example.com','$2b$12$DwUq91IhxfxyV5itHC5dp.Juu3dG4KN2/Yw4NRFSsUYjZmxj/NuJ2','2026-01-24 16:00:27','505244f1a5b3147f3f400a3fb4db5a9da0ef2425688cf139115c8eefeab25051','2026-02-18 12:04:52');
+INSERT INTO `users` VALUES (1,1,'admin@example.com','$2b$12$DwUq91IhxfxyV5itHC5dp.Juu3dG4KN2/Yw4NRFSsUYjZmxj/NuJ2','2026-01-24 16:00:27',0);
 /*!40000 ALTER TABLE `users` ENABLE KEYS */;
 UNLOCK TABLES;
 
@@ -241,7 +353,10 @@ CREATE TABLE `venues` (
   `location` varchar(255) DEFAULT NULL,
   `status` enum('active','inactive') NOT NULL DEFAULT 'active',
   `category` enum('Convention','Stadium','Theater','Synagogue','EventHall','Airplane','Other') NOT NULL DEFAULT 'Other',
-  PRIMARY KEY (`id`)
+  `org_id` bigint unsigned NOT NULL,
+  PRIMARY KEY (`id`),
+  KEY `idx_venues_org_name` (`org_id`,`name`),
+  CONSTRAINT `fk_venues_org` FOREIGN KEY (`org_id`) REFERENCES `organizations` (`id`) ON DELETE RESTRICT ON UPDATE CASCADE
 ) ENGINE=InnoDB AUTO_INCREMENT=6 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
 /*!40101 SET character_set_client = @saved_cs_client */;
 
@@ -251,7 +366,7 @@ CREATE TABLE `venues` (
 
 LOCK TABLES `venues` WRITE;
 /*!40000 ALTER TABLE `venues` DISABLE KEYS */;
-INSERT INTO `venues` VALUES (1,'Main Hall','2026-01-24 16:00:27','Tel Aviv','active','Synagogue'),(3,'Main Theater','2026-02-03 10:16:14','Ramat Gan','active','Theater'),(4,'Herzeliya Theater','2026-02-03 10:33:56','Tel Aviv','active','Theater'),(5,'Boeing 747','2026-02-04 18:04:31','Ben Gurion Airport','active','Airplane');
+INSERT INTO `venues` VALUES (1,'Main Hall','2026-01-24 16:00:27','Tel Aviv','active','Synagogue',1),(3,'Main Theater','2026-02-03 10:16:14','Ramat Gan','active','Theater',1),(4,'Herzeliya Theater','2026-02-03 10:33:56','Tel Aviv','active','Theater',1),(5,'Boeing 747','2026-02-04 18:04:31','Ben Gurion Airport','active','Airplane',1);
 /*!40000 ALTER TABLE `venues` ENABLE KEYS */;
 UNLOCK TABLES;
 